@@ -2,15 +2,14 @@ from app import create_app
 from app import data_access
 from flask import render_template, request, redirect, url_for, session, send_from_directory, jsonify
 from interviewer_bot import run_interview_chat, get_memory_gatherer_prompt, generate_image_tags
-from prompts import build_summary_prompt, build_context_summary
-from image_metadata import extract_image_metadata, format_metadata_for_display, get_metadata_summary
+from prompts import build_summary_prompt, build_context_summary, parse_structured_summary
+from image_metadata import format_metadata_for_display, get_metadata_summary
+from metadata_cache import cached_image_metadata, cached_exif_record, get_metadata_cache
+from llm_client import get_llm_client
 from flask_session import Session
 import os
 import re
-from tinydb import TinyDB, Query
-import openai
 import base64
-from collections import Counter
 
 # Set static_folder to the project root static directory
 static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'static'))
@@ -35,20 +34,16 @@ os.makedirs(IMAGE_FOLDER, exist_ok=True)
 def index():
     images = [f for f in os.listdir(IMAGE_FOLDER) if f.lower().endswith((".png", ".jpg", ".jpeg", ".gif"))]
     image_data = []
-    all_tags = []
     for img in images:
         structured_summary = data_access.get_structured_summary(img)
-        tags = data_access.get_tags(img)
         image_data.append({
             "name": img,
             "summary_title": structured_summary.get("summary_title", ""),
             "summary_summary": structured_summary.get("summary_summary", ""),
-            "tags": tags
+            "tags": data_access.tags_for_image(img)
         })
-        all_tags.extend(tags)
-    tag_counts = Counter(all_tags)
-    # Sort tags by count descending, then alphabetically
-    sorted_tag_counts = sorted(tag_counts.items(), key=lambda x: (-x[1], x[0].lower()))
+    # Sorted by count descending, then alphabetically
+    sorted_tag_counts = data_access.tag_counts()
     print("DEBUG: image names for index:", [img["name"] for img in image_data])
     return render_template("ai_test_index.html", images=image_data, tag_counts=sorted_tag_counts)
 
@@ -167,12 +162,7 @@ def start_interview(image_name):
 
     # Extract captured date from image metadata
     image_path = os.path.join(IMAGE_FOLDER, image_name)
-    metadata = extract_image_metadata(image_path)
-    date_captured = None
-    for tag in ['DateTimeOriginal', 'DateTime', 'DateTimeDigitized']:
-        if tag in metadata.get('exif_data', {}):
-            date_captured = metadata['exif_data'][tag]
-            break
+    date_captured = cached_exif_record(image_path).get('captured_at')
     if date_captured:
         context_texts.insert(0, f"This photo was captured on {date_captured}.")
 
@@ -186,17 +176,9 @@ def start_interview(image_name):
     session["image_name"] = image_name
     return jsonify({"ai_reply": ai_reply, "messages": updated_messages})
 
-def parse_structured_summary(summary_text):
-    # Accepts both "Summary:" and "### Summary:" (same for other sections)
-    import re
-    title = summary = ""
-    title_match = re.search(r"Title:\s*([\s\S]*?)(?=\n\s*(?:###\s*)?Summary:|$)", summary_text, re.IGNORECASE)
-    summary_match = re.search(r"(?:###\s*)?Summary:\s*([\s\S]*)", summary_text, re.IGNORECASE)
-    if title_match:
-        title = title_match.group(1).strip()
-    if summary_match:
-        summary = summary_match.group(1).strip()
-    return title, summary
+def _cache_mode():
+    """LLM response cache mode for this request: ``?refresh=1`` bypasses cached replies."""
+    return "refresh" if request.args.get("refresh") else True
 
 @app.route("/summarise/<image_name>", methods=["POST"])
 def summarise(image_name):
@@ -206,12 +188,7 @@ def summarise(image_name):
 
     # Extract captured date from image metadata
     image_path = os.path.join(IMAGE_FOLDER, image_name)
-    metadata = extract_image_metadata(image_path)
-    date_captured = None
-    for tag in ['DateTimeOriginal', 'DateTime', 'DateTimeDigitized']:
-        if tag in metadata.get('exif_data', {}):
-            date_captured = metadata['exif_data'][tag]
-            break
+    date_captured = cached_exif_record(image_path).get('captured_at')
     if date_captured:
         context_texts.insert(0, f"This photo was captured on {date_captured}.")
 
@@ -219,7 +196,9 @@ def summarise(image_name):
     summary_prompt = build_summary_prompt(context_texts, [])
 
     # Call OpenAI to generate the summary
-    ai_summary, _ = run_interview_chat(summary_prompt, previous_messages=None, image_path=image_path)
+    # Unchanged photo and context -> served from the response cache; ?refresh=1 forces a new summary
+    ai_summary, _ = run_interview_chat(summary_prompt, previous_messages=None, image_path=image_path,
+                                       cache=_cache_mode())
     # Parse the summary into sections
     title, summary = parse_structured_summary(ai_summary)
     # Store the structured summary in the database
@@ -244,7 +223,7 @@ def get_image_metadata(image_name):
             return jsonify({"error": "Image not found"}), 404
         
         # Extract raw metadata
-        raw_metadata = extract_image_metadata(image_path)
+        raw_metadata = cached_image_metadata(image_path)
         
         # Format for display
         formatted_metadata = format_metadata_for_display(raw_metadata)
@@ -262,18 +241,23 @@ def get_image_metadata(image_name):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route("/api/metadata_cache/stats", methods=["GET"])
+def metadata_cache_stats():
+    """Hit/miss counters for the image metadata cache."""
+    return jsonify({"success": True, "stats": get_metadata_cache().stats()})
+
+@app.route("/api/llm/stats", methods=["GET"])
+def llm_stats():
+    """Call, error, throttling and latency counters for the shared LLM client and its response cache."""
+    return jsonify({"success": True, "stats": get_llm_client().stats(),
+                    "cache": get_llm_client().response_cache.stats()})
+
 @app.route("/clear_all_summaries", methods=["POST"])
 def clear_all_summaries_route():
     try:
-        db = TinyDB('local_contexts.json')
-        for item in db:
-            db.update({
-                'summary': '',
-                'summary_title': '',
-                'summary_summary': '',
-                'summary_description': ''
-            }, Query().image_name == item['image_name'])
-        return jsonify({"success": True})
+        # One UPDATE for all images instead of a file rewrite per image
+        cleared = data_access.clear_all_summaries()
+        return jsonify({"success": True, "cleared": cleared})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -299,52 +283,49 @@ def ai_tag_image(image_name):
     summary = summary_data.get('summary', '')
     context_text = ' '.join([c['text'] for c in contexts])
 
-    # Gather all unique tags from all images
-    images = [f for f in os.listdir(IMAGE_FOLDER) if f.lower().endswith((".png", ".jpg", ".jpeg", ".gif"))]
-    all_tags = []
-    for img in images:
-        tags = data_access.get_tags(img)
-        all_tags.extend(tags)
-    unique_tags = list(set(all_tags))
+    # All unique tags, from the tag index
+    unique_tags = data_access.tag_vocabulary()
 
     image_path = os.path.join(IMAGE_FOLDER, image_name)
-    tags = generate_image_tags(image_path, context_text, summary, model="gpt-4o-mini", existing_tags=unique_tags)
+    tags = generate_image_tags(image_path, context_text, summary, model="gpt-4o-mini", existing_tags=unique_tags,
+                               cache=_cache_mode())
     data_access.set_tags(image_name, tags)
     return jsonify({"tags": tags})
 
 @app.route('/api/remove_tag/<tag>', methods=['POST'])
 def remove_tag(tag):
-    from app.local_db import _db, Context
-    all_docs = _db.all()
-    for doc in all_docs:
-        tags = doc.get('tags', [])
-        if tag in tags:
-            tags = [t for t in tags if t != tag]
-            _db.update({'tags': tags}, Context.image_name == doc['image_name'])
+    data_access.remove_tag(tag)
     return jsonify({"success": True, "removed": tag})
 
 @app.route('/api/clear_all_tags', methods=['POST'])
 def clear_all_tags():
-    from app.local_db import _db, Context
-    all_docs = _db.all()
-    for doc in all_docs:
-        if 'tags' in doc and doc['tags']:
-            _db.update({'tags': []}, Context.image_name == doc['image_name'])
+    data_access.clear_all_tags()
     return jsonify({"success": True})
 
+@app.route('/api/tags', methods=['GET'])
+def api_tag_counts():
+    """Tag counts, most used first."""
+    return jsonify([{"tag": tag, "count": count} for tag, count in data_access.tag_counts()])
+
+@app.route('/api/tags/vocabulary', methods=['GET'])
+def api_tag_vocabulary():
+    """All distinct tags, alphabetically."""
+    return jsonify(data_access.tag_vocabulary())
+
+@app.route('/api/tags/<tag>/images', methods=['GET'])
+def api_images_for_tag(tag):
+    """Names of the images that have a tag."""
+    return jsonify(data_access.images_for_tag(tag))
+
 @app.route('/api/ai_tag_question/<tag>', methods=['POST'])
 def ai_tag_question(tag):
     # Gather all images with the given tag
-    images = [f for f in os.listdir(IMAGE_FOLDER) if f.lower().endswith((".png", ".jpg", ".jpeg", ".gif"))]
     filtered_contexts = []
     filtered_tags = []
-    for img in images:
-        tags = data_access.get_tags(img)
-        if tag in tags:
-            summary_data = data_access.get_structured_summary(img)
-            context = summary_data.get('summary', '')
-            filtered_contexts.append(context)
-            filtered_tags.extend(tags)
+    for img in data_access.images_for_tag(tag):
+        summary_data = data_access.get_structured_summary(img)
+        filtered_contexts.append(summary_data.get('summary', ''))
+        filtered_tags.extend(data_access.tags_for_image(img))
     # Remove duplicates
     filtered_tags = list(set(filtered_tags))
     # Compose prompt
@@ -366,14 +347,14 @@ def ai_tag_question(tag):
     print(f"User: {prompt}")
     print("="*80 + "\n")
     
-    response = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
+    question = get_llm_client().chat(
+        [
             {"role": "user", "content": prompt}
         ],
-        max_tokens=100
-    )
-    question = response.choices[0].message.content.strip() if response.choices[0].message.content else ''
+        model="gpt-4o-mini",
+        max_tokens=100,
+        cache=_cache_mode()
+    ).strip()
     return jsonify({"question": question})
 
 if __name__ == "__main__":
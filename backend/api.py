@@ -1,11 +1,12 @@
 import os
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
-from app.enhanced_data_store import EnhancedDataStore
+from app.enhanced_data_store import get_store
+import json
 import mimetypes
 from io import BytesIO
-from interviewer_bot import run_interview_chat
+from interviewer_bot import run_interview_chat, stream_interview_chat, encode_image, get_cached_encoded_image
 import tempfile
 
 # Load environment variables from config.env
@@ -14,8 +15,35 @@ load_dotenv(dotenv_path='config.env')
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
-# Enhanced Data Store setup (PostgreSQL)
-enhanced_db = EnhancedDataStore()
+# Shared Enhanced Data Store (pooled PostgreSQL); schema is initialised once at startup
+enhanced_db = get_store()
+
+def encode_gcs_image(gcs_path):
+    """Return the interview-ready base64 image for a GCS object.
+    
+    The cache key includes the blob generation, so the image is only downloaded
+    and resized once per object version rather than on every chat turn.
+    """
+    bucket = storage_client.bucket(GCS_BUCKET_NAME)
+    blob = bucket.get_blob(gcs_path)
+    if blob is None:
+        return None
+    
+    cache_key = f"gcs-{GCS_BUCKET_NAME}-{blob.generation}-{blob.md5_hash}".replace('/', '_')
+    encoded = get_cached_encoded_image(cache_key)
+    if encoded is not None:
+        return encoded
+    
+    # Download image to temporary file
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
+        blob.download_to_filename(tmp_file.name)
+        tmp_path = tmp_file.name
+    
+    try:
+        return encode_image(tmp_path, cache_key=cache_key)
+    finally:
+        # Clean up temp file
+        os.unlink(tmp_path)
 
 @app.route('/health')
 def health_check():
@@ -27,11 +55,10 @@ def list_media():
     
     # Get GCS bucket
     bucket = storage_client.bucket(GCS_BUCKET_NAME)
-    blobs = bucket.list_blobs()
-    gcs_files = [blob.name for blob in blobs]
+    blobs = list(bucket.list_blobs())
 
-    # Sync with Firestore
-    new_items = enhanced_db.sync_gcs_files(gcs_files)
+    # Incremental sync: blobs carry size and update time, so changed objects are detected too
+    new_items = enhanced_db.sync_gcs_files(blobs)
     
     # Get all media items from Firestore
     items = enhanced_db.list_media_items()
@@ -137,25 +164,16 @@ def start_interview(media_id):
         return jsonify({"error": "AI Interview is only available for images"}), 400
     
     try:
-        # Get the image from GCS for the interview
-        bucket = storage_client.bucket(GCS_BUCKET_NAME)
-        blob = bucket.blob(item['gcs_path'])
-        
-        # Download image to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-            blob.download_to_filename(tmp_file.name)
-            tmp_path = tmp_file.name
+        # Get the (cached) encoded image from GCS for the interview
+        encoded_image = encode_gcs_image(item['gcs_path'])
         
         # Start interview
         ai_question, messages = run_interview_chat(
             "I'd like to talk about this image.",
             previous_messages=None,
-            image_path=tmp_path
+            encoded_image=encoded_image
         )
         
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
         return jsonify({
             "media_id": media_id,
             "ai_question": ai_question,
@@ -180,25 +198,16 @@ def chat_interview(media_id):
     previous_messages = data['messages']
     
     try:
-        # Get the image from GCS for the interview
-        bucket = storage_client.bucket(GCS_BUCKET_NAME)
-        blob = bucket.blob(item['gcs_path'])
-        
-        # Download image to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-            blob.download_to_filename(tmp_file.name)
-            tmp_path = tmp_file.name
+        # Get the (cached) encoded image from GCS for the interview
+        encoded_image = encode_gcs_image(item['gcs_path'])
         
         # Continue interview
         ai_question, messages = run_interview_chat(
             user_text, 
             previous_messages=previous_messages,
-            image_path=tmp_path
+            encoded_image=encoded_image
         )
         
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
         return jsonify({
             "media_id": media_id,
             "ai_question": ai_question,
@@ -208,6 +217,56 @@ def chat_interview(media_id):
     except Exception as e:
         return jsonify({"error": f"Failed to continue interview: {str(e)}"}), 500
 
+def format_sse(event, data):
+    """Encode one Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/media/<media_id>/interview/stream', methods=['POST'])
+def stream_interview(media_id):
+    """Continue an AI interview, streaming the reply as Server-Sent Events.
+    
+    Takes the same body as /interview/chat. Emits ``token`` events
+    (``{"text": ...}``) as the reply is generated, then one ``done`` event with
+    the full ``ai_question`` and updated ``messages``, or an ``error`` event.
+    """
+    item = enhanced_db.get_media_item(media_id)
+    if not item:
+        return jsonify({"error": "Media item not found"}), 404
+    
+    data = request.get_json()
+    if not data or 'user_text' not in data or 'messages' not in data:
+        return jsonify({"error": "Missing 'user_text' or 'messages' in request body"}), 400
+    
+    try:
+        # Get the (cached) encoded image from GCS for the interview
+        encoded_image = encode_gcs_image(item['gcs_path'])
+        
+        tokens, messages = stream_interview_chat(
+            data['user_text'],
+            previous_messages=data['messages'],
+            encoded_image=encoded_image
+        )
+    except Exception as e:
+        return jsonify({"error": f"Failed to continue interview: {str(e)}"}), 500
+    
+    def events():
+        try:
+            for text in tokens:
+                yield format_sse('token', {"text": text})
+            # The reply is appended to messages once the stream is exhausted
+            yield format_sse('done', {
+                "media_id": media_id,
+                "ai_question": messages[-1]['content'],
+                "messages": messages
+            })
+        except Exception as e:
+            yield format_sse('error', {"error": f"Failed to continue interview: {str(e)}"})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # stop nginx buffering the stream
+    })
+
 @app.route('/api/media/<media_id>/interview/save', methods=['POST'])
 def save_interview(media_id):
     """Save an interview conversation as context."""
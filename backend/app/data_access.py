@@ -1,19 +1,71 @@
 import os
 
+from .tag_index import TagIndex
+
 if os.environ.get('USE_FIRESTORE', 'False') == 'True':
     from .firestore_db import (
         get_contexts, add_context, update_context, delete_context,
         get_summary, set_summary, clear_all_contexts
     )
-    def set_tags(image_name, tags):
+    def _store_tags(image_name, tags):
         # TODO: Implement Firestore tag storage if needed
         pass
+    def _store_tags_bulk(tags_by_image):
+        for image_name, tags in tags_by_image.items():
+            _store_tags(image_name, tags)
     def get_tags(image_name):
         # TODO: Implement Firestore tag retrieval if needed
         return []
+    def _load_all_tags():
+        return {}
+    def _clear_stored_tags(image_names):
+        pass
+    def clear_all_summaries():
+        # firestore_db has no summary storage to clear; don't report success
+        raise NotImplementedError("Clearing summaries is not supported with USE_FIRESTORE=True")
 else:
     from .local_db import (
         get_contexts, add_context, update_context, delete_context,
         get_summary, set_summary, clear_all_contexts,
-        get_structured_summary, set_structured_summary, set_tags, get_tags
-    ) 
\ No newline at end of file
+        get_structured_summary, set_structured_summary, get_tags, clear_all_summaries
+    )
+    from .local_db import set_tags as _store_tags
+    from .local_db import set_tags_bulk as _store_tags_bulk
+    from .local_db import load_all_tags as _load_all_tags
+    from .local_db import clear_tags as _clear_stored_tags
+
+_tag_index = TagIndex(_load_all_tags)
+
+def set_tags(image_name, tags):
+    _store_tags(image_name, tags)
+    _tag_index.set_tags(image_name, tags)
+
+def remove_tag(tag):
+    """Remove a tag from every image. Only images that have it are rewritten."""
+    media_ids = _tag_index.media_for_tag(tag)
+    _store_tags_bulk({image_name: [t for t in _tag_index.tags_for(image_name) if t != tag]
+                      for image_name in media_ids})
+    _tag_index.remove_tag(tag)
+    return media_ids
+
+def clear_all_tags():
+    """Remove all tags in one update."""
+    media_ids = _tag_index.tagged_media()
+    if media_ids:
+        _clear_stored_tags(media_ids)
+    _tag_index.clear()
+    return media_ids
+
+def tags_for_image(image_name):
+    """Tags for an image, served from the index."""
+    return _tag_index.tags_for(image_name)
+
+def tag_counts():
+    """(tag, count) pairs, most used first."""
+    return _tag_index.counts()
+
+def images_for_tag(tag):
+    return _tag_index.media_for_tag(tag)
+
+def tag_vocabulary():
+    return _tag_index.vocabulary()
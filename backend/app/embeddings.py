@@ -0,0 +1,234 @@
+"""
+Embedding service with a persistent cache and micro-batching.
+
+Texts are keyed by SHA-256 of their content, so re-ingesting a document or
+saving it unchanged is served from the cache instead of running the model
+again. Cache misses from concurrent writers are queued and embedded together
+in one model call. The service is a ChromaDB ``EmbeddingFunction``, so it can
+be passed straight to ``get_or_create_collection``.
+
+The model is pluggable and runs locally:
+
+* ``default`` - ChromaDB's bundled all-MiniLM-L6-v2 (ONNX), same vectors as
+  collections created without an explicit embedding function
+* ``sentence-transformers:<name>`` - any sentence-transformers model
+  (needs the optional ``sentence-transformers`` package)
+* ``hash`` - deterministic feature hashing, no model download (tests, offline dev)
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'default')
+EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', 'embedding_cache.sqlite')
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '64'))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv('EMBEDDING_BATCH_WAIT_MS', '10'))
+EMBEDDING_CACHE_BUSY_TIMEOUT_MS = int(os.getenv('EMBEDDING_CACHE_BUSY_TIMEOUT_MS', '5000'))
+
+VECTOR_DTYPE = np.dtype('<f4')
+
+def _default_model() -> Callable[[List[str]], List[List[float]]]:
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    return DefaultEmbeddingFunction()
+
+def _sentence_transformer_model(name: str) -> Callable[[List[str]], List[List[float]]]:
+    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+    return SentenceTransformerEmbeddingFunction(model_name=name)
+
+class HashingModel:
+    """Bag-of-words feature hashing into a fixed number of dimensions."""
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=VECTOR_DTYPE)
+        for row, text in enumerate(texts):
+            for token in re.findall(r'\w+', text.lower()):
+                digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], 'little') % self.dimensions
+                vectors[row, bucket] += 1.0 if digest[4] & 1 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).tolist()
+
+# Model name -> factory; names with a ``prefix:`` are passed the suffix
+MODEL_FACTORIES: Dict[str, Callable] = {
+    'default': _default_model,
+    'hash': lambda: HashingModel(),
+    'sentence-transformers': _sentence_transformer_model,
+}
+
+def register_model(name: str, factory: Callable):
+    """Make a local model available to ``load_model`` under ``name``."""
+    MODEL_FACTORIES[name] = factory
+
+def load_model(spec: str) -> Callable[[List[str]], List[List[float]]]:
+    """Instantiate a model from ``name`` or ``name:argument``."""
+    name, _, argument = spec.partition(':')
+    if name not in MODEL_FACTORIES:
+        raise ValueError(f"Unknown embedding model '{name}', use one of: {', '.join(MODEL_FACTORIES)}")
+    factory = MODEL_FACTORIES[name]
+    return factory(argument) if argument else factory()
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class EmbeddingService(EmbeddingFunction[Documents]):
+    """Cached, micro-batched embeddings for one model."""
+
+    def __init__(self, model: Optional[str] = None, cache_path: Optional[str] = None,
+                 batch_size: Optional[int] = None, batch_wait_ms: Optional[float] = None,
+                 embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None):
+        """``embed_fn`` overrides loading ``model`` (which then only names the cache partition)."""
+        self.model_name = model or EMBEDDING_MODEL
+        self.batch_size = batch_size or EMBEDDING_BATCH_SIZE
+        self.batch_wait = (EMBEDDING_BATCH_WAIT_MS if batch_wait_ms is None else batch_wait_ms) / 1000.0
+        self._embed_fn = embed_fn
+        self._model_lock = threading.Lock()
+        self._stats = {'cache_hits': 0, 'computed': 0, 'model_calls': 0}
+
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path or EMBEDDING_CACHE_PATH, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout={EMBEDDING_CACHE_BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                model TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, content_hash)
+            )
+        """)
+        self._conn.commit()
+
+        # Pending cache misses: content hash -> (text, future)
+        self._pending: Dict[str, tuple] = {}
+        self._pending_cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run_batches, name='embedding-batcher', daemon=True)
+        self._worker.start()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.embed(list(input))
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Return one vector per text, computing only texts not seen before."""
+        hashes = [content_hash(text) for text in texts]
+        vectors = self._cached(set(hashes))
+
+        futures = {}
+        with self._pending_cond:
+            for digest, text in zip(hashes, texts):
+                if digest in vectors or digest in futures:
+                    continue
+                if digest not in self._pending:
+                    self._pending[digest] = (text, Future())
+                futures[digest] = self._pending[digest][1]
+            if futures:
+                self._pending_cond.notify()
+
+        with self._db_lock:
+            self._stats['cache_hits'] += len(hashes) - sum(1 for d in hashes if d in futures)
+        for digest, future in futures.items():
+            vectors[digest] = future.result()
+        return [vectors[digest] for digest in hashes]
+
+    def _cached(self, hashes) -> Dict[str, List[float]]:
+        if not hashes:
+            return {}
+        found = {}
+        hashes = list(hashes)
+        with self._db_lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                rows = self._conn.execute(f"""
+                    SELECT content_hash, vector FROM embedding_cache
+                    WHERE model = ? AND content_hash IN ({', '.join('?' * len(chunk))})
+                """, [self.model_name, *chunk]).fetchall()
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=VECTOR_DTYPE).tolist()
+        return found
+
+    def _run_batches(self):
+        while True:
+            with self._pending_cond:
+                while not self._pending:
+                    self._pending_cond.wait()
+            # Give concurrent writers a moment to join the batch
+            if self.batch_wait:
+                time.sleep(self.batch_wait)
+            with self._pending_cond:
+                batch = list(self._pending.items())[:self.batch_size]
+            try:
+                self._embed_batch(batch)
+            except Exception as e:
+                # Model or cache write failed (e.g. a locked database): fail this
+                # batch's callers instead of taking the batcher thread down
+                for _, (_, future) in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                with self._pending_cond:
+                    for digest, _ in batch:
+                        self._pending.pop(digest, None)
+
+    def _embed_batch(self, batch):
+        texts = [text for _, (text, _) in batch]
+        vectors = np.asarray(self._model()(texts), dtype=VECTOR_DTYPE)
+
+        with self._db_lock:
+            # The connection context manager rolls back a failed write
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (model, content_hash, vector) VALUES (?, ?, ?)",
+                    [(self.model_name, digest, vector.tobytes()) for (digest, _), vector in zip(batch, vectors)]
+                )
+            self._stats['computed'] += len(batch)
+            self._stats['model_calls'] += 1
+        for (_, (_, future)), vector in zip(batch, vectors):
+            future.set_result(vector.tolist())
+
+    def _model(self):
+        if self._embed_fn is None:
+            with self._model_lock:
+                if self._embed_fn is None:
+                    self._embed_fn = load_model(self.model_name)
+        return self._embed_fn
+
+    def stats(self) -> Dict[str, float]:
+        """Cache hit/compute counters and the cache size."""
+        with self._db_lock:
+            stats = dict(self._stats)
+            stats['cache_entries'] = self._conn.execute(
+                "SELECT COUNT(*) FROM embedding_cache WHERE model = ?", (self.model_name,)
+            ).fetchone()[0]
+        lookups = stats['cache_hits'] + stats['computed']
+        stats['hit_rate'] = stats['cache_hits'] / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        with self._db_lock:
+            self._conn.close()
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+def get_embedding_service() -> EmbeddingService:
+    """Return the process-wide embedding service."""
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = EmbeddingService()
+    return _shared_service
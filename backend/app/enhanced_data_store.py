@@ -1,18 +1,93 @@
 import os
 import uuid
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import chromadb
 from chromadb.config import Settings
 import json
 from dotenv import load_dotenv
+from app.vector_store import VectorIndex, pack_vector, unpack_vector
+from app.embeddings import get_embedding_service
+from app.group_commit import GroupCommitter
 
 load_dotenv()
 
+# Columns that callers may project in search results
+DOCUMENT_FIELDS = ('id', 'type', 'title', 'content', 'metadata', 'source', 'created_at', 'updated_at')
+
+# Document search modes and reciprocal rank fusion defaults
+SEARCH_MODES = ('lexical', 'semantic', 'hybrid')
+DEFAULT_SEARCH_MODE = os.getenv('DOCUMENT_SEARCH_MODE', 'semantic')
+HYBRID_WEIGHTS = {
+    'lexical': float(os.getenv('HYBRID_LEXICAL_WEIGHT', '1.0')),
+    'semantic': float(os.getenv('HYBRID_SEMANTIC_WEIGHT', '1.0')),
+}
+RRF_K = int(os.getenv('RRF_K', '60'))
+
+# How small writes (contexts, media edits) are committed:
+#   sync  - each write commits on its own before returning
+#   group - writes from all threads share one commit every few ms; callers wait for it
+#   async - write-behind: callers return at once and batches commit with
+#           synchronous_commit off, so a crash can lose the last few ms of writes
+WRITE_MODES = ('sync', 'group', 'async')
+WRITE_MODE = os.getenv('POSTGRES_WRITE_MODE', 'sync')
+GROUP_COMMIT_MS = float(os.getenv('POSTGRES_GROUP_COMMIT_MS', '5'))
+GROUP_COMMIT_MAX_OPS = int(os.getenv('POSTGRES_GROUP_COMMIT_MAX_OPS', '64'))
+# Delay before refreshing the tag counts view after a tag write, so bursts share one refresh
+TAG_COUNTS_REFRESH_SECONDS = float(os.getenv('TAG_COUNTS_REFRESH_SECONDS', '5'))
+
+# Media columns and the lightweight projection used for gallery tiles
+MEDIA_FIELDS = ('id', 'document_id', 'file_path', 'file_type', 'title', 'summary', 'tags', 'metadata',
+                'content_hash', 'file_size', 'file_mtime_ns', 'created_at')
+MEDIA_TILE_FIELDS = ('id', 'file_path', 'file_type', 'title', 'summary', 'tags', 'created_at')
+
+# Process-wide store shared by every Flask app and blueprint
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+def get_store() -> 'EnhancedDataStore':
+    """Return the process-wide EnhancedDataStore, creating it on first use."""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = EnhancedDataStore()
+    return _shared_store
+
+def reciprocal_rank_fusion(ranked_lists: Dict[str, List[tuple]],
+                           weights: Optional[Dict[str, float]] = None,
+                           rrf_k: int = None) -> List[tuple]:
+    """Merge ``{source: [(id, score), ...]}`` rankings into ``[(id, rrf_score)]``, best first.
+    
+    Each hit scores ``weight / (rrf_k + rank)`` per list it appears in, so
+    only ranks matter, not the incomparable raw scores. Ties keep the order
+    in which ids were first seen.
+    """
+    unknown = set(weights or {}) - set(HYBRID_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown search weights: {', '.join(sorted(unknown))}")
+    weights = {**HYBRID_WEIGHTS, **{k: float(v) for k, v in (weights or {}).items()}}
+    rrf_k = RRF_K if rrf_k is None else int(rrf_k)
+    if rrf_k < 1:
+        raise ValueError("rrf_k must be a positive integer")
+    
+    fused: Dict[str, float] = {}
+    for source, ranked in ranked_lists.items():
+        for rank, (doc_id, _) in enumerate(ranked, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weights[source] / (rrf_k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
 class EnhancedDataStore:
-    def __init__(self):
+    def __init__(self, min_connections: int = None, max_connections: int = None,
+                 init_schema: bool = True, write_mode: str = None):
         # PostgreSQL connection parameters
         self.db_params = {
             'host': os.getenv('POSTGRES_HOST', 'localhost'),
@@ -22,8 +97,13 @@ class EnhancedDataStore:
             'port': os.getenv('POSTGRES_PORT', '5432')
         }
         
-        # Create initial connection for schema initialization
-        self.pg_conn = psycopg2.connect(**self.db_params)
+        # Thread-safe connection pool shared by all requests
+        if min_connections is None:
+            min_connections = int(os.getenv('POSTGRES_POOL_MIN', '1'))
+        if max_connections is None:
+            max_connections = int(os.getenv('POSTGRES_POOL_MAX', '10'))
+        
+        self.pool = ThreadedConnectionPool(min_connections, max_connections, **self.db_params)
         
         # ChromaDB client with telemetry completely disabled
         os.environ['CHROMA_TELEMETRY_ENABLED'] = 'false'
@@ -33,18 +113,209 @@ class EnhancedDataStore:
             settings=Settings(anonymized_telemetry=False)
         )
         
-        # Initialize collections
+        # Initialize collections; embeddings go through the cached, batched service
+        self.embedding_service = get_embedding_service()
         self.documents_collection = self.chroma_client.get_or_create_collection(
             name="documents",
-            metadata={"hnsw:space": "cosine"}
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=self.embedding_service
+        )
+        self.media_collection = self.chroma_client.get_or_create_collection(
+            name="media",
+            metadata={"hnsw:space": "cosine"},
+            embedding_function=self.embedding_service
         )
         
+        # In-memory ANN index over media_embeddings, loaded lazily
+        self._media_index = None
+        self._media_index_lock = threading.Lock()
+        # Set once media_tags changes; a background thread then refreshes the counts view
+        self._tag_counts_stale = threading.Event()
+        self._tag_counts_thread = None
+        self._tag_counts_lock = threading.Lock()
+        # Runs the lexical and vector halves of hybrid searches side by side
+        self._search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='search')
+        # False when the search_vector column couldn't be created (PostgreSQL < 12)
+        self.lexical_search_available = False
+        # Per-thread open transaction (see transaction())
+        self._local = threading.local()
+        
+        self.write_mode = write_mode or WRITE_MODE
+        if self.write_mode not in WRITE_MODES:
+            raise ValueError(f"Invalid write mode: {self.write_mode}")
+        self._group_committer = None
+        if self.write_mode != 'sync':
+            self._group_committer = GroupCommitter(self._commit_write_batch, GROUP_COMMIT_MS,
+                                                   GROUP_COMMIT_MAX_OPS)
+            atexit.register(self._group_committer.close)
+        
         # Initialize database schema
-        self._init_schema()
+        if init_schema:
+            self._init_schema()
+    
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection, committing on success and rolling back on error.
+        
+        Inside transaction() the thread's open connection is reused instead, and
+        the block runs as a savepoint that is rolled back if it raises.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            with conn.cursor() as cursor:
+                cursor.execute("SAVEPOINT store_step")
+            try:
+                yield conn
+            except Exception:
+                with conn.cursor() as cursor:
+                    cursor.execute("ROLLBACK TO SAVEPOINT store_step")
+                raise
+            with conn.cursor() as cursor:
+                cursor.execute("RELEASE SAVEPOINT store_step")
+            return
+        
+        conn = self.pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+    
+    @contextmanager
+    def transaction(self, durable: bool = True):
+        """Run several store calls on this thread as one unit of work, committed once.
+        
+            with store.transaction():
+                doc_id = store.add_document(...)
+                media_id = store.add_media_item(...)
+                store.add_document_relation(doc_id, media_id)
+        
+        If the block raises, everything is rolled back. A nested transaction()
+        is a savepoint: if it raises, only its own writes are undone. Search
+        index updates are deferred until after the commit. With
+        ``durable=False`` the commit doesn't wait for the WAL flush
+        (synchronous_commit off), trading the last few ms of writes on a
+        server crash for latency.
+        """
+        if getattr(self._local, 'conn', None) is not None:
+            pending = self._local.pending
+            callbacks, reindex = len(pending['callbacks']), set(pending['reindex'])
+            try:
+                with self._connection():
+                    yield
+            except Exception:
+                del pending['callbacks'][callbacks:]
+                pending['reindex'] = reindex
+                raise
+            return
+        
+        conn = self.pool.getconn()
+        self._local.conn = conn
+        self._local.pending = {'callbacks': [], 'reindex': set()}
+        try:
+            if not durable:
+                with conn.cursor() as cursor:
+                    cursor.execute("SET LOCAL synchronous_commit TO OFF")
+            yield
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pending = self._local.pending
+            self._local.conn = self._local.pending = None
+            self.pool.putconn(conn)
+        self._run_after_commit(pending)
+    
+    def _after_commit(self, callback) -> None:
+        """Run ``callback`` once the current transaction commits, or now if there is none."""
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            callback()
+        else:
+            pending['callbacks'].append(callback)
+    
+    def _reindex_after_commit(self, media_ids: List[str]) -> None:
+        """Refresh media search entries after commit, once per item per transaction."""
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            self._reindex_media_ids(list(media_ids))
+        else:
+            pending['reindex'].update(str(media_id) for media_id in media_ids)
+    
+    def _run_after_commit(self, pending) -> None:
+        # The data is committed; an index failure must not be reported as a failed write,
+        # and must not stop the remaining index updates
+        for callback in pending['callbacks']:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error updating search index after commit: {e}")
+        if pending['reindex']:
+            try:
+                self._reindex_media_ids(sorted(pending['reindex']))
+            except Exception as e:
+                print(f"Error updating search index after commit: {e}")
+    
+    def _write(self, write, optimistic_result=None):
+        """Run a small write according to the write mode.
+        
+        In a transaction() or in sync mode it runs now. In group mode it joins
+        the next group commit and this waits for it. In async mode this returns
+        ``optimistic_result`` at once; the write commits within a few ms.
+        """
+        if self._group_committer is None or getattr(self._local, 'conn', None) is not None:
+            return write()
+        future = self._group_committer.submit(write)
+        if self.write_mode == 'async':
+            future.add_done_callback(self._report_write_behind_error)
+            return optimistic_result
+        return future.result()
+    
+    def _commit_write_batch(self, writes) -> List[tuple]:
+        """Apply queued writes in one transaction, each in its own savepoint."""
+        results = []
+        with self.transaction(durable=self.write_mode != 'async'):
+            for write in writes:
+                try:
+                    with self.transaction():
+                        results.append((True, write()))
+                except Exception as e:
+                    results.append((False, e))
+        return results
+    
+    @staticmethod
+    def _report_write_behind_error(future):
+        if future.exception() is not None:
+            print(f"Error in write-behind write: {future.exception()}")
+    
+    def flush(self):
+        """Wait until all queued group-commit/write-behind writes are committed."""
+        if self._group_committer is not None:
+            self._group_committer.flush()
+    
+    def write_stats(self) -> Dict[str, Any]:
+        """Write mode and group commit counters."""
+        stats = {"write_mode": self.write_mode}
+        if self._group_committer is not None:
+            stats.update(self._group_committer.stats())
+        return stats
     
     def _init_schema(self):
         """Initialize PostgreSQL database schema."""
-        with self.pg_conn.cursor() as cursor:
+        with self._connection() as conn:
+            self._init_document_schema(conn)
+            
+            # Initialize media schema as well
+            self._init_media_schema(conn)
+            self._init_tag_schema(conn)
+    
+    def _init_document_schema(self, conn):
+        """Create the documents, relations and embeddings tables."""
+        with conn.cursor() as cursor:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS documents (
                     id UUID PRIMARY KEY,
@@ -72,7 +343,7 @@ class EnhancedDataStore:
                 CREATE TABLE IF NOT EXISTS embeddings (
                     id UUID PRIMARY KEY,
                     document_id UUID REFERENCES documents(id),
-                    embedding_vector JSONB NOT NULL,
+                    embedding_vector BYTEA NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
@@ -82,22 +353,31 @@ class EnhancedDataStore:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_metadata ON documents USING GIN(metadata)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents(created_at)")
             
-        self.pg_conn.commit()
+        conn.commit()
         
-        # Initialize media schema as well
-        self._init_media_schema()
-    
-    def _get_connection(self):
-        """Get a fresh database connection."""
-        try:
-            return psycopg2.connect(**self.db_params)
-        except Exception as e:
-            print(f"Failed to create database connection: {e}")
-            raise
+        # Weighted full-text vector: title (A), content (B), metadata strings (C)
+        with conn.cursor() as cursor:
+            try:
+                cursor.execute("""
+                    ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector
+                    GENERATED ALWAYS AS (
+                        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                        setweight(to_tsvector('english', coalesce(content, '')), 'B') ||
+                        setweight(jsonb_to_tsvector('english', coalesce(metadata, '{}'), '["string"]'), 'C')
+                    ) STORED
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_search_vector ON documents USING GIN(search_vector)")
+                conn.commit()
+                self.lexical_search_available = True
+            except Exception as e:
+                # Generated columns need PostgreSQL 12+; hybrid searches fall back to semantic
+                conn.rollback()
+                print(f"Full-text search column unavailable: {e}")
+        self._migrate_packed_vectors(conn, 'embeddings')
     
-    def _init_media_schema(self):
+    def _init_media_schema(self, conn):
         """Initialize PostgreSQL media schema."""
-        with self.pg_conn.cursor() as cursor:
+        with conn.cursor() as cursor:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS media (
                     id UUID PRIMARY KEY,
@@ -115,26 +395,29 @@ class EnhancedDataStore:
             # Make document_id nullable if it's not already
             try:
                 cursor.execute("ALTER TABLE media ALTER COLUMN document_id DROP NOT NULL")
-                self.pg_conn.commit()
+                conn.commit()
             except Exception as e:
                 # Column might already be nullable or not exist
-                self.pg_conn.rollback()
+                conn.rollback()
                 pass
             
             # Add missing columns if they don't exist (for existing tables)
             columns_to_add = [
                 ("ALTER TABLE media ADD COLUMN title VARCHAR(500)", "title"),
                 ("ALTER TABLE media ADD COLUMN summary TEXT", "summary"),
-                ("ALTER TABLE media ADD COLUMN tags JSONB DEFAULT '[]'", "tags")
+                ("ALTER TABLE media ADD COLUMN tags JSONB DEFAULT '[]'", "tags"),
+                ("ALTER TABLE media ADD COLUMN content_hash CHAR(64)", "content_hash"),
+                ("ALTER TABLE media ADD COLUMN file_size BIGINT", "file_size"),
+                ("ALTER TABLE media ADD COLUMN file_mtime_ns BIGINT", "file_mtime_ns")
             ]
             
             for alter_sql, column_name in columns_to_add:
                 try:
                     cursor.execute(alter_sql)
-                    self.pg_conn.commit()
+                    conn.commit()
                     print(f"Added column {column_name} to media table")
                 except Exception as e:
-                    self.pg_conn.rollback()
+                    conn.rollback()
                     # Column already exists or other error, continue
                     pass
             
@@ -152,7 +435,7 @@ class EnhancedDataStore:
                 CREATE TABLE IF NOT EXISTS media_embeddings (
                     id UUID PRIMARY KEY,
                     media_id UUID REFERENCES media(id),
-                    embedding_vector JSONB NOT NULL,
+                    embedding_vector BYTEA NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
@@ -169,9 +452,145 @@ class EnhancedDataStore:
                 pass  # Column might not exist yet
             
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_contexts_media_id ON contexts(media_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_media_embeddings_vector ON media_embeddings USING GIN(embedding_vector)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_media_created_at_id ON media(created_at DESC, id DESC)")
+            # Uploads are deduplicated on their SHA-256
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_media_content_hash
+                ON media(content_hash) WHERE content_hash IS NOT NULL
+            """)
             
-        self.pg_conn.commit()
+            # Library version counter for gallery ETags, bumped once per statement that
+            # writes media. Writers take the row lock, so the version follows commit order
+            # and reading it never touches the media rows themselves.
+            cursor.execute("DROP TRIGGER IF EXISTS trg_media_updated_at ON media")
+            cursor.execute("DROP FUNCTION IF EXISTS touch_media_updated_at()")
+            cursor.execute("DROP INDEX IF EXISTS idx_media_updated_at")
+            cursor.execute("ALTER TABLE media DROP COLUMN IF EXISTS updated_at")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS media_library_version (
+                    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                    version BIGINT NOT NULL DEFAULT 0
+                )
+            """)
+            cursor.execute("INSERT INTO media_library_version (id, version) VALUES (TRUE, 0) ON CONFLICT DO NOTHING")
+            cursor.execute("""
+                CREATE OR REPLACE FUNCTION bump_media_library_version() RETURNS trigger AS $$
+                BEGIN
+                    UPDATE media_library_version SET version = version + 1;
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            cursor.execute("DROP TRIGGER IF EXISTS trg_media_library_version ON media")
+            cursor.execute("""
+                CREATE TRIGGER trg_media_library_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON media
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_media_library_version()
+            """)
+            
+            # Vectors are searched in memory, so a GIN index on them only costs writes
+            cursor.execute("DROP INDEX IF EXISTS idx_media_embeddings_vector")
+            
+        conn.commit()
+        self._migrate_packed_vectors(conn, 'media_embeddings')
+        
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_media_embeddings_media_id ON media_embeddings(media_id)")
+        conn.commit()
+    
+    def _init_tag_schema(self, conn):
+        """Create the normalized media_tags table, its aggregate view and indexes."""
+        # Trigram indexes need pg_trgm; tag autocomplete still works without it, just unindexed
+        with conn.cursor() as cursor:
+            try:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                conn.commit()
+                has_trgm = True
+            except Exception as e:
+                conn.rollback()
+                print(f"pg_trgm unavailable, tag autocomplete will not be indexed: {e}")
+                has_trgm = False
+        
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS media_tags (
+                    media_id UUID NOT NULL REFERENCES media(id) ON DELETE CASCADE,
+                    tag VARCHAR(200) NOT NULL,
+                    PRIMARY KEY (media_id, tag)
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_media_tags_tag ON media_tags(tag, media_id)")
+            
+            # Backfill from the JSONB column the first time the table is created
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM media_tags)")
+            if not cursor.fetchone()[0]:
+                cursor.execute("""
+                    INSERT INTO media_tags (media_id, tag)
+                    SELECT DISTINCT m.id, btrim(t.tag)
+                    FROM media m,
+                         jsonb_array_elements_text(
+                             CASE WHEN jsonb_typeof(m.tags) = 'array' THEN m.tags ELSE '[]'::jsonb END
+                         ) AS t(tag)
+                    WHERE btrim(t.tag) <> ''
+                    ON CONFLICT DO NOTHING
+                """)
+            
+            cursor.execute("""
+                CREATE MATERIALIZED VIEW IF NOT EXISTS media_tag_counts AS
+                SELECT tag, COUNT(*) AS count FROM media_tags GROUP BY tag
+            """)
+            # A unique index lets the view be refreshed without blocking readers
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_media_tag_counts_tag ON media_tag_counts(tag)")
+            if has_trgm:
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_media_tag_counts_tag_trgm
+                    ON media_tag_counts USING GIN (tag gin_trgm_ops)
+                """)
+        conn.commit()
+    
+    @staticmethod
+    def _clean_tags(tags) -> List[str]:
+        """Strip, drop empties and de-duplicate while keeping order."""
+        return list(dict.fromkeys(
+            tag.strip() for tag in (tags or []) if isinstance(tag, str) and tag.strip()
+        ))
+    
+    def _sync_media_tags(self, cursor, tags_by_media: Dict[str, List[str]]):
+        """Replace the media_tags rows for the given media IDs."""
+        if not tags_by_media:
+            return
+        cursor.execute("DELETE FROM media_tags WHERE media_id = ANY(%s::uuid[])", (list(tags_by_media),))
+        rows = [(media_id, tag) for media_id, tags in tags_by_media.items()
+                for tag in self._clean_tags(tags)]
+        if rows:
+            execute_values(cursor, "INSERT INTO media_tags (media_id, tag) VALUES %s ON CONFLICT DO NOTHING", rows)
+        self._after_commit(self._mark_tag_counts_stale)
+    
+    def _migrate_packed_vectors(self, conn, table: str):
+        """Convert a legacy JSONB embedding_vector column to packed float32 BYTEA."""
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT data_type FROM information_schema.columns
+                WHERE table_name = %s AND column_name = 'embedding_vector'
+            """, (table,))
+            row = cursor.fetchone()
+            if not row or row[0] != 'jsonb':
+                return
+            
+            print(f"Migrating {table}.embedding_vector from JSONB to packed float32")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN packed_vector BYTEA")
+            cursor.execute(f"SELECT id, embedding_vector FROM {table}")
+            rows = [(psycopg2.Binary(pack_vector(self._load_json(vector))), row_id)
+                    for row_id, vector in cursor.fetchall()]
+            if rows:
+                execute_values(cursor, f"""
+                    UPDATE {table} AS t SET packed_vector = v.packed
+                    FROM (VALUES %s) AS v(packed, id) WHERE t.id = v.id::uuid
+                """, rows)
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN embedding_vector")
+            cursor.execute(f"ALTER TABLE {table} RENAME COLUMN packed_vector TO embedding_vector")
+            cursor.execute(f"ALTER TABLE {table} ALTER COLUMN embedding_vector SET NOT NULL")
+        conn.commit()
     
     def add_document(self, doc_type: str, title: str, content: str, 
                     metadata: Dict[str, Any], source: str = None) -> str:
@@ -179,82 +598,218 @@ class EnhancedDataStore:
         doc_id = str(uuid.uuid4())
         
         # Add to PostgreSQL
-        with self.pg_conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute("""
                 INSERT INTO documents (id, type, title, content, metadata, source)
                 VALUES (%s, %s, %s, %s, %s, %s)
                 RETURNING id
             """, (doc_id, doc_type, title, content, json.dumps(metadata), source))
+        
+        # Add to ChromaDB for vector search once the row is committed
+        self._after_commit(lambda: self.documents_collection.add(
+            documents=[content],
+            metadatas=[self._chroma_metadata(doc_id, doc_type, title, metadata, source)],
+            ids=[doc_id]
+        ))
+        
+        return doc_id
+    
+    def add_documents_bulk(self, documents: List[Dict[str, Any]], 
+                           chunk_size: int = 500) -> List[str]:
+        """Add many documents, one multi-row INSERT and one ChromaDB add per chunk.
+        
+        Each document is a dict with ``type``, ``title`` and ``content`` and
+        optional ``metadata`` and ``source``. Returns the new IDs in input order.
+        """
+        doc_ids = []
+        
+        for start in range(0, len(documents), chunk_size):
+            chunk = documents[start:start + chunk_size]
+            rows = []
+            chroma_ids = []
+            chroma_documents = []
+            chroma_metadatas = []
             
-            # Add to ChromaDB for vector search
-            # Filter out None values from metadata for ChromaDB compatibility
-            clean_metadata = {k: v for k, v in metadata.items() if v is not None}
-            
-            # Prepare ChromaDB metadata, ensuring no None values
-            chroma_metadata = {
-                "id": doc_id,
-                "type": doc_type,
-                "title": title,
-                **clean_metadata
-            }
+            for doc in chunk:
+                doc_id = str(uuid.uuid4())
+                metadata = doc.get('metadata') or {}
+                source = doc.get('source')
+                
+                rows.append((doc_id, doc['type'], doc['title'], doc['content'],
+                             json.dumps(metadata), source))
+                chroma_ids.append(doc_id)
+                chroma_documents.append(doc['content'])
+                chroma_metadatas.append(
+                    self._chroma_metadata(doc_id, doc['type'], doc['title'], metadata, source)
+                )
             
-            # Only add source if it's not None
-            if source is not None:
-                chroma_metadata["source"] = source
+            with self._connection() as conn, conn.cursor() as cursor:
+                execute_values(cursor, """
+                    INSERT INTO documents (id, type, title, content, metadata, source)
+                    VALUES %s
+                """, rows, page_size=chunk_size)
             
-            self.documents_collection.add(
-                documents=[content],
-                metadatas=[chroma_metadata],
-                ids=[doc_id]
-            )
+            self._after_commit(lambda ids=chroma_ids, docs=chroma_documents, metas=chroma_metadatas:
+                               self.documents_collection.add(documents=docs, metadatas=metas, ids=ids))
+            doc_ids.extend(chroma_ids)
         
-        self.pg_conn.commit()
-        return doc_id
+        return doc_ids
+    
+    @staticmethod
+    def _chroma_metadata(doc_id: str, doc_type: str, title: str,
+                         metadata: Dict[str, Any], source: str = None) -> Dict[str, Any]:
+        """Build ChromaDB metadata for a document, dropping None values."""
+        # Filter out None values from metadata for ChromaDB compatibility
+        clean_metadata = {k: v for k, v in metadata.items() if v is not None}
+        
+        # Prepare ChromaDB metadata, ensuring no None values
+        chroma_metadata = {
+            "id": doc_id,
+            "type": doc_type,
+            "title": title,
+            **clean_metadata
+        }
+        
+        # Only add source if it's not None
+        if source is not None:
+            chroma_metadata["source"] = source
+        
+        return chroma_metadata
     
     def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a document by ID."""
-        with self.pg_conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("""
-                SELECT * FROM documents WHERE id = %s
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(DOCUMENT_FIELDS)} FROM documents WHERE id = %s
             """, (doc_id,))
             
             result = cursor.fetchone()
             if result:
                 doc = dict(result)
-                doc['metadata'] = json.loads(doc['metadata'])
+                doc['metadata'] = self._load_json(doc['metadata'])
                 return doc
         return None
     
     def search_documents(self, query: str, doc_type: str = None, 
-                        limit: int = 10) -> List[Dict[str, Any]]:
-        """Search documents using semantic similarity."""
-        # Search in ChromaDB
+                        limit: int = 10, fields: Optional[List[str]] = None,
+                        mode: str = None, weights: Optional[Dict[str, float]] = None,
+                        rrf_k: int = None) -> List[Dict[str, Any]]:
+        """Search documents lexically, semantically or both.
+        
+        ``mode`` is one of ``lexical`` (PostgreSQL full-text, good for names
+        and exact terms), ``semantic`` (ChromaDB similarity) or ``hybrid``
+        (both run in parallel and merged with reciprocal rank fusion, using
+        ``weights`` such as ``{'lexical': 1.0, 'semantic': 0.5}``).
+        
+        Pass ``fields`` (e.g. ``['title', 'type']``) to fetch only those columns
+        instead of the full row; ``id`` is always returned, plus
+        ``similarity_score`` (semantic hits), ``lexical_score`` (lexical hits)
+        and ``rrf_score`` (hybrid).
+        """
+        mode = mode or DEFAULT_SEARCH_MODE
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}', use one of: {', '.join(SEARCH_MODES)}")
+        columns = self._document_columns(fields)
+        
+        if mode == 'lexical' and not self.lexical_search_available:
+            raise ValueError("Lexical search is unavailable: the search_vector column needs PostgreSQL 12+")
+        if mode == 'hybrid' and not self.lexical_search_available:
+            mode = 'semantic'
+        
+        if mode == 'lexical':
+            ranked = self._lexical_search(query, doc_type, limit)
+            return self._hydrate_documents(ranked, columns, 'lexical_score')
+        if mode == 'semantic':
+            ranked = self._semantic_search(query, doc_type, limit)
+            return self._hydrate_documents(ranked, columns, 'similarity_score')
+        
+        # Over-fetch candidates so fusion can promote items ranked lower in one list
+        candidates = max(limit * 3, 20)
+        lexical_future = self._search_executor.submit(self._lexical_search, query, doc_type, candidates)
+        semantic_future = self._search_executor.submit(self._semantic_search, query, doc_type, candidates)
+        lexical, semantic = lexical_future.result(), semantic_future.result()
+        
+        fused = reciprocal_rank_fusion({'lexical': lexical, 'semantic': semantic}, weights, rrf_k)
+        documents = self._hydrate_documents(fused[:limit], columns, 'rrf_score')
+        lexical_scores, semantic_scores = dict(lexical), dict(semantic)
+        for doc in documents:
+            doc_id = str(doc['id'])
+            if doc_id in lexical_scores:
+                doc['lexical_score'] = lexical_scores[doc_id]
+            if doc_id in semantic_scores:
+                doc['similarity_score'] = semantic_scores[doc_id]
+        return documents
+    
+    def _lexical_search(self, query: str, doc_type: Optional[str], limit: int) -> List[tuple]:
+        """Full-text search over the search_vector column. Returns ``[(id, rank)]``."""
+        sql = """
+            SELECT id, ts_rank_cd(search_vector, q) AS rank
+            FROM documents, websearch_to_tsquery('english', %s) AS q
+            WHERE search_vector @@ q
+        """
+        values = [query]
+        if doc_type:
+            sql += " AND type = %s"
+            values.append(doc_type)
+        sql += " ORDER BY rank DESC LIMIT %s"
+        values.append(limit)
+        
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute(sql, values)
+            return [(str(doc_id), float(rank)) for doc_id, rank in cursor.fetchall()]
+    
+    def _semantic_search(self, query: str, doc_type: Optional[str], limit: int) -> List[tuple]:
+        """Vector search in ChromaDB. Returns ``[(id, distance)]``, closest first."""
         results = self.documents_collection.query(
             query_texts=[query],
             n_results=limit,
             where={"type": doc_type} if doc_type else None
         )
+        if not results['ids'] or not results['ids'][0]:
+            return []
+        return list(zip(results['ids'][0], results['distances'][0]))
+    
+    def _hydrate_documents(self, ranked: List[tuple], columns: List[str],
+                           score_field: str) -> List[Dict[str, Any]]:
+        """Load ``[(id, score)]`` hits from PostgreSQL in one round trip, keeping their order."""
+        if not ranked:
+            return []
+        doc_ids = [doc_id for doc_id, _ in ranked]
         
-        # Get full documents from PostgreSQL
-        if results['ids'] and results['ids'][0]:
-            doc_ids = results['ids'][0]
-            documents = []
-            
-            with self.pg_conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                for doc_id in doc_ids:
-                    cursor.execute("""
-                        SELECT * FROM documents WHERE id = %s
-                    """, (doc_id,))
-                    
-                    result = cursor.fetchone()
-                    if result:
-                        doc = dict(result)
-                        doc['metadata'] = json.loads(doc['metadata'])
-                        doc['similarity_score'] = results['distances'][0][doc_ids.index(doc_id)]
-                        documents.append(doc)
-            
-            return documents
-        return []
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(columns)} FROM documents WHERE id = ANY(%s::uuid[])
+            """, (doc_ids,))
+            rows = {str(row['id']): dict(row) for row in cursor.fetchall()}
+        
+        documents = []
+        for doc_id, score in ranked:
+            doc = rows.get(doc_id)
+            if doc is None:
+                continue
+            if 'metadata' in doc:
+                doc['metadata'] = self._load_json(doc['metadata'])
+            doc[score_field] = score
+            documents.append(doc)
+        
+        return documents
+    
+    @staticmethod
+    def _document_columns(fields: Optional[List[str]]) -> List[str]:
+        """Validate a document field projection, always including the id."""
+        if not fields:
+            return list(DOCUMENT_FIELDS)
+        unknown = [f for f in fields if f not in DOCUMENT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown document fields: {', '.join(unknown)}")
+        return ['id'] + [f for f in fields if f != 'id']
+    
+    @staticmethod
+    def _load_json(value):
+        """Decode a JSONB value that may already have been parsed by psycopg2."""
+        if isinstance(value, (str, bytes, bytearray)):
+            return json.loads(value)
+        return value
     
     def update_document(self, doc_id: str, title: str = None, content: str = None,
                        metadata: Dict[str, Any] = None) -> bool:
@@ -280,38 +835,35 @@ class EnhancedDataStore:
         updates.append("updated_at = CURRENT_TIMESTAMP")
         values.append(doc_id)
         
-        with self.pg_conn.cursor() as cursor:
+        with self._connection() as conn, conn.cursor() as cursor:
             cursor.execute(f"""
                 UPDATE documents 
                 SET {', '.join(updates)}
                 WHERE id = %s
             """, values)
-            
-            # Update in ChromaDB if content changed
-            if content is not None:
-                self.documents_collection.update(
-                    ids=[doc_id],
-                    documents=[content],
-                    metadatas=[{
-                        "id": doc_id,
-                        "updated_at": datetime.now().isoformat()
-                    }]
-                )
         
-        self.pg_conn.commit()
+        # Update in ChromaDB if content changed
+        if content is not None:
+            self._after_commit(lambda: self.documents_collection.update(
+                ids=[doc_id],
+                documents=[content],
+                metadatas=[{
+                    "id": doc_id,
+                    "updated_at": datetime.now().isoformat()
+                }]
+            ))
+        
         return True
     
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document and its embeddings."""
         try:
-            # Delete from ChromaDB
-            self.documents_collection.delete(ids=[doc_id])
-            
             # Delete from PostgreSQL
-            with self.pg_conn.cursor() as cursor:
+            with self._connection() as conn, conn.cursor() as cursor:
                 cursor.execute("DELETE FROM documents WHERE id = %s", (doc_id,))
             
-            self.pg_conn.commit()
+            # Delete from ChromaDB once the delete is committed
+            self._after_commit(lambda: self.documents_collection.delete(ids=[doc_id]))
             return True
         except Exception as e:
             print(f"Error deleting document: {e}")
@@ -362,9 +914,9 @@ class EnhancedDataStore:
     
     def get_documents_by_type(self, doc_type: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get documents of a specific type."""
-        with self.pg_conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("""
-                SELECT * FROM documents 
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(f"""
+                SELECT {', '.join(DOCUMENT_FIELDS)} FROM documents 
                 WHERE type = %s 
                 ORDER BY created_at DESC 
                 LIMIT %s
@@ -374,7 +926,7 @@ class EnhancedDataStore:
             documents = []
             for result in results:
                 doc = dict(result)
-                doc['metadata'] = json.loads(doc['metadata'])
+                doc['metadata'] = self._load_json(doc['metadata'])
                 documents.append(doc)
             
             return documents
@@ -389,7 +941,8 @@ class EnhancedDataStore:
         # Search for similar documents
         similar_docs = self.search_documents(
             current_doc['content'][:500],  # Use first 500 chars for similarity
-            limit=limit + 1  # +1 to exclude self
+            limit=limit + 1,  # +1 to exclude self
+            mode='semantic'
         )
         
         # Filter out the current document
@@ -401,18 +954,17 @@ class EnhancedDataStore:
         """Create a relationship between two documents."""
         relation_id = str(uuid.uuid4())
         
-        with self.pg_conn.cursor() as cursor:
+        with self._connection() as conn, conn.cursor() as cursor:
             cursor.execute("""
                 INSERT INTO document_relations (id, source_doc_id, target_doc_id, relation_type)
                 VALUES (%s, %s, %s, %s)
             """, (relation_id, source_doc_id, target_doc_id, relation_type))
         
-        self.pg_conn.commit()
         return relation_id
     
     def get_document_relations(self, doc_id: str) -> List[Dict[str, Any]]:
         """Get all relations for a document."""
-        with self.pg_conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute("""
                 SELECT * FROM document_relations 
                 WHERE source_doc_id = %s OR target_doc_id = %s
@@ -422,8 +974,15 @@ class EnhancedDataStore:
             return [dict(row) for row in results]
     
     # Media-related methods
-    def add_media_item(self, file_path: str, metadata: Optional[Dict] = None) -> str:
-        """Add a new media item."""
+    def add_media_item(self, file_path: str, metadata: Optional[Dict] = None,
+                       content_hash: Optional[str] = None, file_size: Optional[int] = None,
+                       document_id: Optional[str] = None) -> str:
+        """Add a new media item.
+        
+        ``document_id`` links the item to the document it illustrates (e.g. a
+        transcript's photocard). If ``content_hash`` matches an existing item,
+        nothing is inserted and the existing item's ID is returned.
+        """
         media_id = str(uuid.uuid4())
         
         # Ensure metadata is always a dict, never None
@@ -435,33 +994,94 @@ class EnhancedDataStore:
         summary = metadata.get('summary', None)
         tags = metadata.get('tags', [])
         
-        with self.pg_conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute("""
-                INSERT INTO media (id, file_path, file_type, title, summary, tags, metadata, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                INSERT INTO media (id, document_id, file_path, file_type, title, summary, tags, metadata,
+                                   content_hash, file_size, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL DO NOTHING
                 RETURNING id
-            """, (media_id, file_path, 'image', title, summary, json.dumps(tags), json.dumps(metadata), datetime.now()))
+            """, (media_id, document_id, file_path, 'image', title, summary, json.dumps(tags),
+                  json.dumps(metadata), content_hash, file_size, datetime.now()))
+            
+            if cursor.fetchone() is None:
+                # Lost a race with an identical upload
+                cursor.execute("SELECT id FROM media WHERE content_hash = %s", (content_hash,))
+                return str(cursor.fetchone()['id'])
+            
+            self._sync_media_tags(cursor, {media_id: tags})
         
-        self.pg_conn.commit()
+        self._after_commit(lambda: self._index_media([{"id": media_id, "file_type": 'image', "title": title,
+                                                       "summary": summary, "tags": tags, "contexts": []}]))
         return media_id
     
+    def add_media_items_bulk(self, items: List[Dict[str, Any]], 
+                             chunk_size: int = 500) -> List[str]:
+        """Add many media items with one multi-row INSERT per chunk.
+        
+        Each item is a dict with ``file_path`` and optional ``metadata``,
+        ``content_hash``, ``file_size`` and ``file_mtime_ns``. Returns the new IDs
+        in input order, with None for items skipped because their content_hash
+        is already in the library.
+        """
+        media_ids = []
+        
+        for start in range(0, len(items), chunk_size):
+            rows = []
+            indexed = []
+            for item in items[start:start + chunk_size]:
+                media_id = str(uuid.uuid4())
+                metadata = item.get('metadata') or {}
+                title = metadata.get('title', None)
+                summary = metadata.get('summary', None)
+                tags = metadata.get('tags', [])
+                rows.append((
+                    media_id, item['file_path'], 'image', title, summary,
+                    json.dumps(tags), json.dumps(metadata, default=str), item.get('content_hash'),
+                    item.get('file_size'), item.get('file_mtime_ns'), datetime.now()
+                ))
+                indexed.append({"id": media_id, "file_type": 'image', "title": title,
+                                "summary": summary, "tags": tags, "contexts": []})
+            
+            with self._connection() as conn, conn.cursor() as cursor:
+                inserted = {str(row[0]) for row in execute_values(cursor, """
+                    INSERT INTO media (id, file_path, file_type, title, summary, tags, metadata,
+                                       content_hash, file_size, file_mtime_ns, created_at)
+                    VALUES %s
+                    ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL DO NOTHING
+                    RETURNING id
+                """, rows, page_size=chunk_size, fetch=True)}
+                indexed = [item for item in indexed if item["id"] in inserted]
+                self._sync_media_tags(cursor, {item["id"]: item["tags"] for item in indexed})
+            
+            media_ids.extend(row[0] if row[0] in inserted else None for row in rows)
+            self._after_commit(lambda indexed=indexed: self._index_media(indexed))
+        
+        return media_ids
+    
     def get_media_item(self, doc_id: str) -> Optional[Dict]:
         """Get a media item by ID."""
-        conn = self._get_connection()
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT * FROM media WHERE id = %s
-                """, (doc_id,))
-                
-                result = cursor.fetchone()
-                return dict(result) if result else None
-        finally:
-            conn.close()
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT * FROM media WHERE id = %s
+            """, (doc_id,))
+            
+            result = cursor.fetchone()
+            return dict(result) if result else None
+    
+    def get_media_by_content_hash(self, content_hash: str) -> Optional[Dict]:
+        """Get a media item by the SHA-256 of its file."""
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT * FROM media WHERE content_hash = %s
+            """, (content_hash,))
+            
+            result = cursor.fetchone()
+            return dict(result) if result else None
     
     def get_media_by_file_path(self, file_path: str) -> Optional[Dict]:
         """Get a media item by file path."""
-        with self.pg_conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute("""
                 SELECT * FROM media WHERE file_path = %s
             """, (file_path,))
@@ -469,73 +1089,339 @@ class EnhancedDataStore:
             result = cursor.fetchone()
             return dict(result) if result else None
     
-    def list_media_items(self) -> List[Dict]:
-        """List all media items."""
-        conn = self._get_connection()
-        try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    SELECT * FROM media ORDER BY created_at DESC
-                """)
-                
-                results = cursor.fetchall()
-                return [dict(row) for row in results]
-        finally:
-            conn.close()
+    def list_media_items(self, limit: Optional[int] = None, after: Optional[tuple] = None,
+                         fields: Optional[List[str]] = None) -> List[Dict]:
+        """List media items, newest first.
+        
+        ``after`` is a ``(created_at, id)`` keyset cursor taken from the last item
+        of the previous page, ``limit`` caps the page size and ``fields`` restricts
+        the returned columns (``id`` and ``created_at`` are always included).
+        """
+        select = self._media_columns(fields)
+        
+        conditions = []
+        values = []
+        if after is not None:
+            conditions.append("(created_at, id) < (%s::timestamp, %s::uuid)")
+            values.extend(after)
+        
+        query = f"SELECT {select} FROM media"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT %s"
+            values.append(limit)
+        
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, values)
+            
+            results = cursor.fetchall()
+            return [dict(row) for row in results]
+    
+    @staticmethod
+    def _media_columns(fields: Optional[List[str]], alias: str = '') -> str:
+        """SELECT list for a media field projection (``id`` and ``created_at`` always included)."""
+        prefix = f"{alias}." if alias else ''
+        if not fields:
+            return f"{prefix}*"
+        unknown = [f for f in fields if f not in MEDIA_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown media fields: {', '.join(unknown)}")
+        columns = ['id', 'created_at'] + [f for f in fields if f not in ('id', 'created_at')]
+        return ', '.join(prefix + column for column in columns)
+    
+    def media_by_tags(self, all_tags: Optional[List[str]] = None, any_tags: Optional[List[str]] = None,
+                      limit: Optional[int] = 50, after: Optional[tuple] = None,
+                      fields: Optional[List[str]] = None) -> List[Dict]:
+        """List media having every tag in ``all_tags`` and at least one of ``any_tags``.
+        
+        Results are newest first and paginated like list_media_items, with a
+        ``(created_at, id)`` keyset cursor in ``after``.
+        """
+        all_tags = self._clean_tags(all_tags)
+        any_tags = self._clean_tags(any_tags)
+        if not all_tags and not any_tags:
+            return self.list_media_items(limit=limit, after=after, fields=fields)
+        
+        conditions = []
+        values = []
+        if all_tags:
+            conditions.append("""m.id IN (
+                SELECT media_id FROM media_tags WHERE tag = ANY(%s)
+                GROUP BY media_id HAVING COUNT(*) = %s
+            )""")
+            values.extend([all_tags, len(all_tags)])
+        if any_tags:
+            conditions.append("EXISTS (SELECT 1 FROM media_tags t WHERE t.media_id = m.id AND t.tag = ANY(%s))")
+            values.append(any_tags)
+        if after is not None:
+            conditions.append("(m.created_at, m.id) < (%s::timestamp, %s::uuid)")
+            values.extend(after)
+        
+        query = f"""
+            SELECT {self._media_columns(fields, 'm')} FROM media m
+            WHERE {' AND '.join(conditions)}
+            ORDER BY m.created_at DESC, m.id DESC
+        """
+        if limit is not None:
+            query += " LIMIT %s"
+            values.append(limit)
+        
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, values)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def refresh_tag_counts(self):
+        """Recompute the media_tag_counts view without blocking readers."""
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY media_tag_counts")
+    
+    def _mark_tag_counts_stale(self):
+        """Schedule a background refresh of the counts view after a media_tags write."""
+        self._tag_counts_stale.set()
+        with self._tag_counts_lock:
+            if self._tag_counts_thread is None:
+                self._tag_counts_thread = threading.Thread(target=self._refresh_tag_counts_loop,
+                                                           name='tag-counts', daemon=True)
+                self._tag_counts_thread.start()
+    
+    def _refresh_tag_counts_loop(self):
+        while True:
+            self._tag_counts_stale.wait()
+            time.sleep(TAG_COUNTS_REFRESH_SECONDS)
+            self._tag_counts_stale.clear()
+            try:
+                self.refresh_tag_counts()
+            except Exception as e:
+                print(f"Error refreshing tag counts: {e}")
+    
+    def tag_counts(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return ``[{"tag", "count"}]``, most used first, from the aggregate view.
+        
+        The view is refreshed in the background shortly after tags change, so
+        counts may lag a write by ``TAG_COUNTS_REFRESH_SECONDS``.
+        """
+        query = "SELECT tag, count FROM media_tag_counts ORDER BY count DESC, lower(tag)"
+        values = []
+        if limit is not None:
+            query += " LIMIT %s"
+            values.append(limit)
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, values)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def suggest_tags(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Autocomplete tags containing ``prefix``, prefix matches and popular tags first.
+        
+        The ILIKE match is served by the trigram index on the counts view.
+        """
+        prefix = (prefix or '').strip()
+        if not prefix:
+            return self.tag_counts(limit=limit)
+        
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT tag, count FROM media_tag_counts
+                WHERE tag ILIKE %s
+                ORDER BY (tag ILIKE %s) DESC, count DESC, lower(tag)
+                LIMIT %s
+            """, (f"%{escaped}%", f"{escaped}%", limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_media_library_version(self) -> int:
+        """Return a counter that changes whenever a write to media commits."""
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT version FROM media_library_version")
+            row = cursor.fetchone()
+            return row[0] if row else 0
     
     def update_media_item(self, doc_id: str, title: Optional[str] = None, 
                          summary: Optional[str] = None, tags: Optional[List[str]] = None, 
                          metadata: Optional[Dict] = None) -> bool:
         """Update a media item."""
-        try:
-            with self.pg_conn.cursor() as cursor:
-                # Build dynamic update query based on provided fields
-                update_fields = []
-                update_values = []
-                
-                if title is not None:
-                    update_fields.append("title = %s")
-                    update_values.append(title)
-                
-                if summary is not None:
-                    update_fields.append("summary = %s")
-                    update_values.append(summary)
-                
-                if tags is not None:
-                    update_fields.append("tags = %s")
-                    update_values.append(json.dumps(tags))
-                
-                if metadata is not None:
-                    update_fields.append("metadata = %s")
-                    update_values.append(json.dumps(metadata))
-                
-                if not update_fields:
-                    return True  # Nothing to update
-                
-                # Add the doc_id for the WHERE clause
-                update_values.append(doc_id)
-                
-                query = f"""
+        # Build dynamic update query based on provided fields
+        update_fields = []
+        update_values = []
+        
+        if title is not None:
+            update_fields.append("title = %s")
+            update_values.append(title)
+        
+        if summary is not None:
+            update_fields.append("summary = %s")
+            update_values.append(summary)
+        
+        if tags is not None:
+            update_fields.append("tags = %s")
+            update_values.append(json.dumps(tags))
+        
+        if metadata is not None:
+            update_fields.append("metadata = %s")
+            update_values.append(json.dumps(metadata))
+        
+        if not update_fields:
+            return True  # Nothing to update
+        
+        # Add the doc_id for the WHERE clause
+        update_values.append(doc_id)
+        
+        def write():
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(f"""
                     UPDATE media SET {', '.join(update_fields)} 
                     WHERE id = %s
-                """
+                """, update_values)
                 
-                cursor.execute(query, update_values)
+                if tags is not None:
+                    self._sync_media_tags(cursor, {doc_id: tags})
             
-            self.pg_conn.commit()
+            if title is not None or summary is not None or tags is not None:
+                self._reindex_after_commit([doc_id])
             return True
+        
+        try:
+            return self._write(write, True)
         except Exception as e:
             print(f"Error updating media item: {e}")
-            self.pg_conn.rollback()
             return False
     
+    def merge_media_metadata_bulk(self, patches: Dict[str, Dict[str, Any]],
+                                  chunk_size: int = 500) -> int:
+        """Merge ``{media_id: {key: value}}`` patches into media metadata.
+        
+        Keys in each patch overwrite existing top-level metadata keys; one
+        UPDATE is issued per chunk. Returns the number of rows updated.
+        """
+        updated = 0
+        items = list(patches.items())
+        for start in range(0, len(items), chunk_size):
+            rows = [(media_id, json.dumps(patch, default=str)) for media_id, patch in items[start:start + chunk_size]]
+            with self._connection() as conn, conn.cursor() as cursor:
+                execute_values(cursor, """
+                    UPDATE media SET metadata = COALESCE(media.metadata, '{}'::jsonb) || v.patch::jsonb
+                    FROM (VALUES %s) AS v(id, patch)
+                    WHERE media.id = v.id::uuid
+                """, rows, page_size=chunk_size)
+                updated += cursor.rowcount
+        return updated
+    
+    def update_media_items_bulk(self, updates: Dict[str, Dict[str, Any]],
+                                chunk_size: int = 500) -> int:
+        """Apply ``{media_id: {title, summary, tags, metadata}}`` updates, one UPDATE per chunk.
+        
+        Missing or None fields are left unchanged; ``metadata`` is merged into the
+        existing metadata like merge_media_metadata_bulk. Returns the number of
+        rows updated.
+        """
+        updated = 0
+        items = list(updates.items())
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            rows = [(
+                media_id,
+                update.get('title'),
+                update.get('summary'),
+                json.dumps(update['tags']) if update.get('tags') is not None else None,
+                json.dumps(update['metadata'], default=str) if update.get('metadata') else None
+            ) for media_id, update in chunk]
+            tags_by_media = {media_id: update['tags'] for media_id, update in chunk
+                             if update.get('tags') is not None}
+            
+            with self._connection() as conn, conn.cursor() as cursor:
+                execute_values(cursor, """
+                    UPDATE media SET
+                        title = COALESCE(v.title, media.title),
+                        summary = COALESCE(v.summary, media.summary),
+                        tags = COALESCE(v.tags::jsonb, media.tags),
+                        metadata = COALESCE(media.metadata, '{}'::jsonb) || COALESCE(v.patch::jsonb, '{}'::jsonb)
+                    FROM (VALUES %s) AS v(id, title, summary, tags, patch)
+                    WHERE media.id = v.id::uuid
+                """, rows, page_size=chunk_size)
+                updated += cursor.rowcount
+                self._sync_media_tags(cursor, tags_by_media)
+            
+            self._reindex_after_commit([media_id for media_id, _ in chunk])
+        return updated
+    
+    def media_manifest(self, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return ``id``, ``file_path``, ``file_size``, ``file_mtime_ns`` and
+        ``content_hash`` for every media item, optionally only under a path prefix."""
+        query = "SELECT id, file_path, file_size, file_mtime_ns, content_hash FROM media"
+        values = []
+        if prefix:
+            query += " WHERE left(file_path, %s) = %s"
+            values.extend([len(prefix), prefix])
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, values)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def update_media_files_bulk(self, updates: Dict[str, Dict[str, Any]],
+                                chunk_size: int = 500) -> int:
+        """Record file changes and moves: ``{media_id: {file_path, file_size,
+        file_mtime_ns, content_hash, metadata}}``, one UPDATE per chunk.
+        
+        Missing or None fields are left unchanged and ``metadata`` is merged.
+        Returns the number of rows updated.
+        """
+        updated = 0
+        items = list(updates.items())
+        for start in range(0, len(items), chunk_size):
+            rows = [(
+                media_id,
+                update.get('file_path'),
+                update.get('file_size'),
+                update.get('file_mtime_ns'),
+                update.get('content_hash'),
+                json.dumps(update['metadata'], default=str) if update.get('metadata') else None
+            ) for media_id, update in items[start:start + chunk_size]]
+            with self._connection() as conn, conn.cursor() as cursor:
+                execute_values(cursor, """
+                    UPDATE media SET
+                        file_path = COALESCE(v.file_path, media.file_path),
+                        file_size = COALESCE(v.file_size::bigint, media.file_size),
+                        file_mtime_ns = COALESCE(v.file_mtime_ns::bigint, media.file_mtime_ns),
+                        -- A file rewritten as a copy of another item can't take its hash (unique index)
+                        content_hash = CASE
+                            WHEN v.content_hash IS NULL THEN media.content_hash
+                            WHEN EXISTS (SELECT 1 FROM media other
+                                         WHERE other.content_hash = v.content_hash AND other.id <> media.id) THEN NULL
+                            ELSE v.content_hash
+                        END,
+                        metadata = COALESCE(media.metadata, '{}'::jsonb) || COALESCE(v.patch::jsonb, '{}'::jsonb)
+                    FROM (VALUES %s) AS v(id, file_path, file_size, file_mtime_ns, content_hash, patch)
+                    WHERE media.id = v.id::uuid
+                """, rows, page_size=chunk_size)
+                updated += cursor.rowcount
+        return updated
+    
+    def delete_media_items_bulk(self, media_ids: List[str], chunk_size: int = 500) -> int:
+        """Delete many media items with their contexts, tags and embeddings. Returns rows deleted."""
+        deleted = 0
+        media_ids = [str(media_id) for media_id in media_ids]
+        for start in range(0, len(media_ids), chunk_size):
+            chunk = media_ids[start:start + chunk_size]
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM contexts WHERE media_id = ANY(%s::uuid[])", (chunk,))
+                cursor.execute("DELETE FROM media_embeddings WHERE media_id = ANY(%s::uuid[])", (chunk,))
+                cursor.execute("DELETE FROM media WHERE id = ANY(%s::uuid[])", (chunk,))
+                deleted += cursor.rowcount
+            
+            self._after_commit(lambda chunk=chunk: self._unindex_media(chunk))
+            self._after_commit(self._mark_tag_counts_stale)
+        return deleted
+    
     def delete_media_item(self, doc_id: str) -> bool:
         """Delete a media item."""
         try:
-            with self.pg_conn.cursor() as cursor:
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM media_embeddings WHERE media_id = %s", (doc_id,))
+                cursor.execute("DELETE FROM media_tags WHERE media_id = %s", (doc_id,))
                 cursor.execute("DELETE FROM media WHERE id = %s", (doc_id,))
             
-            self.pg_conn.commit()
+            self._after_commit(lambda: self._unindex_media([doc_id]))
+            self._after_commit(self._mark_tag_counts_stale)
             return True
         except Exception as e:
             print(f"Error deleting media item: {e}")
@@ -544,20 +1430,23 @@ class EnhancedDataStore:
     def add_context(self, media_id: str, text: str, context_type: str = 'description') -> str:
         """Add context to a media item."""
         context_id = str(uuid.uuid4())
+        created_at = datetime.now()
         
-        with self.pg_conn.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO contexts (id, media_id, text, context_type, created_at)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id
-            """, (context_id, media_id, text, context_type, datetime.now()))
+        def write():
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO contexts (id, media_id, text, context_type, created_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING id
+                """, (context_id, media_id, text, context_type, created_at))
+            self._reindex_after_commit([media_id])
+            return context_id
         
-        self.pg_conn.commit()
-        return context_id
+        return self._write(write, context_id)
     
     def get_contexts(self, media_id: str) -> List[Dict]:
         """Get all contexts for a media item."""
-        with self.pg_conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute("""
                 SELECT * FROM contexts WHERE media_id = %s ORDER BY created_at DESC
             """, (media_id,))
@@ -565,39 +1454,222 @@ class EnhancedDataStore:
             results = cursor.fetchall()
             return [dict(row) for row in results]
     
-    def update_context(self, context_id: str, text: str) -> bool:
-        """Update a context."""
-        try:
-            with self.pg_conn.cursor() as cursor:
+    def get_contexts_bulk(self, media_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Get the contexts for many media items in one query, oldest first."""
+        contexts = {str(media_id): [] for media_id in media_ids}
+        if not contexts:
+            return contexts
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT * FROM contexts WHERE media_id = ANY(%s::uuid[]) ORDER BY created_at
+            """, (list(contexts),))
+            for row in cursor.fetchall():
+                contexts[str(row['media_id'])].append(dict(row))
+        return contexts
+    
+    def update_context(self, media_id: str, context_id: str, text: str) -> bool:
+        """Update a context belonging to a media item."""
+        def write():
+            with self._connection() as conn, conn.cursor() as cursor:
                 cursor.execute("""
-                    UPDATE contexts SET text = %s WHERE id = %s
-                """, (text, context_id))
+                    UPDATE contexts SET text = %s WHERE id = %s AND media_id = %s
+                """, (text, context_id, media_id))
+                updated = cursor.rowcount > 0
             
-            self.pg_conn.commit()
-            return True
+            if updated:
+                self._reindex_after_commit([media_id])
+            return updated
+        
+        try:
+            return self._write(write, True)
         except Exception as e:
             print(f"Error updating context: {e}")
             return False
     
-    def delete_context(self, context_id: str) -> bool:
-        """Delete a context."""
-        try:
-            with self.pg_conn.cursor() as cursor:
-                cursor.execute("DELETE FROM contexts WHERE id = %s", (context_id,))
+    def delete_context(self, media_id: str, context_id: str) -> bool:
+        """Delete a context belonging to a media item."""
+        def write():
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute("DELETE FROM contexts WHERE id = %s AND media_id = %s",
+                               (context_id, media_id))
+                deleted = cursor.rowcount > 0
             
-            self.pg_conn.commit()
-            return True
+            if deleted:
+                self._reindex_after_commit([media_id])
+            return deleted
+        
+        try:
+            return self._write(write, True)
         except Exception as e:
             print(f"Error deleting context: {e}")
             return False
     
-    def sync_gcs_files(self, gcs_files: List[str]) -> List[Dict]:
-        """Sync GCS files with local database (placeholder for now)."""
-        # This is a placeholder - you can implement actual GCS sync logic here
-        return []
+    def search_media(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Search media items semantically by their title, summary, tags and contexts.
+        
+        Returns lightweight media rows ranked by similarity, starting at ``offset``.
+        """
+        n_results = offset + limit
+        total = self.media_collection.count()
+        if limit <= 0 or offset >= total:
+            return []
+        
+        results = self.media_collection.query(
+            query_texts=[query],
+            n_results=min(n_results, total)
+        )
+        
+        media_ids = results['ids'][0][offset:n_results]
+        if not media_ids:
+            return []
+        scores = dict(zip(results['ids'][0], results['distances'][0]))
+        
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT id, file_path, file_type, title, summary, tags, created_at
+                FROM media WHERE id = ANY(%s::uuid[])
+            """, (media_ids,))
+            rows = {str(row['id']): dict(row) for row in cursor.fetchall()}
+        
+        ranked = []
+        for media_id in media_ids:
+            item = rows.get(media_id)
+            if item is None:
+                continue
+            item['similarity_score'] = scores[media_id]
+            ranked.append(item)
+        return ranked
+    
+    def reindex_media(self, chunk_size: int = 500) -> int:
+        """Rebuild the media search collection from PostgreSQL. Returns the item count."""
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT id FROM media")
+            media_ids = [str(row[0]) for row in cursor.fetchall()]
+        
+        for start in range(0, len(media_ids), chunk_size):
+            self._reindex_media_ids(media_ids[start:start + chunk_size])
+        return len(media_ids)
+    
+    def _reindex_media_ids(self, media_ids: List[str]) -> None:
+        """Reload media rows with their contexts and refresh them in the search collection."""
+        with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT m.id, m.file_type, m.title, m.summary, m.tags,
+                       COALESCE(array_agg(c.text ORDER BY c.created_at)
+                                FILTER (WHERE c.id IS NOT NULL), '{}') AS contexts
+                FROM media m
+                LEFT JOIN contexts c ON c.media_id = m.id
+                WHERE m.id = ANY(%s::uuid[])
+                GROUP BY m.id
+            """, (media_ids,))
+            rows = [dict(row) for row in cursor.fetchall()]
+        
+        for row in rows:
+            row['id'] = str(row['id'])
+            row['tags'] = self._load_json(row['tags']) or []
+        self._index_media(rows)
+    
+    def _unindex_media(self, media_ids: List[str]) -> None:
+        """Remove deleted media from the search collection and the ANN index."""
+        self.media_collection.delete(ids=media_ids)
+        if self._media_index is not None:
+            self._media_index.remove(media_ids)
+    
+    def _index_media(self, items: List[Dict[str, Any]]) -> None:
+        """Upsert media search text into ChromaDB; items without any text are removed."""
+        ids, documents, metadatas, empty = [], [], [], []
+        
+        for item in items:
+            parts = [item.get('title'), item.get('summary')]
+            if item.get('tags'):
+                parts.append("Tags: " + ", ".join(item['tags']))
+            parts.extend(item.get('contexts') or [])
+            text = "\n".join(part for part in parts if part)
+            
+            if not text:
+                empty.append(item['id'])
+                continue
+            
+            metadata = {"id": item['id'], "file_type": item.get('file_type') or 'image'}
+            if item.get('title'):
+                metadata["title"] = item['title']
+            ids.append(item['id'])
+            documents.append(text)
+            metadatas.append(metadata)
+        
+        if ids:
+            self.media_collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+        if empty:
+            self.media_collection.delete(ids=empty)
+    
+    def set_media_embedding(self, media_id: str, vector: List[float]) -> None:
+        """Store a packed float32 embedding for a media item and update the index."""
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO media_embeddings (id, media_id, embedding_vector, created_at)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (media_id) DO UPDATE
+                SET embedding_vector = EXCLUDED.embedding_vector, created_at = EXCLUDED.created_at
+            """, (str(uuid.uuid4()), media_id, psycopg2.Binary(pack_vector(vector)), datetime.now()))
+        
+        self._after_commit(lambda: self._get_media_index().upsert([media_id], [vector]))
+    
+    def nearest_media(self, vector: List[float], k: int = 10) -> List[Dict[str, Any]]:
+        """Return the ``k`` media items whose embeddings are closest to ``vector``."""
+        return [
+            {"media_id": media_id, "similarity_score": score}
+            for media_id, score in self._get_media_index().nearest(vector, k)
+        ]
+    
+    def _get_media_index(self) -> VectorIndex:
+        """Load all media embeddings into the in-memory index on first use."""
+        if self._media_index is None:
+            with self._media_index_lock:
+                if self._media_index is None:
+                    index = VectorIndex()
+                    with self._connection() as conn, conn.cursor() as cursor:
+                        cursor.execute("SELECT media_id, embedding_vector FROM media_embeddings")
+                        rows = cursor.fetchall()
+                    if rows:
+                        index.upsert([str(media_id) for media_id, _ in rows],
+                                     [unpack_vector(vector) for _, vector in rows])
+                    self._media_index = index
+        return self._media_index
+    
+    def sync_gcs_files(self, gcs_files: List[Any], delete_missing: bool = False) -> List[Dict]:
+        """Sync an object-storage listing into the media table.
+        
+        ``gcs_files`` are object names or blobs (anything with ``name``, ``size``
+        and ``updated``). New objects are added in bulk and returned; changed
+        objects get their size/mtime refreshed. Rows for objects no longer
+        listed are only removed with ``delete_missing``, since the media table
+        also holds local files.
+        """
+        from app.library_sync import diff_listings, manifest_listing, object_listing
+        
+        listing = object_listing(gcs_files)
+        diff = diff_listings(manifest_listing(self.media_manifest()), listing)
+        
+        new_items = [{'file_path': entry.path,
+                      'file_size': entry.size,
+                      'file_mtime_ns': entry.mtime_ns,
+                      'metadata': {'title': os.path.basename(entry.path)}} for entry in diff.added]
+        media_ids = self.add_media_items_bulk(new_items)
+        for item, media_id in zip(new_items, media_ids):
+            item['id'] = media_id
+        
+        if diff.updated:
+            self.update_media_files_bulk({old.media_id: {'file_size': new.size, 'file_mtime_ns': new.mtime_ns}
+                                          for old, new in diff.updated})
+        if delete_missing and diff.deleted:
+            self.delete_media_items_bulk([entry.media_id for entry in diff.deleted])
+        
+        return [item for item in new_items if item['id']]
     
     def close(self):
-        """Close database connections."""
-        if self.pg_conn:
-            self.pg_conn.close()
+        """Commit any queued writes and close database connections."""
+        if self._group_committer is not None:
+            self._group_committer.close()
+        if self.pool:
+            self.pool.closeall()
 
@@ -3,13 +3,23 @@ import requests
 from bs4 import BeautifulSoup
 import re
 from urllib.parse import urlparse
-from app.enhanced_data_store import EnhancedDataStore
+from app.enhanced_data_store import get_store, DEFAULT_SEARCH_MODE
+from app.renditions import pregenerate_in_background
+from app.uploads import (
+    UploadError, stream_to_temp, commit_to_store, discard, create_upload_session,
+    get_upload_session, append_chunk, finish_upload_session, abort_upload_session
+)
+from app.jobs import get_job_queue, job_handler
+from image_metadata import extract_exif_record, extract_exif_batch
 import os
+import json
 from datetime import datetime
 
 # Create Blueprint for enhanced data store routes
 enhanced_bp = Blueprint('enhanced', __name__)
 
+TRANSCRIPT_ENRICHMENT_JOB = 'transcript_enrichment'
+
 @enhanced_bp.route('/api/documents', methods=['POST'])
 def add_document():
     """Add a new document to the enhanced data store."""
@@ -19,7 +29,7 @@ def add_document():
         if not data or 'type' not in data or 'title' not in data or 'content' not in data:
             return jsonify({"error": "Missing required fields: type, title, content"}), 400
         
-        store = EnhancedDataStore()
+        store = get_store()
         
         # Add the document
         doc_id = store.add_document(
@@ -39,13 +49,50 @@ def add_document():
     except Exception as e:
         return jsonify({"error": f"Failed to add document: {str(e)}"}), 500
 
+@enhanced_bp.route('/api/documents/bulk', methods=['POST'])
+def add_documents_bulk():
+    """Add many documents from an NDJSON body (one JSON document per line)."""
+    try:
+        chunk_size = request.args.get('chunk_size', 500, type=int)
+        if chunk_size < 1:
+            return jsonify({"error": "chunk_size must be positive"}), 400
+        
+        documents = []
+        for line_number, line in enumerate(request.get_data(as_text=True).splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                doc = json.loads(line)
+            except json.JSONDecodeError as e:
+                return jsonify({"error": f"Invalid JSON on line {line_number}: {str(e)}"}), 400
+            
+            if not isinstance(doc, dict) or 'type' not in doc or 'title' not in doc or 'content' not in doc:
+                return jsonify({"error": f"Missing required fields on line {line_number}: type, title, content"}), 400
+            documents.append(doc)
+        
+        if not documents:
+            return jsonify({"error": "No documents provided"}), 400
+        
+        store = get_store()
+        doc_ids = store.add_documents_bulk(documents, chunk_size=chunk_size)
+        
+        return jsonify({
+            "success": True,
+            "ids": doc_ids,
+            "count": len(doc_ids),
+            "message": f"{len(doc_ids)} documents added successfully"
+        }), 201
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to add documents: {str(e)}"}), 500
+
 @enhanced_bp.route('/api/documents/<doc_type>', methods=['GET'])
 def get_documents_by_type(doc_type):
     """Get all documents of a specific type."""
     try:
         limit = request.args.get('limit', 50, type=int)
         
-        store = EnhancedDataStore()
+        store = get_store()
         documents = store.get_documents_by_type(doc_type, limit=limit)
         
         return jsonify({
@@ -59,30 +106,46 @@ def get_documents_by_type(doc_type):
 
 @enhanced_bp.route('/api/documents/search', methods=['POST'])
 def search_documents():
-    """Search documents using text matching."""
+    """Search documents lexically, semantically or with hybrid rank fusion."""
     try:
         data = request.get_json()
         
         if not data or 'query' not in data:
             return jsonify({"error": "Missing query parameter"}), 400
         
-        store = EnhancedDataStore()
+        store = get_store()
         
-        # Search with optional type filter
+        # Search with optional type filter and field projection
         doc_type = data.get('type')
         limit = data.get('limit', 10)
+        fields = data.get('fields')
+        mode = data.get('mode')
+        weights = data.get('weights')
+        if weights is not None and not isinstance(weights, dict):
+            return jsonify({"error": "weights must be an object like {\"lexical\": 1.0, \"semantic\": 0.5}"}), 400
+        rrf_k = data.get('rrf_k')
+        if rrf_k is not None and (isinstance(rrf_k, bool) or not isinstance(rrf_k, int)):
+            return jsonify({"error": "rrf_k must be an integer"}), 400
         
-        results = store.search_documents(
-            query=data['query'],
-            doc_type=doc_type,
-            limit=limit
-        )
+        try:
+            results = store.search_documents(
+                query=data['query'],
+                doc_type=doc_type,
+                limit=limit,
+                fields=fields,
+                mode=mode,
+                weights=weights,
+                rrf_k=rrf_k
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         return jsonify({
             "success": True,
             "results": results,
             "count": len(results),
-            "query": data['query']
+            "query": data['query'],
+            "mode": mode or DEFAULT_SEARCH_MODE
         }), 200
         
     except Exception as e:
@@ -131,7 +194,7 @@ def import_website():
         metadata = extract_website_metadata(soup, url)
         
         # Store in enhanced data store
-        store = EnhancedDataStore()
+        store = get_store()
         
         doc_id = store.add_website_content(
             title=custom_title,
@@ -177,7 +240,7 @@ def add_content():
         if not data or 'title' not in data or 'content' not in data:
             return jsonify({"error": "Missing required fields: title, content"}), 400
         
-        store = EnhancedDataStore()
+        store = get_store()
         
         # Determine content type from the request or default to 'document'
         content_type = data.get('type', 'document')
@@ -187,119 +250,46 @@ def add_content():
         if metadata is None:
             metadata = {}
             
-        # Add the content using the general document method
-        doc_id = store.add_document(
-            doc_type=content_type,
-            title=data['title'],
-            content=data['content'],
-            metadata=metadata,
-            source=data.get('source')
-        )
+        # The document and its photocard are committed together
+        photocard_id = None
+        photocard_error = None
+        with store.transaction():
+            # Add the content using the general document method
+            doc_id = store.add_document(
+                doc_type=content_type,
+                title=data['title'],
+                content=data['content'],
+                metadata=metadata,
+                source=data.get('source')
+            )
+            
+            # If this is a transcript, create a placeholder photocard
+            if content_type == 'transcript':
+                try:
+                    # Nested transaction: if the photocard fails, the transcript is still saved
+                    with store.transaction():
+                        # Create a placeholder photocard, linked to the transcript through
+                        # media.document_id (document_relations only links documents)
+                        photocard_id = store.add_media_item(
+                            file_path=f"placeholder_transcript_{doc_id}.jpg",
+                            metadata={
+                                "type": "transcript_placeholder",
+                                "document_id": doc_id,
+                                "title": data['title'],
+                                "description": f"Transcript: {data['title']}",
+                                "is_placeholder": True,
+                                "content_preview": data['content'][:100] + "..." if len(data['content']) > 100 else data['content']
+                            },
+                            document_id=doc_id
+                        )
+                except Exception as e:
+                    photocard_id = None
+                    photocard_error = e
         
-        # If this is a transcript, create a placeholder photocard
         if content_type == 'transcript':
-            try:
-                # Create a placeholder photocard
-                photocard_id = store.add_media_item(
-                    file_path=f"placeholder_transcript_{doc_id}.jpg",
-                    metadata={
-                        "type": "transcript_placeholder",
-                        "document_id": doc_id,
-                        "title": data['title'],
-                        "description": f"Transcript: {data['title']}",
-                        "is_placeholder": True,
-                        "content_preview": data['content'][:100] + "..." if len(data['content']) > 100 else data['content']
-                    }
-                )
-                
-                # Link the photocard to the transcript
-                store.add_document_relation(
-                    source_doc_id=doc_id,
-                    target_doc_id=photocard_id,
-                    relation_type="has_photocard"
-                )
-                
-                # Generate AI summary and tags for the transcript
-                try:
-                    from prompts import build_summary_prompt
-                    from interviewer_bot import run_interview_chat, generate_image_tags
-                    
-                    # Generate AI summary
-                    summary_prompt = build_summary_prompt([data['content']])
-                    ai_summary_response, _ = run_interview_chat(summary_prompt, image_path=None)
-                    
-                    # Parse the summary response
-                    lines = ai_summary_response.strip().split('\n')
-                    summary_title = ""
-                    summary_text = ""
-                    
-                    for line in lines:
-                        if line.startswith('Title:'):
-                            summary_title = line.replace('Title:', '').strip()
-                        elif line.startswith('Summary:'):
-                            summary_text = line.replace('Summary:', '').strip()
-                    
-                    # If parsing failed, use the whole response
-                    if not summary_title or not summary_text:
-                        summary_title = f"Transcript: {data['title']}"
-                        summary_text = ai_summary_response.strip()
-                    
-                    # Generate AI tags
-                    ai_tags = generate_image_tags(
-                        image_path=None,  # No image for transcripts
-                        context=data['content'],
-                        summary=summary_text,
-                        existing_tags=[]
-                    )
-                    
-                    # Update the photocard with AI-generated summary and tags
-                    store.update_media_item(
-                        photocard_id,
-                        title=summary_title,
-                        summary=summary_text,
-                        tags=ai_tags
-                    )
-                    
-                    # Update the transcript document with the summary
-                    store.update_document(
-                        doc_id,
-                        title=summary_title,
-                        metadata={
-                            **metadata,
-                            "ai_summary": summary_text,
-                            "ai_tags": ai_tags,
-                            "summary_generated_at": datetime.now().isoformat()
-                        }
-                    )
-                    
-                    return jsonify({
-                        "success": True,
-                        "id": doc_id,
-                        "type": content_type,
-                        "photocard_id": photocard_id,
-                        "ai_summary": {
-                            "title": summary_title,
-                            "summary": summary_text,
-                            "tags": ai_tags
-                        },
-                        "message": f"Transcript '{data['title']}' added successfully with AI-generated summary and tags"
-                    }), 201
-                    
-                except Exception as ai_error:
-                    print(f"Warning: AI processing failed for transcript: {ai_error}")
-                    # Return success even if AI processing fails
-                    return jsonify({
-                        "success": True,
-                        "id": doc_id,
-                        "type": content_type,
-                        "photocard_id": photocard_id,
-                        "warning": "Transcript added but AI processing failed",
-                        "message": f"Transcript '{data['title']}' added successfully with placeholder photocard"
-                    }), 201
-                
-            except Exception as e:
+            if photocard_error is not None:
                 # If photocard creation fails, still return success for the transcript
-                print(f"Warning: Failed to create photocard for transcript: {e}")
+                print(f"Warning: Failed to create photocard for transcript: {photocard_error}")
                 return jsonify({
                     "success": True,
                     "id": doc_id,
@@ -307,6 +297,25 @@ def add_content():
                     "warning": "Transcript added but photocard creation failed",
                     "message": f"Transcript '{data['title']}' added successfully"
                 }), 201
+            
+            # Generate the AI summary and tags in the background, once the rows are committed
+            job_id = get_job_queue().enqueue(TRANSCRIPT_ENRICHMENT_JOB, {
+                "doc_id": doc_id,
+                "photocard_id": photocard_id,
+                "title": data['title'],
+                "content": data['content'],
+                "metadata": metadata
+            })
+            
+            return jsonify({
+                "success": True,
+                "id": doc_id,
+                "type": content_type,
+                "photocard_id": photocard_id,
+                "job_id": job_id,
+                "status": "queued",
+                "message": f"Transcript '{data['title']}' added successfully; AI summary and tags are being generated"
+            }), 202
         
         return jsonify({
             "success": True,
@@ -318,6 +327,89 @@ def add_content():
     except Exception as e:
         return jsonify({"error": f"Failed to add content: {str(e)}"}), 500
 
+@job_handler(TRANSCRIPT_ENRICHMENT_JOB)
+def enrich_transcript(store, payload):
+    """Generate an AI summary and tags for a transcript and its photocard."""
+    from prompts import build_summary_prompt
+    from interviewer_bot import run_interview_chat, generate_image_tags
+    
+    doc_id = payload['doc_id']
+    photocard_id = payload['photocard_id']
+    title = payload['title']
+    content = payload['content']
+    metadata = payload.get('metadata') or {}
+    
+    # Generate AI summary
+    summary_prompt = build_summary_prompt([content])
+    ai_summary_response, _ = run_interview_chat(summary_prompt, image_path=None, cache=True)
+    
+    # Parse the summary response
+    lines = ai_summary_response.strip().split('\n')
+    summary_title = ""
+    summary_text = ""
+    
+    for line in lines:
+        if line.startswith('Title:'):
+            summary_title = line.replace('Title:', '').strip()
+        elif line.startswith('Summary:'):
+            summary_text = line.replace('Summary:', '').strip()
+    
+    # If parsing failed, use the whole response
+    if not summary_title or not summary_text:
+        summary_title = f"Transcript: {title}"
+        summary_text = ai_summary_response.strip()
+    
+    # Generate AI tags
+    ai_tags = generate_image_tags(
+        image_path=None,  # No image for transcripts
+        context=content,
+        summary=summary_text,
+        existing_tags=[],
+        cache=True
+    )
+    
+    # Update the photocard and the transcript together
+    with store.transaction():
+        # Update the photocard with AI-generated summary and tags
+        if not store.update_media_item(
+            photocard_id,
+            title=summary_title,
+            summary=summary_text,
+            tags=ai_tags
+        ):
+            raise RuntimeError(f"Failed to update photocard {photocard_id}")
+        
+        # Update the transcript document with the summary
+        store.update_document(
+            doc_id,
+            title=summary_title,
+            metadata={
+                **metadata,
+                "ai_summary": summary_text,
+                "ai_tags": ai_tags,
+                "summary_generated_at": datetime.now().isoformat()
+            }
+        )
+    
+    return {"title": summary_title, "summary": summary_text, "tags": ai_tags}
+
+@enhanced_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get the status of a background job."""
+    try:
+        job = get_job_queue().get_job(job_id)
+        
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        
+        return jsonify({
+            "success": True,
+            "job": job
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to retrieve job: {str(e)}"}), 500
+
 @enhanced_bp.route('/api/transcript/add', methods=['POST'])
 def add_transcript():
     """Add a transcript document with enhanced metadata."""
@@ -327,7 +419,7 @@ def add_transcript():
         if not data or 'title' not in data or 'content' not in data:
             return jsonify({"error": "Missing required fields: title, content"}), 400
         
-        store = EnhancedDataStore()
+        store = get_store()
         
         # Add the transcript
         doc_id = store.add_interview_transcript(
@@ -349,7 +441,7 @@ def add_transcript():
 def get_document(doc_id):
     """Get a specific document by ID."""
     try:
-        store = EnhancedDataStore()
+        store = get_store()
         document = store.get_document(doc_id)
         
         if not document:
@@ -372,7 +464,7 @@ def update_document(doc_id):
         if not data:
             return jsonify({"error": "No update data provided"}), 400
         
-        store = EnhancedDataStore()
+        store = get_store()
         
         # Update the document
         success = store.update_document(
@@ -397,7 +489,7 @@ def update_document(doc_id):
 def delete_document(doc_id):
     """Delete a document."""
     try:
-        store = EnhancedDataStore()
+        store = get_store()
         success = store.delete_document(doc_id)
         
         if not success:
@@ -415,7 +507,7 @@ def delete_document(doc_id):
 def get_media_item(doc_id):
     """Get a specific media item by document ID."""
     try:
-        store = EnhancedDataStore()
+        store = get_store()
         item = store.get_media_item(doc_id)
         
         if item:
@@ -426,6 +518,72 @@ def get_media_item(doc_id):
     except Exception as e:
         return jsonify({"error": f"Failed to retrieve media item: {str(e)}"}), 500
 
+@enhanced_bp.route('/api/media/search', methods=['POST'])
+def search_media():
+    """Search photos semantically by their summaries, tags and contexts."""
+    try:
+        data = request.get_json()
+        
+        if not data or 'query' not in data:
+            return jsonify({"error": "Missing query parameter"}), 400
+        
+        limit = int(data.get('limit', 20))
+        offset = int(data.get('offset', 0))
+        if limit < 1 or offset < 0:
+            return jsonify({"error": "limit must be positive and offset non-negative"}), 400
+        
+        store = get_store()
+        results = store.search_media(data['query'], limit=limit, offset=offset)
+        
+        return jsonify({
+            "success": True,
+            "results": results,
+            "ids": [str(item['id']) for item in results],
+            "count": len(results),
+            "offset": offset,
+            "limit": limit,
+            "query": data['query']
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Media search failed: {str(e)}"}), 500
+
+def _ingest_upload(store, tmp_path, digest, size, filename, content_type, title='', summary='', exif=None):
+    """Move a hashed temp file into the content store and record it.
+    
+    The compact EXIF record is stored in the item's metadata so handlers never
+    need to reparse the file. Returns ``(media_id, duplicate)``; duplicates
+    reuse the existing item.
+    """
+    try:
+        existing = store.get_media_by_content_hash(digest)
+    except Exception:
+        discard(tmp_path)
+        raise
+    if existing:
+        discard(tmp_path)
+        return str(existing['id']), True
+    
+    file_path = commit_to_store(tmp_path, digest, filename)
+    metadata = {
+        'title': title or filename,
+        'summary': summary or '',
+        'file_size': size,
+        'file_type': content_type,
+        'original_filename': filename,
+        'exif': exif if exif is not None else extract_exif_record(file_path)
+    }
+    media_id = store.add_media_item(
+        file_path=file_path,
+        metadata=metadata,
+        content_hash=digest,
+        file_size=size
+    )
+    return media_id, False
+
+def _wants_pregenerate(value):
+    return (value or os.getenv('PREGENERATE_RENDITIONS', 'false')).lower() in ('1', 'true', 'yes')
+
 @enhanced_bp.route('/api/media/upload', methods=['POST'])
 def upload_media():
     """Upload multiple media files with optional media file details."""
@@ -440,59 +598,166 @@ def upload_media():
         # Get media file details from form data
         media_file_name = request.form.get('media_file_name', '').strip()
         media_file_description = request.form.get('media_file_description', '').strip()
+        pregenerate = _wants_pregenerate(request.form.get('pregenerate'))
+        saved_paths = []
         
-        store = EnhancedDataStore()
+        store = get_store()
         uploaded_items = []
+        duplicates = []
+        staged = []
         
-        for file in files:
-            if file.filename == '':
-                continue
-                
-            # Check if file is an image
-            if not file.content_type or not file.content_type.startswith('image/'):
-                continue
+        try:
+            for file in files:
+                if file.filename == '':
+                    continue
+                    
+                # Check if file is an image
+                if not file.content_type or not file.content_type.startswith('image/'):
+                    continue
                 
-            # Create a safe filename
-            filename = file.filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_filename = f"{timestamp}_{filename}"
-            file_path = f"uploads/{safe_filename}"
-            
-            # Ensure uploads directory exists
-            os.makedirs('uploads', exist_ok=True)
+                # Hash while copying to a temp file, so the size is real and nothing is buffered in memory
+                tmp_path, digest, size = stream_to_temp(file.stream)
+                staged.append((file.filename, file.content_type, tmp_path, digest, size))
             
-            # Save the actual file to disk
-            file.save(file_path)
-            
-            # Add to database with media file details
-            metadata = {
-                'title': media_file_name if media_file_name else safe_filename,
-                'summary': media_file_description if media_file_description else '',
-                'file_size': len(file.read()),
-                'file_type': file.content_type,
-                'original_filename': filename
-            }
+            # Read EXIF headers for the whole batch in parallel
+            exif_records = extract_exif_batch([tmp_path for _, _, tmp_path, _, _ in staged])
             
-            # Reset file pointer for storage
-            file.seek(0)
-            
-            media_item = store.add_media_item(
-                file_path=file_path,
-                metadata=metadata
-            )
-            
-            uploaded_items.append(media_item)
+            for filename, content_type, tmp_path, digest, size in staged:
+                media_id, duplicate = _ingest_upload(
+                    store, tmp_path, digest, size, filename, content_type,
+                    media_file_name, media_file_description, exif=exif_records[tmp_path]
+                )
+                
+                if duplicate:
+                    duplicates.append({"filename": filename, "id": media_id})
+                    continue
+                
+                uploaded_items.append(media_id)
+                saved_paths.append(store.get_media_item(media_id)['file_path'])
+        finally:
+            # Committed files have already been moved; this only removes leftovers after an error
+            for _, _, tmp_path, _, _ in staged:
+                discard(tmp_path)
+        
+        # Warm gallery thumbnails so first views don't pay for resizing
+        if pregenerate and saved_paths:
+            pregenerate_in_background(saved_paths)
         
         return jsonify({
             "message": f"Successfully uploaded {len(uploaded_items)} files",
             "uploaded_items": uploaded_items,
+            "duplicates": duplicates,
             "media_file_name": media_file_name,
             "media_file_description": media_file_description
         }), 200
         
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 413
     except Exception as e:
         return jsonify({"error": f"Upload failed: {str(e)}"}), 500
 
+@enhanced_bp.route('/api/media/uploads', methods=['POST'])
+def create_resumable_upload():
+    """Start a resumable upload. Chunks are then sent with PATCH."""
+    try:
+        data = request.get_json() or {}
+        if not data.get('filename') or not data.get('size'):
+            return jsonify({"error": "Missing required fields: filename, size"}), 400
+        
+        content_type = data.get('content_type') or ''
+        if not content_type.startswith('image/'):
+            return jsonify({"error": "Only image uploads are supported"}), 400
+        
+        session = create_upload_session(
+            filename=data['filename'],
+            size=int(data['size']),
+            content_type=content_type,
+            metadata={
+                'media_file_name': data.get('media_file_name', '').strip(),
+                'media_file_description': data.get('media_file_description', '').strip(),
+                'pregenerate': str(data.get('pregenerate', ''))
+            }
+        )
+        return jsonify({"success": True, **session}), 201
+        
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to start upload: {str(e)}"}), 500
+
+@enhanced_bp.route('/api/media/uploads/<upload_id>', methods=['GET'])
+def get_resumable_upload(upload_id):
+    """Report how many bytes of a resumable upload have been received."""
+    try:
+        session = get_upload_session(upload_id)
+        if session is None:
+            return jsonify({"error": "Upload not found"}), 404
+        return jsonify({"success": True, **session}), 200
+        
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to get upload: {str(e)}"}), 500
+
+@enhanced_bp.route('/api/media/uploads/<upload_id>', methods=['PATCH'])
+def append_resumable_upload(upload_id):
+    """Append the request body at the ``Upload-Offset`` header.
+    
+    The final chunk completes the upload and returns the media item ID.
+    """
+    try:
+        offset = request.headers.get('Upload-Offset', type=int)
+        if offset is None:
+            return jsonify({"error": "Missing Upload-Offset header"}), 400
+        
+        try:
+            session = append_chunk(upload_id, offset, request.stream, length=request.content_length)
+        except KeyError:
+            return jsonify({"error": "Upload not found"}), 404
+        except UploadError as e:
+            current = get_upload_session(upload_id)
+            return jsonify({"error": str(e), "offset": current['offset'] if current else None}), 409
+        
+        if not session['complete']:
+            return jsonify({"success": True, "upload_id": upload_id,
+                            "offset": session['offset'], "size": session['size']}), 200
+        
+        session, tmp_path, digest, size = finish_upload_session(upload_id)
+        details = session['metadata']
+        store = get_store()
+        media_id, duplicate = _ingest_upload(
+            store, tmp_path, digest, size, session['filename'], session['content_type'],
+            details.get('media_file_name'), details.get('media_file_description')
+        )
+        
+        if not duplicate and _wants_pregenerate(details.get('pregenerate')):
+            pregenerate_in_background([store.get_media_item(media_id)['file_path']])
+        
+        return jsonify({
+            "success": True,
+            "upload_id": upload_id,
+            "offset": size,
+            "size": size,
+            "id": media_id,
+            "duplicate": duplicate
+        }), 201 if not duplicate else 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Upload failed: {str(e)}"}), 500
+
+@enhanced_bp.route('/api/media/uploads/<upload_id>', methods=['DELETE'])
+def abort_resumable_upload(upload_id):
+    """Abandon a resumable upload and delete its partial data."""
+    try:
+        if not abort_upload_session(upload_id):
+            return jsonify({"error": "Upload not found"}), 404
+        return jsonify({"success": True, "message": "Upload aborted"}), 200
+        
+    except UploadError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to abort upload: {str(e)}"}), 500
+
 @enhanced_bp.route('/api/media/<doc_id>/title', methods=['PUT'])
 def update_media_title(doc_id):
     """Update the title of a media item."""
@@ -500,7 +765,7 @@ def update_media_title(doc_id):
         data = request.get_json()
         title = data.get('title', '')
         
-        store = EnhancedDataStore()
+        store = get_store()
         success = store.update_media_item(doc_id, title=title)
         
         if success:
@@ -518,7 +783,7 @@ def update_media_summary(doc_id):
         data = request.get_json()
         summary = data.get('summary', '')
         
-        store = EnhancedDataStore()
+        store = get_store()
         success = store.update_media_item(doc_id, summary=summary)
         
         if success:
@@ -536,7 +801,7 @@ def update_media_tags(doc_id):
         data = request.get_json()
         tags = data if isinstance(data, list) else []
         
-        store = EnhancedDataStore()
+        store = get_store()
         success = store.update_media_item(doc_id, tags=tags)
         
         if success:
@@ -547,11 +812,34 @@ def update_media_tags(doc_id):
     except Exception as e:
         return jsonify({"error": f"Failed to update tags: {str(e)}"}), 500
 
+@enhanced_bp.route('/api/media/tags', methods=['GET'])
+def get_media_tag_counts():
+    """Tag cloud: every media tag with its photo count, most used first."""
+    try:
+        limit = request.args.get('limit', type=int)
+        store = get_store()
+        return jsonify({"success": True, "tags": store.tag_counts(limit=limit)}), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get tag counts: {str(e)}"}), 500
+
+@enhanced_bp.route('/api/media/tags/suggest', methods=['GET'])
+def suggest_media_tags():
+    """Autocomplete tags matching ``?q=``."""
+    try:
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        store = get_store()
+        suggestions = store.suggest_tags(request.args.get('q', ''), limit=limit)
+        return jsonify({"success": True, "tags": suggestions}), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to suggest tags: {str(e)}"}), 500
+
 @enhanced_bp.route('/api/media/<doc_id>', methods=['DELETE'])
 def delete_media_item(doc_id):
     """Delete a media item."""
     try:
-        store = EnhancedDataStore()
+        store = get_store()
         success = store.delete_media_item(doc_id)
         
         if success:
@@ -566,7 +854,7 @@ def delete_media_item(doc_id):
 def get_media_contexts(doc_id):
     """Get all context entries for a media item."""
     try:
-        store = EnhancedDataStore()
+        store = get_store()
         contexts = store.get_contexts(doc_id)
         return jsonify(contexts), 200
     except Exception as e:
@@ -582,7 +870,7 @@ def add_media_context(doc_id):
         if not text:
             return jsonify({"error": "Text is required"}), 400
         
-        store = EnhancedDataStore()
+        store = get_store()
         context_id = store.add_context(doc_id, text)
         
         return jsonify({"id": context_id}), 201
@@ -599,7 +887,7 @@ def update_media_context(doc_id, context_id):
         if not text:
             return jsonify({"error": "Text is required"}), 400
         
-        store = EnhancedDataStore()
+        store = get_store()
         success = store.update_context(doc_id, context_id, text)
         
         if success:
@@ -614,7 +902,7 @@ def update_media_context(doc_id, context_id):
 def delete_media_context(doc_id, context_id):
     """Delete a context entry for a media item."""
     try:
-        store = EnhancedDataStore()
+        store = get_store()
         success = store.delete_context(doc_id, context_id)
         
         if success:
@@ -629,7 +917,7 @@ def delete_media_context(doc_id, context_id):
 def start_interview(doc_id):
     """Start an AI interview for a media item."""
     try:
-        store = EnhancedDataStore()
+        store = get_store()
         # This would integrate with your interview bot
         # For now, return a placeholder response
         return jsonify({
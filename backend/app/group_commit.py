@@ -0,0 +1,128 @@
+"""
+Group commit for small database writes.
+
+Writes submitted from any thread are queued and a single committer thread
+applies them in batches: a batch closes ``max_delay_ms`` after its first write
+or once it holds ``max_ops`` writes, and is committed as one transaction. A
+burst of tiny writes (one context per interview turn, say) then costs one
+commit and one WAL flush instead of one each.
+
+The committer knows nothing about the database: ``run_batch`` receives the
+queued callables, runs them inside one transaction and returns an
+``(ok, value_or_exception)`` pair per callable once the transaction has
+committed. If ``run_batch`` itself raises (the commit failed), every write in
+the batch fails with that exception.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+_STOP = object()
+
+class GroupCommitter:
+    def __init__(self, run_batch: Callable[[List[Callable]], List[Tuple[bool, object]]],
+                 max_delay_ms: float = 5.0, max_ops: int = 64, max_pending: int = None):
+        self._run_batch = run_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.max_ops = max_ops
+        # Bounded so write-behind callers are slowed down rather than piling up unbounded work
+        self._queue = queue.Queue(maxsize=max_pending or max_ops * 16)
+        # Orders submits against close() so nothing is queued behind _STOP
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._stats = {"ops": 0, "batches": 0, "failed_ops": 0, "failed_batches": 0, "max_batch": 0}
+        self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable) -> Future:
+        """Queue ``fn`` for the next group commit. The future resolves after the commit."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("GroupCommitter is closed")
+            self._queue.put((fn, future))
+        return future
+
+    def flush(self, timeout: float = None):
+        """Block until everything submitted so far has been committed."""
+        try:
+            future = self.submit(lambda: None)
+        except RuntimeError:
+            # Closed: close() already committed everything it accepted
+            return
+        future.result(timeout)
+
+    def close(self, timeout: float = None):
+        """Commit what is queued, then stop the committer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize()
+        stats["avg_batch"] = stats["ops"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_ops:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+        self._fail_pending()
+
+    def _fail_pending(self):
+        """Fail anything still queued once the committer stops, so no caller waits forever."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                item[1].set_exception(RuntimeError("GroupCommitter is closed"))
+
+    def _commit(self, batch):
+        try:
+            results = self._run_batch([fn for fn, _ in batch])
+        except Exception as e:
+            results = [(False, e)] * len(batch)
+            batch_failed = True
+        else:
+            batch_failed = False
+
+        failed = 0
+        for (_, future), (ok, value) in zip(batch, results):
+            if ok:
+                future.set_result(value)
+            else:
+                failed += 1
+                future.set_exception(value)
+
+        with self._stats_lock:
+            self._stats["ops"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["failed_ops"] += failed
+            self._stats["failed_batches"] += int(batch_failed)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
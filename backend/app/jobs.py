@@ -0,0 +1,227 @@
+"""
+Background job queue persisted in PostgreSQL.
+
+Slow work (e.g. AI enrichment of transcripts) is recorded in the ``jobs``
+table and picked up by in-process worker threads, so HTTP handlers can return
+immediately. Failed jobs are retried with exponential backoff.
+
+A claimed job holds a lease (``locked_until``) that its worker renews while
+the handler runs. A job whose lease has expired - its process crashed or was
+killed - is claimed again by any worker, so other live processes sharing the
+table never pick up a job that is still running.
+"""
+
+import json
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from psycopg2.extras import RealDictCursor
+
+# How long a claimed job stays reserved without a heartbeat from its worker
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '300'))
+
+# job_type -> handler(store, payload) -> result dict
+JOB_HANDLERS: Dict[str, Callable[[Any, Dict[str, Any]], Optional[Dict[str, Any]]]] = {}
+
+def job_handler(job_type: str):
+    """Register a function as the handler for ``job_type``."""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+_shared_queue = None
+_shared_queue_lock = threading.Lock()
+
+def get_job_queue() -> 'JobQueue':
+    """Return the process-wide job queue, starting its workers on first use."""
+    global _shared_queue
+    if _shared_queue is None:
+        with _shared_queue_lock:
+            if _shared_queue is None:
+                from app.enhanced_data_store import get_store
+                queue = JobQueue(get_store(), num_workers=int(os.getenv('JOB_WORKERS', '2')))
+                queue.start()
+                _shared_queue = queue
+    return _shared_queue
+
+class JobQueue:
+    def __init__(self, store, num_workers: int = 2, poll_interval: float = 5.0,
+                 base_retry_delay: float = 2.0, max_retry_delay: float = 300.0,
+                 lease_seconds: float = None):
+        self.store = store
+        self.lease_seconds = JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.base_retry_delay = base_retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        self._init_schema()
+
+    def _init_schema(self):
+        """Create the jobs table."""
+        with self.store._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id UUID PRIMARY KEY,
+                    job_type VARCHAR(100) NOT NULL,
+                    payload JSONB NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 5,
+                    last_error TEXT,
+                    result JSONB,
+                    run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP")
+            cursor.execute("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS lease_token UUID")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs(run_after) WHERE status = 'queued'")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_leases ON jobs(locked_until) WHERE status = 'running'")
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], max_attempts: int = 5) -> str:
+        """Persist a new job and wake a worker. Returns the job ID."""
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+
+        job_id = str(uuid.uuid4())
+        with self.store._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO jobs (id, job_type, payload, max_attempts)
+                VALUES (%s, %s, %s, %s)
+            """, (job_id, job_type, json.dumps(payload), max_attempts))
+
+        self._wakeup.set()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's status, attempts, error and result."""
+        with self.store._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT id, job_type, status, attempts, max_attempts, last_error, result,
+                       run_after, created_at, updated_at
+                FROM jobs WHERE id = %s
+            """, (job_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def start(self):
+        """Start the worker threads. Interrupted jobs are reclaimed once their lease expires."""
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        """Ask workers to exit after their current job."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_pending(self) -> int:
+        """Run queued jobs on the calling thread until none are due. Returns the count."""
+        count = 0
+        while self._run_next():
+            count += 1
+        return count
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                if self._run_next():
+                    continue
+            except Exception as e:
+                print(f"Job worker error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _run_next(self) -> bool:
+        """Claim and run one due job. Returns False when nothing was due."""
+        job = self._claim()
+        if job is None:
+            return False
+
+        handler = JOB_HANDLERS.get(job['job_type'])
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, heartbeat_stop),
+                                     name=f"job-heartbeat-{job['id']}", daemon=True)
+        heartbeat.start()
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job type '{job['job_type']}'")
+            result = handler(self.store, self.store._load_json(job['payload']))
+        except Exception as e:
+            self._fail(job, e)
+        else:
+            with self.store._connection() as conn, conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE jobs SET status = 'done', result = %s, last_error = NULL,
+                                    locked_until = NULL, lease_token = NULL,
+                                    updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s AND lease_token = %s
+                """, (json.dumps(result or {}, default=str), job['id'], job['lease_token']))
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+        return True
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically lease the oldest due job: a queued one, or a running one whose lease expired."""
+        with self.store._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                                lease_token = %s,
+                                locked_until = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                                updated_at = CURRENT_TIMESTAMP
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE (status = 'queued' AND run_after <= CURRENT_TIMESTAMP)
+                       OR (status = 'running' AND (locked_until IS NULL OR locked_until < CURRENT_TIMESTAMP))
+                    ORDER BY run_after
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, job_type, payload, attempts, max_attempts, lease_token
+            """, (str(uuid.uuid4()), self.lease_seconds))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def _heartbeat(self, job: Dict[str, Any], stop: threading.Event):
+        """Renew the job's lease until ``stop`` is set."""
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                with self.store._connection() as conn, conn.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE jobs SET locked_until = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                        WHERE id = %s AND lease_token = %s
+                    """, (self.lease_seconds, job['id'], job['lease_token']))
+            except Exception as e:
+                print(f"Job {job['id']} heartbeat failed: {e}")
+
+    def _fail(self, job: Dict[str, Any], error: Exception):
+        """Schedule a retry with exponential backoff, or mark the job failed."""
+        print(f"Job {job['id']} ({job['job_type']}) attempt {job['attempts']} failed: {error}")
+
+        if job['attempts'] >= job['max_attempts']:
+            status, delay = 'failed', 0
+        else:
+            delay = min(self.base_retry_delay * 2 ** (job['attempts'] - 1), self.max_retry_delay)
+            status = 'queued'
+
+        with self.store._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE jobs SET status = %s, last_error = %s,
+                                run_after = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                                locked_until = NULL, lease_token = NULL,
+                                updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND lease_token = %s
+            """, (status, str(error), delay, job['id'], job['lease_token']))
@@ -0,0 +1,325 @@
+"""
+Incremental media library sync.
+
+The media table doubles as the manifest: each row records the file's path,
+size, mtime and SHA-256. A sync lists the source (a local directory tree via
+``os.scandir``, or an object-storage listing), diffs it against the manifest
+with set operations in one pass, and applies the adds, updates, moves and
+deletes as batched database operations. Only new or changed files are read;
+unchanged files cost one ``stat``. A renamed or moved file keeps its media ID
+(and so its contexts, summary and tags) because it is matched by content hash.
+
+``LibrarySync.watch`` keeps a directory in sync, using inotify through the
+optional ``watchdog`` package when it is installed and polling otherwise.
+"""
+
+import hashlib
+import mimetypes
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.heic', '.tif', '.tiff')
+
+# Refuse to delete more than this share of a non-trivial library in one sync,
+# so an unmounted drive or empty bucket listing doesn't wipe everyone's stories
+MAX_DELETE_FRACTION = float(os.getenv('SYNC_MAX_DELETE_FRACTION', '0.5'))
+
+class SyncError(RuntimeError):
+    pass
+
+class FileEntry(NamedTuple):
+    path: str
+    size: Optional[int] = None
+    mtime_ns: Optional[int] = None
+    content_hash: Optional[str] = None
+    media_id: Optional[str] = None
+
+class SyncDiff(NamedTuple):
+    added: List[FileEntry]
+    updated: List[Tuple[FileEntry, FileEntry]]  # (manifest entry, current entry)
+    moved: List[Tuple[FileEntry, FileEntry]]    # (manifest entry, current entry)
+    deleted: List[FileEntry]
+    unchanged: int
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.updated or self.moved or self.deleted)
+
+    def summary(self) -> Dict[str, int]:
+        return {"added": len(self.added), "updated": len(self.updated), "moved": len(self.moved),
+                "deleted": len(self.deleted), "unchanged": self.unchanged}
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_directory(root: str, extensions: Iterable[str] = IMAGE_EXTENSIONS) -> Dict[str, FileEntry]:
+    """List media files under ``root`` (recursively) with size and mtime, without reading them."""
+    extensions = tuple(ext.lower() for ext in extensions)
+    listing = {}
+    pending = [os.path.abspath(root)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.lower().endswith(extensions):
+                    stat = entry.stat()
+                    listing[entry.path] = FileEntry(entry.path, stat.st_size, stat.st_mtime_ns)
+    return listing
+
+def object_listing(objects: Iterable) -> Dict[str, FileEntry]:
+    """
+    Build a listing from object-storage entries: names, or objects with
+    ``name`` and optional ``size`` / ``updated`` (e.g. GCS blobs).
+
+    Object-store checksums are not SHA-256, so entries carry no content hash
+    and moves show up as an add plus a delete.
+    """
+    listing = {}
+    for obj in objects:
+        if isinstance(obj, str):
+            listing[obj] = FileEntry(obj)
+            continue
+        updated = getattr(obj, 'updated', None)
+        mtime_ns = int(updated.timestamp() * 1_000_000_000) if isinstance(updated, datetime) else None
+        listing[obj.name] = FileEntry(obj.name, getattr(obj, 'size', None), mtime_ns)
+    return listing
+
+def manifest_listing(rows: Iterable[Dict]) -> Dict[str, FileEntry]:
+    """Build a listing from EnhancedDataStore.media_manifest rows."""
+    return {row['file_path']: FileEntry(row['file_path'], row.get('file_size'), row.get('file_mtime_ns'),
+                                        (row.get('content_hash') or '').strip() or None, str(row['id']))
+            for row in rows}
+
+def _changed(old: FileEntry, new: FileEntry) -> bool:
+    # Entries without size/mtime (e.g. bare object names) can only be compared by presence
+    if new.size is None and new.mtime_ns is None:
+        return False
+    return (old.size, old.mtime_ns) != (new.size, new.mtime_ns)
+
+def diff_listings(previous: Dict[str, FileEntry], current: Dict[str, FileEntry],
+                  hasher: Optional[Callable[[str], str]] = None) -> SyncDiff:
+    """
+    Diff a manifest against a fresh listing.
+
+    ``hasher`` (e.g. sha256_file) is only called for added and changed paths;
+    their hashes are used to recognise moves and are stored by the sync.
+    """
+    previous_paths, current_paths = previous.keys(), current.keys()
+    added_paths = current_paths - previous_paths
+    deleted_paths = previous_paths - current_paths
+    changed_paths = {path for path in current_paths & previous_paths
+                     if _changed(previous[path], current[path])}
+
+    def hashed(path):
+        entry = current[path]
+        if hasher is None or entry.content_hash:
+            return entry
+        try:
+            return entry._replace(content_hash=hasher(path))
+        except OSError:
+            return entry
+
+    added = {path: hashed(path) for path in sorted(added_paths)}
+    updated = [(previous[path], hashed(path)._replace(media_id=previous[path].media_id))
+               for path in sorted(changed_paths)]
+
+    # A deleted path and an added path with the same content is a move
+    deleted_by_hash = {}
+    for path in sorted(deleted_paths):
+        entry = previous[path]
+        if entry.content_hash:
+            deleted_by_hash.setdefault(entry.content_hash, entry)
+    moved = []
+    for path, entry in list(added.items()):
+        old = deleted_by_hash.pop(entry.content_hash, None) if entry.content_hash else None
+        if old is not None:
+            moved.append((old, entry._replace(media_id=old.media_id)))
+            del added[path]
+    moved_from = {old.path for old, _ in moved}
+
+    return SyncDiff(
+        added=list(added.values()),
+        updated=updated,
+        moved=moved,
+        deleted=[previous[path] for path in sorted(deleted_paths) if path not in moved_from],
+        unchanged=len(current_paths & previous_paths) - len(changed_paths),
+    )
+
+def check_mass_delete(deleted: int, manifest_size: int, where: str,
+                      max_delete_fraction: Optional[float] = None):
+    """Raise SyncError if ``deleted`` is a suspiciously large share of ``manifest_size`` items."""
+    fraction = MAX_DELETE_FRACTION if max_delete_fraction is None else max_delete_fraction
+    if manifest_size >= 10 and deleted > manifest_size * fraction:
+        raise SyncError(
+            f"Refusing to delete {deleted} of {manifest_size} items {where}; "
+            f"is the directory mounted? Re-run with allow_mass_delete to proceed."
+        )
+
+def is_local_path(path: Optional[str], local_roots: Iterable[str] = ()) -> bool:
+    """True for absolute paths and paths under ``local_roots``.
+
+    Everything else in the media table (object-storage names, transcript
+    placeholder cards) has no local file to check.
+    """
+    if not path:
+        return False
+    if os.path.isabs(path):
+        return True
+    path = os.path.abspath(path)
+    return any(path.startswith(os.path.abspath(root) + os.sep) for root in local_roots)
+
+class LibrarySync:
+    """Keep the media rows under one directory in step with the files on disk."""
+
+    def __init__(self, store, root: str, extensions: Iterable[str] = IMAGE_EXTENSIONS,
+                 max_delete_fraction: Optional[float] = None):
+        self.store = store
+        self.root = os.path.abspath(root)
+        self.extensions = tuple(extensions)
+        self.max_delete_fraction = MAX_DELETE_FRACTION if max_delete_fraction is None else max_delete_fraction
+        # New files whose content already belongs to another item: path -> entry when last seen
+        self._duplicates: Dict[str, FileEntry] = {}
+
+    def diff(self) -> Tuple[SyncDiff, int]:
+        """Return the pending diff and the manifest size.
+
+        Files found to duplicate an existing item are left out until their
+        size or mtime changes, rather than being re-hashed on every pass.
+        """
+        manifest = manifest_listing(self.store.media_manifest(prefix=self.root + os.sep))
+        listing = scan_directory(self.root, self.extensions)
+        self._duplicates = {path: entry for path, entry in self._duplicates.items()
+                            if path in listing and path not in manifest
+                            and (listing[path].size, listing[path].mtime_ns) == (entry.size, entry.mtime_ns)}
+        for path in self._duplicates:
+            del listing[path]
+        return diff_listings(manifest, listing, hasher=sha256_file), len(manifest)
+
+    def check_deletes(self, diff: SyncDiff, manifest_size: int):
+        """Raise SyncError if the diff would delete a suspiciously large share of the library."""
+        check_mass_delete(len(diff.deleted), manifest_size, f"under {self.root}", self.max_delete_fraction)
+
+    def apply(self, diff: SyncDiff, manifest_size: int = 0, allow_mass_delete: bool = False) -> Dict[str, int]:
+        """Write a diff to the database with batched operations."""
+        from image_metadata import extract_exif_batch
+
+        if not allow_mass_delete:
+            self.check_deletes(diff, manifest_size)
+
+        # Only new and changed files are parsed, in parallel
+        records = extract_exif_batch([entry.path for entry in diff.added] +
+                                     [new.path for _, new in diff.updated])
+
+        counts = diff.summary()
+        if diff.added:
+            media_ids = self.store.add_media_items_bulk([{
+                'file_path': entry.path,
+                'content_hash': entry.content_hash,
+                'file_size': entry.size,
+                'file_mtime_ns': entry.mtime_ns,
+                'metadata': {
+                    'title': os.path.splitext(os.path.basename(entry.path))[0],
+                    'file_type': mimetypes.guess_type(entry.path)[0],
+                    'file_size': entry.size,
+                    'exif': records.get(entry.path),
+                },
+            } for entry in diff.added])
+            duplicates = [entry for entry, media_id in zip(diff.added, media_ids) if media_id is None]
+            self._duplicates.update((entry.path, entry) for entry in duplicates)
+            counts['duplicates'] = len(duplicates)
+
+        file_updates = {}
+        for old, new in diff.updated:
+            file_updates[old.media_id] = {'file_size': new.size, 'file_mtime_ns': new.mtime_ns,
+                                          'content_hash': new.content_hash,
+                                          'metadata': {'exif': records.get(new.path)}}
+        for old, new in diff.moved:
+            file_updates[old.media_id] = {'file_path': new.path, 'file_size': new.size,
+                                          'file_mtime_ns': new.mtime_ns}
+        if file_updates:
+            self.store.update_media_files_bulk(file_updates)
+
+        if diff.deleted:
+            self.store.delete_media_items_bulk([entry.media_id for entry in diff.deleted])
+            # A deleted item may have been the original of a skipped duplicate
+            self._duplicates.clear()
+        return counts
+
+    def sync(self, dry_run: bool = False, allow_mass_delete: bool = False) -> Tuple[SyncDiff, Dict[str, int]]:
+        """Diff the directory against the manifest and apply it (unless ``dry_run``)."""
+        diff, manifest_size = self.diff()
+        if dry_run or diff.is_empty():
+            return diff, diff.summary()
+        return diff, self.apply(diff, manifest_size, allow_mass_delete)
+
+    def watch(self, debounce: float = 2.0, poll_interval: float = 30.0,
+              stop_event: Optional[threading.Event] = None, on_sync: Optional[Callable] = None):
+        """
+        Sync now, then again whenever files change, until ``stop_event`` is set.
+
+        Uses inotify (via watchdog) when available; bursts of events within
+        ``debounce`` seconds are coalesced into one sync. Without watchdog the
+        directory is rescanned every ``poll_interval`` seconds. A failed sync
+        is logged and retried after ``poll_interval`` seconds.
+        """
+        stop_event = stop_event or threading.Event()
+        dirty = threading.Event()
+        observer = None
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+
+            class _Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    dirty.set()
+
+            observer = Observer()
+            observer.schedule(_Handler(), self.root, recursive=True)
+            observer.start()
+        except ImportError:
+            print(f"watchdog not installed; polling {self.root} every {poll_interval}s")
+
+        dirty.set()
+        try:
+            while not stop_event.is_set():
+                if observer is None:
+                    dirty.set()
+                elif not dirty.wait(timeout=1.0):
+                    continue
+                # Let a burst of file events settle before scanning
+                while observer is not None and dirty.is_set() and not stop_event.is_set():
+                    dirty.clear()
+                    stop_event.wait(debounce)
+                dirty.clear()
+                if stop_event.is_set():
+                    break
+                try:
+                    diff, counts = self.sync()
+                    if on_sync:
+                        on_sync(diff, counts)
+                except SyncError as e:
+                    print(f"Sync skipped: {e}")
+                except Exception as e:
+                    # e.g. the database is briefly unreachable; keep watching
+                    print(f"Sync of {self.root} failed, retrying in {poll_interval}s: {type(e).__name__}: {e}")
+                    if observer is not None:
+                        stop_event.wait(poll_interval)
+                        dirty.set()
+                if observer is None:
+                    stop_event.wait(poll_interval)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
@@ -0,0 +1,318 @@
+"""
+SQLite-backed local context store.
+
+Implements the local half of the data_access interface (contexts, summaries
+and tags keyed by image name). It replaces the TinyDB ``local_contexts.json``
+file, which was rewritten in full on every update and could be left truncated
+by a crash mid-write. Here every write is a small SQLite transaction in WAL
+mode, so an interrupted write rolls back instead of corrupting the file, and
+bulk operations (clearing summaries or tags for many images) run as one
+statement batch in one transaction.
+
+Existing data is imported once with ``python import_local_contexts.py``.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH", "local_contexts.sqlite")
+
+# FULL fsyncs every commit; NORMAL is faster but may lose the last commits on power loss
+LOCAL_DB_SYNCHRONOUS = os.getenv("LOCAL_DB_SYNCHRONOUS", "FULL").upper()
+
+SUMMARY_FIELDS = ('summary', 'summary_title', 'summary_summary', 'summary_description')
+
+class LocalContextStore:
+    """Contexts, structured summaries and tags per image, in one SQLite file."""
+
+    def __init__(self, db_path=None, synchronous=None):
+        self.db_path = db_path or LOCAL_DB_PATH
+        synchronous = (synchronous or LOCAL_DB_SYNCHRONOUS).upper()
+        if synchronous not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+            raise ValueError(f"Invalid synchronous mode: {synchronous}")
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS images (
+                    image_name TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL DEFAULT '',
+                    summary_title TEXT NOT NULL DEFAULT '',
+                    summary_summary TEXT NOT NULL DEFAULT '',
+                    summary_description TEXT NOT NULL DEFAULT '',
+                    tags TEXT NOT NULL DEFAULT '[]',
+                    updated_at TEXT
+                );
+                CREATE TABLE IF NOT EXISTS contexts (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    image_name TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    created_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_contexts_image_name ON contexts(image_name, seq);
+            """)
+
+    def _ensure_image(self, image_name):
+        self._conn.execute("INSERT OR IGNORE INTO images (image_name) VALUES (?)", (image_name,))
+
+    def _image(self, image_name) -> Optional[sqlite3.Row]:
+        return self._conn.execute("SELECT * FROM images WHERE image_name = ?", (image_name,)).fetchone()
+
+    # Contexts
+
+    def get_contexts(self, image_name) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, text, created_at FROM contexts WHERE image_name = ? ORDER BY seq", (image_name,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def add_context(self, image_name, text) -> Dict:
+        context = {"id": str(uuid.uuid4()), "text": text, "created_at": datetime.now().isoformat()}
+        with self._lock, self._conn:
+            self._ensure_image(image_name)
+            self._conn.execute(
+                "INSERT INTO contexts (id, image_name, text, created_at) VALUES (?, ?, ?, ?)",
+                (context["id"], image_name, text, context["created_at"])
+            )
+        return context
+
+    def update_context(self, image_name, context_id, text) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE contexts SET text = ? WHERE image_name = ? AND id = ?", (text, image_name, context_id)
+            )
+        return cursor.rowcount > 0
+
+    def delete_context(self, image_name, context_id) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM contexts WHERE image_name = ? AND id = ?", (image_name, context_id)
+            )
+        return cursor.rowcount > 0
+
+    def clear_all_contexts(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM contexts")
+
+    # Summaries
+
+    def get_summary(self, image_name) -> str:
+        with self._lock:
+            row = self._image(image_name)
+        return row['summary'] if row else ''
+
+    def set_summary(self, image_name, summary):
+        self.set_structured_summary(image_name, summary)
+
+    def get_structured_summary(self, image_name) -> Dict[str, str]:
+        with self._lock:
+            row = self._image(image_name)
+        return {field: row[field] if row else '' for field in SUMMARY_FIELDS}
+
+    def set_structured_summary(self, image_name, summary, title=None, summary_text=None, description=None):
+        """Set the raw summary and, where given, its parsed title, text and description."""
+        values = dict(zip(SUMMARY_FIELDS, (summary, title, summary_text, description)))
+        values = {field: value for field, value in values.items() if value is not None}
+        assignments = ", ".join(f"{field} = :{field}" for field in values)
+        with self._lock, self._conn:
+            self._ensure_image(image_name)
+            self._conn.execute(
+                f"UPDATE images SET {assignments}, updated_at = :now WHERE image_name = :image_name",
+                dict(values, image_name=image_name, now=datetime.now().isoformat())
+            )
+
+    def clear_all_summaries(self) -> int:
+        """Blank every summary in one statement. Returns the number of images cleared."""
+        assignments = ", ".join(f"{field} = ''" for field in SUMMARY_FIELDS)
+        conditions = " OR ".join(f"{field} != ''" for field in SUMMARY_FIELDS)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE images SET {assignments}, updated_at = ? WHERE {conditions}", (datetime.now().isoformat(),)
+            )
+        return cursor.rowcount
+
+    # Tags
+
+    def get_tags(self, image_name) -> List[str]:
+        with self._lock:
+            row = self._image(image_name)
+        return json.loads(row['tags']) if row else []
+
+    def set_tags(self, image_name, tags):
+        self.set_tags_bulk({image_name: tags})
+
+    def set_tags_bulk(self, tags_by_image: Dict[str, Iterable[str]]):
+        """Replace the tags of several images in one transaction."""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO images (image_name, tags, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(image_name) DO UPDATE SET tags = excluded.tags, updated_at = excluded.updated_at",
+                [(image_name, json.dumps(list(tags or [])), now) for image_name, tags in tags_by_image.items()]
+            )
+
+    def clear_tags(self, image_names: Iterable[str]):
+        self.set_tags_bulk({image_name: [] for image_name in image_names})
+
+    def load_all_tags(self) -> Dict[str, List[str]]:
+        """``{image_name: tags}`` for every tagged image."""
+        with self._lock:
+            rows = self._conn.execute("SELECT image_name, tags FROM images WHERE tags != '[]'").fetchall()
+        return {row['image_name']: json.loads(row['tags']) for row in rows}
+
+    # Import
+
+    def import_tinydb_json(self, json_path) -> Dict[str, int]:
+        """
+        Import a TinyDB ``local_contexts.json`` in one transaction.
+
+        Reads the app's ``_default`` table and the ``media_items``/``contexts``
+        tables written by fix_database.py and extract_real_data_v2.py. Images
+        already in SQLite keep their summaries and tags (they may have been
+        edited since), and only contexts not imported before are added, so
+        re-running is safe. Contexts without an ID get one derived from the
+        image name, position and text.
+
+        Raises ValueError if the file is not valid JSON (recover it first with
+        fix_database.py) or holds data in tables this import doesn't read.
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{json_path} is not valid JSON ({e}); recover it with fix_database.py first")
+
+        records = _tinydb_records(data)
+        if not records:
+            unread = sorted(table for table, rows in data.items() if rows and table not in TINYDB_TABLES)
+            if unread:
+                raise ValueError(f"{json_path} has no image records but data in {', '.join(unread)}")
+
+        counts = {"images": 0, "existing": 0, "contexts": 0, "skipped": 0}
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            for record in records:
+                image_name = record.get('image_name')
+                if not image_name:
+                    counts["skipped"] += 1
+                    continue
+                values = {field: record.get(field) or '' for field in SUMMARY_FIELDS}
+                cursor = self._conn.execute(
+                    "INSERT INTO images (image_name, summary, summary_title, summary_summary, summary_description, "
+                    "tags, updated_at) VALUES (:image_name, :summary, :summary_title, :summary_summary, "
+                    ":summary_description, :tags, :now) ON CONFLICT(image_name) DO NOTHING",
+                    dict(values, image_name=image_name, tags=json.dumps(record.get('tags') or []), now=now)
+                )
+                counts["images" if cursor.rowcount else "existing"] += 1
+
+                for index, context in enumerate(record.get('contexts') or []):
+                    if isinstance(context, str):
+                        context = {"text": context}
+                    if not context.get('text'):
+                        continue
+                    context_id = context.get('id') or uuid.uuid5(
+                        uuid.NAMESPACE_URL, f"{image_name}/{index}/{context['text']}")
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO contexts (id, image_name, text, created_at) VALUES (?, ?, ?, ?)",
+                        (str(context_id), image_name, context['text'], context.get('created_at') or now)
+                    )
+                    counts["contexts"] += cursor.rowcount
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# TinyDB tables read by import_tinydb_json (``links`` holds nothing per image)
+TINYDB_TABLES = ('_default', 'media_items', 'contexts', 'links')
+
+def _tinydb_records(data) -> List[Dict]:
+    """
+    Image records from a TinyDB file, in the ``_default`` table's shape.
+
+    Recovered files keep images in ``media_items`` (title/description rather
+    than summary_title/summary_description) and their contexts in a
+    ``contexts`` table under the same document ID.
+    """
+    records = list((data.get('_default') or {}).values())
+    contexts = data.get('contexts') or {}
+    for doc_id, item in (data.get('media_items') or {}).items():
+        file_path = item.get('file_path') or ''
+        title = item.get('title') or ''
+        records.append({
+            'image_name': item.get('image_name') or item.get('filename') or os.path.basename(file_path),
+            'summary': item.get('summary'),
+            'summary_title': title if title != item.get('filename') else '',
+            'summary_description': item.get('description'),
+            'tags': item.get('tags'),
+            'contexts': contexts.get(doc_id) or [],
+        })
+    return records
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_local_store() -> LocalContextStore:
+    """Return the process-wide LocalContextStore, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LocalContextStore()
+    return _store
+
+def get_contexts(image_name):
+    return get_local_store().get_contexts(image_name)
+
+def add_context(image_name, text):
+    return get_local_store().add_context(image_name, text)
+
+def update_context(image_name, context_id, text):
+    return get_local_store().update_context(image_name, context_id, text)
+
+def delete_context(image_name, context_id):
+    return get_local_store().delete_context(image_name, context_id)
+
+def clear_all_contexts():
+    get_local_store().clear_all_contexts()
+
+def get_summary(image_name):
+    return get_local_store().get_summary(image_name)
+
+def set_summary(image_name, summary):
+    get_local_store().set_summary(image_name, summary)
+
+def get_structured_summary(image_name):
+    return get_local_store().get_structured_summary(image_name)
+
+def set_structured_summary(image_name, summary, title=None, summary_text=None, description=None):
+    get_local_store().set_structured_summary(image_name, summary, title, summary_text, description)
+
+def clear_all_summaries():
+    return get_local_store().clear_all_summaries()
+
+def get_tags(image_name):
+    return get_local_store().get_tags(image_name)
+
+def set_tags(image_name, tags):
+    get_local_store().set_tags(image_name, tags)
+
+def set_tags_bulk(tags_by_image):
+    get_local_store().set_tags_bulk(tags_by_image)
+
+def clear_tags(image_names):
+    get_local_store().clear_tags(image_names)
+
+def load_all_tags():
+    return get_local_store().load_all_tags()
@@ -0,0 +1,127 @@
+"""
+Resized image renditions with a content-addressed on-disk cache.
+
+Renditions are keyed by the SHA-256 of the original file plus the requested
+size and format, so a changed upload never serves a stale thumbnail and an
+unchanged one is only resized once.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+RENDITION_CACHE_DIR = os.getenv('RENDITION_CACHE_DIR', './renditions')
+
+# Requested format -> (Pillow format, MIME type, file extension)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'image/webp', 'webp'),
+    'jpeg': ('JPEG', 'image/jpeg', 'jpg'),
+    'jpg': ('JPEG', 'image/jpeg', 'jpg'),
+}
+
+MAX_RENDITION_SIZE = 4096
+
+# Gallery tile sizes warmed at upload time
+DEFAULT_PREGENERATE = [(200, 200, 'webp'), (400, 400, 'webp'), (1024, 1024, 'jpeg')]
+
+_fingerprints = OrderedDict()
+_fingerprints_lock = threading.Lock()
+_FINGERPRINT_CACHE_SIZE = 4096
+
+def file_fingerprint(path: str) -> str:
+    """Return the SHA-256 of a file, memoised on (path, size, mtime)."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    with _fingerprints_lock:
+        digest = _fingerprints.get(key)
+        if digest is not None:
+            _fingerprints.move_to_end(key)
+            return digest
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    digest = sha256.hexdigest()
+
+    with _fingerprints_lock:
+        _fingerprints[key] = digest
+        while len(_fingerprints) > _FINGERPRINT_CACHE_SIZE:
+            _fingerprints.popitem(last=False)
+    return digest
+
+def parse_rendition_args(width, height, fmt) -> Tuple[Optional[int], Optional[int], str]:
+    """Validate rendition query arguments, raising ValueError on bad input."""
+    fmt = (fmt or 'jpeg').lower()
+    if fmt not in RENDITION_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}', use one of: webp, jpeg")
+    for name, value in (('w', width), ('h', height)):
+        if value is not None and not 0 < value <= MAX_RENDITION_SIZE:
+            raise ValueError(f"{name} must be between 1 and {MAX_RENDITION_SIZE}")
+    return width, height, fmt
+
+def rendition_mimetype(fmt: str) -> str:
+    return RENDITION_FORMATS[fmt][1]
+
+def get_rendition(source_path: str, width: Optional[int] = None, height: Optional[int] = None,
+                  fmt: str = 'jpeg', cache_dir: str = None) -> Tuple[str, str]:
+    """Return ``(rendition_path, etag)`` for a resized copy of ``source_path``.
+
+    The rendition is generated on first request and reused from the cache
+    afterwards. The aspect ratio is preserved and images are never upscaled.
+    """
+    cache_dir = cache_dir or RENDITION_CACHE_DIR
+    pil_format, _, extension = RENDITION_FORMATS[fmt]
+    digest = file_fingerprint(source_path)
+    etag = f"{digest[:32]}-{width or 0}x{height or 0}.{extension}"
+    rendition_path = os.path.join(cache_dir, digest[:2], etag)
+
+    if os.path.exists(rendition_path):
+        return rendition_path, etag
+
+    os.makedirs(os.path.dirname(rendition_path), exist_ok=True)
+    with Image.open(source_path) as img:
+        target = (width or MAX_RENDITION_SIZE, height or MAX_RENDITION_SIZE)
+        # Let the JPEG decoder downscale by a power of two before the real resize
+        img.draft('RGB', target)
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(target, Image.LANCZOS)
+        if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+
+        # Write to a temp file and rename so readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(rendition_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, format=pil_format, quality=82)
+            os.replace(tmp_path, rendition_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    return rendition_path, etag
+
+def pregenerate_renditions(source_path: str, renditions: Iterable[Tuple[int, int, str]] = None,
+                           cache_dir: str = None) -> None:
+    """Warm the cache for the standard gallery sizes."""
+    for width, height, fmt in renditions or DEFAULT_PREGENERATE:
+        try:
+            get_rendition(source_path, width, height, fmt, cache_dir=cache_dir)
+        except Exception as e:
+            print(f"Failed to pregenerate {width}x{height} {fmt} for {source_path}: {e}")
+
+def pregenerate_in_background(source_paths: Iterable[str]) -> threading.Thread:
+    """Warm renditions for freshly uploaded files without blocking the request."""
+    paths = list(source_paths)
+    thread = threading.Thread(
+        target=lambda: [pregenerate_renditions(path) for path in paths],
+        daemon=True
+    )
+    thread.start()
+    return thread
@@ -1,8 +1,8 @@
 from flask import current_app as app, render_template, request, jsonify
 import os
-import openai
-import base64
-from app.local_db import get_contexts, get_structured_summary, set_tags
+from interviewer_bot import encode_image
+from llm_client import get_llm_client
+from app.data_access import get_contexts, get_structured_summary, set_tags
 
 @app.route('/')
 def index():
@@ -24,23 +24,24 @@ def ai_tag_image(image_name):
     context_text = ' '.join([c['text'] for c in contexts])
 
     image_path = os.path.join('test_images', image_name)
-    with open(image_path, 'rb') as img_file:
-        image_b64 = base64.b64encode(img_file.read()).decode()
+    image_b64 = encode_image(image_path)
+    if image_b64 is None:
+        return jsonify({"error": "Image not found"}), 404
 
     prompt = f"You are an expert photo tagger. Given the following image and its context/summary, generate a list of 3-7 relevant, concise tags (single words or short phrases, comma-separated).\n\nContext: {context_text}\nSummary: {summary}\n\nTags:"
 
-    response = openai.chat.completions.create(
-        model="gpt-4-vision-preview",
-        messages=[
+    content = get_llm_client().chat(
+        [
             {"role": "system", "content": "You are an expert photo tagger."},
             {"role": "user", "content": [
                 {"type": "text", "text": prompt},
                 {"type": "image_url", "image_url": f"data:image/jpeg;base64,{image_b64}"}
             ]}
         ],
-        max_tokens=100
+        model="gpt-4-vision-preview",
+        max_tokens=100,
+        cache="refresh" if request.args.get("refresh") else True
     )
-    content = response.choices[0].message.content if response.choices[0].message.content else ''
     tags = [tag.strip() for tag in content.strip().split(',') if tag.strip()]
     set_tags(image_name, tags)
     return jsonify({"tags": tags})
@@ -1,4 +1,5 @@
 import os
+import re
 import uuid
 import sqlite3
 import json
@@ -8,13 +9,24 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Bump when the full-text schema changes so existing databases are rebuilt
+FTS_SCHEMA_VERSION = 3
+
+# BM25 column weights for documents_fts(title, content, metadata_text)
+FTS_WEIGHTS = (10.0, 1.0, 3.0)
+
+_FTS_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
 class SimpleDataStore:
     def __init__(self, db_path="photo_tales.db"):
         """Initialize with SQLite database."""
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row  # Enable dict-like access
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
         self._init_schema()
+        self._init_fts_schema()
     
     def _init_schema(self):
         """Initialize SQLite database schema."""
@@ -49,9 +61,122 @@ class SimpleDataStore:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_type ON documents(type)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents(created_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_source ON documents(source)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_type_created_at ON documents(type, created_at)")
+        
+        self.conn.commit()
+    
+    def _init_fts_schema(self):
+        """Create the FTS5 index and tag table, kept in sync with documents by triggers."""
+        cursor = self.conn.cursor()
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        
+        if version < FTS_SCHEMA_VERSION:
+            cursor.executescript("""
+                DROP TABLE IF EXISTS documents_fts;
+                DROP TABLE IF EXISTS document_keys;
+                DROP TABLE IF EXISTS document_tags;
+                DROP TRIGGER IF EXISTS documents_ai;
+                DROP TRIGGER IF EXISTS documents_ad;
+                DROP TRIGGER IF EXISTS documents_au;
+            """)
+        
+        # documents.rowid may be renumbered by VACUUM or a table rebuild, so each
+        # document gets a stable integer key here which is used as its FTS rowid
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS document_keys (
+                key INTEGER PRIMARY KEY,
+                doc_id TEXT NOT NULL UNIQUE
+            )
+        """)
+        # metadata is flattened to its scalar values
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                title, content, metadata_text,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS document_tags (
+                doc_id TEXT NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (doc_id, tag)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_document_tags_tag ON document_tags(tag, doc_id)")
+        
+        index_new = """
+            INSERT OR IGNORE INTO document_keys (doc_id) VALUES (new.id);
+            INSERT INTO documents_fts (rowid, title, content, metadata_text)
+            VALUES ((SELECT key FROM document_keys WHERE doc_id = new.id),
+                    new.title, new.content,
+                    (SELECT group_concat(value, ' ') FROM json_tree(new.metadata)
+                     WHERE type IN ('text', 'integer', 'real')));
+            INSERT OR IGNORE INTO document_tags (doc_id, tag)
+            SELECT new.id, lower(trim(value)) FROM json_each(new.metadata, '$.tags')
+            WHERE json_type(new.metadata, '$.tags') = 'array'
+              AND type = 'text' AND trim(value) != '';
+        """
+        unindex_old = """
+            DELETE FROM documents_fts WHERE rowid = (SELECT key FROM document_keys WHERE doc_id = old.id);
+            DELETE FROM document_tags WHERE doc_id = old.id;
+        """
+        cursor.executescript(f"""
+            CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+                {index_new}
+            END;
+            CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+                {unindex_old}
+                DELETE FROM document_keys WHERE doc_id = old.id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+                {unindex_old}
+                {index_new}
+            END;
+        """)
+        
+        if version < FTS_SCHEMA_VERSION:
+            # Index documents written before the full-text schema existed
+            cursor.execute("INSERT OR IGNORE INTO document_keys (doc_id) SELECT id FROM documents")
+            cursor.execute("""
+                INSERT INTO documents_fts (rowid, title, content, metadata_text)
+                SELECT k.key, d.title, d.content,
+                       (SELECT group_concat(value, ' ') FROM json_tree(d.metadata)
+                        WHERE type IN ('text', 'integer', 'real'))
+                FROM documents d JOIN document_keys k ON k.doc_id = d.id
+            """)
+            cursor.execute("""
+                INSERT OR IGNORE INTO document_tags (doc_id, tag)
+                SELECT d.id, lower(trim(t.value))
+                FROM documents d, json_each(d.metadata, '$.tags') t
+                WHERE json_type(d.metadata, '$.tags') = 'array'
+                  AND t.type = 'text' AND trim(t.value) != ''
+            """)
+            cursor.execute(f"PRAGMA user_version = {FTS_SCHEMA_VERSION}")
         
         self.conn.commit()
     
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Turn user input into a safe FTS5 query.
+        
+        Quoted text becomes a phrase, a trailing ``*`` makes a prefix query and
+        every other word is matched literally. Terms are ANDed together.
+        """
+        terms = []
+        for phrase, word in _FTS_TOKEN.findall(query or ''):
+            if phrase:
+                words = re.findall(r'\w+', phrase)
+                if words:
+                    terms.append('"' + ' '.join(words) + '"')
+                continue
+            prefix = word.endswith('*')
+            for token in re.findall(r'\w+', word):
+                terms.append(f'"{token}"')
+            if prefix and terms and terms[-1].endswith('"'):
+                terms[-1] += '*'
+        return ' '.join(terms)
+    
     def add_document(self, doc_type: str, title: str, content: str, 
                     metadata: Dict[str, Any], source: str = None) -> str:
         """Add a new document."""
@@ -79,24 +204,35 @@ class SimpleDataStore:
         return None
     
     def search_documents(self, query: str, doc_type: str = None, 
-                        limit: int = 10) -> List[Dict[str, Any]]:
-        """Search documents using text matching (simple version)."""
-        cursor = self.conn.cursor()
+                        limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """Full-text search ranked by BM25.
         
+        Supports ``"exact phrases"`` and ``prefix*`` terms. Each result has a
+        ``snippet`` of the best matching content (matches wrapped in ``[ ]``)
+        and a ``score`` where higher is better.
+        """
+        match = self._fts_query(query)
+        if not match:
+            return []
+        
+        sql = f"""
+            SELECT d.*,
+                   snippet(documents_fts, 1, '[', ']', '…', 16) AS snippet,
+                   -bm25(documents_fts, {', '.join(str(w) for w in FTS_WEIGHTS)}) AS score
+            FROM documents_fts
+            JOIN document_keys k ON k.key = documents_fts.rowid
+            JOIN documents d ON d.id = k.doc_id
+            WHERE documents_fts MATCH ?
+        """
+        values = [match]
         if doc_type:
-            cursor.execute("""
-                SELECT * FROM documents 
-                WHERE type = ? AND (title LIKE ? OR content LIKE ?)
-                ORDER BY created_at DESC 
-                LIMIT ?
-            """, (doc_type, f"%{query}%", f"%{query}%", limit))
-        else:
-            cursor.execute("""
-                SELECT * FROM documents 
-                WHERE title LIKE ? OR content LIKE ?
-                ORDER BY created_at DESC 
-                LIMIT ?
-            """, (f"%{query}%", f"%{query}%", limit))
+            sql += " AND d.type = ?"
+            values.append(doc_type)
+        sql += " ORDER BY score DESC LIMIT ? OFFSET ?"
+        values.extend([limit, offset])
+        
+        cursor = self.conn.cursor()
+        cursor.execute(sql, values)
         
         results = cursor.fetchall()
         documents = []
@@ -209,38 +345,30 @@ class SimpleDataStore:
         return documents
     
     def get_related_documents(self, doc_id: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """Get related documents based on shared metadata."""
-        current_doc = self.get_document(doc_id)
-        if not current_doc:
-            return []
-        
-        # Find documents with similar tags or metadata
-        current_metadata = current_doc['metadata']
-        current_tags = current_metadata.get('tags', [])
+        """Get documents sharing the most tags with ``doc_id``.
         
-        if not current_tags:
-            return []
-        
-        # Search for documents with overlapping tags
+        Each result carries ``shared_tags``; ties go to the newest document.
+        """
         cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT d.*, COUNT(*) AS shared_tags
+            FROM document_tags mine
+            JOIN document_tags other ON other.tag = mine.tag AND other.doc_id != mine.doc_id
+            JOIN documents d ON d.id = other.doc_id
+            WHERE mine.doc_id = ?
+            GROUP BY other.doc_id
+            ORDER BY shared_tags DESC, d.created_at DESC
+            LIMIT ?
+        """, (doc_id, limit))
+        
+        results = cursor.fetchall()
         related_docs = []
+        for result in results:
+            doc = dict(result)
+            doc['metadata'] = json.loads(doc['metadata'])
+            related_docs.append(doc)
         
-        for tag in current_tags[:3]:  # Use first 3 tags
-            cursor.execute("""
-                SELECT * FROM documents 
-                WHERE id != ? AND metadata LIKE ?
-                ORDER BY created_at DESC 
-                LIMIT ?
-            """, (doc_id, f"%{tag}%", limit))
-            
-            results = cursor.fetchall()
-            for result in results:
-                doc = dict(result)
-                doc['metadata'] = json.loads(doc['metadata'])
-                if doc not in related_docs:
-                    related_docs.append(doc)
-        
-        return related_docs[:limit]
+        return related_docs
     
     def add_document_relation(self, source_doc_id: str, target_doc_id: str, 
                              relation_type: str = "related") -> str:
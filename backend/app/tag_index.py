@@ -0,0 +1,108 @@
+"""
+In-memory tag index for the local context store.
+
+Maps tag -> set of image names and image name -> tags, so tag counts, the
+photos for a tag and the tag vocabulary can be answered without scanning every
+image. The index is loaded once from the backing store and then kept current by
+the data_access write functions.
+"""
+
+import threading
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+class TagIndex:
+    def __init__(self, loader: Callable[[], Dict[str, List[str]]]):
+        """``loader`` returns ``{image_name: tags}`` for every tagged image."""
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._tags_by_media: Dict[str, List[str]] = {}
+        self._media_by_tag: Dict[str, Set[str]] = {}
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                for media_id, tags in self._loader().items():
+                    self._set(media_id, tags)
+                self._loaded = True
+
+    def _set(self, media_id: str, tags: Iterable[str]):
+        tags = list(dict.fromkeys(tags or []))
+        for tag in set(self._tags_by_media.get(media_id, [])) - set(tags):
+            members = self._media_by_tag.get(tag)
+            if members is not None:
+                members.discard(media_id)
+                if not members:
+                    del self._media_by_tag[tag]
+        for tag in tags:
+            self._media_by_tag.setdefault(tag, set()).add(media_id)
+        if tags:
+            self._tags_by_media[media_id] = tags
+        else:
+            self._tags_by_media.pop(media_id, None)
+
+    def set_tags(self, media_id: str, tags: Iterable[str]):
+        """Record the full tag list for an image."""
+        self._ensure_loaded()
+        with self._lock:
+            self._set(media_id, tags)
+
+    def remove_tag(self, tag: str) -> List[str]:
+        """Drop a tag everywhere. Returns the image names that had it."""
+        self._ensure_loaded()
+        with self._lock:
+            media_ids = sorted(self._media_by_tag.pop(tag, set()))
+            for media_id in media_ids:
+                remaining = [t for t in self._tags_by_media.get(media_id, []) if t != tag]
+                if remaining:
+                    self._tags_by_media[media_id] = remaining
+                else:
+                    self._tags_by_media.pop(media_id, None)
+            return media_ids
+
+    def clear(self) -> List[str]:
+        """Remove all tags. Returns the image names that had any."""
+        self._ensure_loaded()
+        with self._lock:
+            media_ids = sorted(self._tags_by_media)
+            self._tags_by_media.clear()
+            self._media_by_tag.clear()
+            return media_ids
+
+    def tags_for(self, media_id: str) -> List[str]:
+        self._ensure_loaded()
+        with self._lock:
+            return list(self._tags_by_media.get(media_id, []))
+
+    def tagged_media(self) -> List[str]:
+        """Image names with at least one tag."""
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._tags_by_media)
+
+    def media_for_tag(self, tag: str) -> List[str]:
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._media_by_tag.get(tag, ()))
+
+    def counts(self) -> List[Tuple[str, int]]:
+        """(tag, count) pairs, most used first, then alphabetically."""
+        self._ensure_loaded()
+        with self._lock:
+            counts = [(tag, len(members)) for tag, members in self._media_by_tag.items()]
+        return sorted(counts, key=lambda x: (-x[1], x[0].lower()))
+
+    def vocabulary(self) -> List[str]:
+        """All distinct tags, alphabetically."""
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._media_by_tag, key=str.lower)
+
+    def invalidate(self):
+        """Forget the index so it is reloaded from the store on next use."""
+        with self._lock:
+            self._tags_by_media.clear()
+            self._media_by_tag.clear()
+            self._loaded = False
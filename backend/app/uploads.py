@@ -0,0 +1,205 @@
+"""
+Streaming uploads into a content-addressed file store.
+
+Incoming bytes are copied to a temp file in fixed-size chunks while being
+hashed with SHA-256, so uploads are never held in memory and the real size and
+digest are known once the last byte lands. Finished files are renamed
+atomically to ``<store>/<hash[:2]>/<hash><ext>``, which makes re-uploads of the
+same photo free to detect.
+
+Large batches from phones can use resumable uploads: a session is created with
+the expected size, chunks are appended at an explicit offset, and an
+interrupted client asks for the current offset and carries on from there.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from typing import BinaryIO, Dict, Optional, Tuple
+
+UPLOAD_STORE_DIR = os.getenv('UPLOAD_STORE_DIR', 'uploads')
+UPLOAD_TMP_DIR = os.getenv('UPLOAD_TMP_DIR', os.path.join(UPLOAD_STORE_DIR, '.incoming'))
+MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', str(200 * 1024 * 1024)))
+
+CHUNK_SIZE = 1024 * 1024
+
+_session_locks: Dict[str, threading.Lock] = {}
+_session_locks_guard = threading.Lock()
+
+class UploadError(ValueError):
+    """Raised for client errors such as a wrong offset or an oversized upload."""
+
+def _extension(filename: Optional[str]) -> str:
+    ext = os.path.splitext(filename or '')[1].lower()
+    return ext if re.fullmatch(r'\.[a-z0-9]{1,8}', ext) else ''
+
+def _copy_hashing(stream: BinaryIO, out: BinaryIO, sha256, limit: int) -> int:
+    """Copy ``stream`` to ``out`` in chunks, updating ``sha256`` if given. Returns bytes copied."""
+    size = 0
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        size += len(chunk)
+        if size > limit:
+            raise UploadError(f"Upload exceeds the {limit} byte limit")
+        if sha256 is not None:
+            sha256.update(chunk)
+        out.write(chunk)
+    return size
+
+def stream_to_temp(stream: BinaryIO, tmp_dir: str = None) -> Tuple[str, str, int]:
+    """Write ``stream`` to a temp file. Returns ``(tmp_path, sha256_hex, size)``."""
+    tmp_dir = tmp_dir or UPLOAD_TMP_DIR
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+    sha256 = hashlib.sha256()
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            size = _copy_hashing(stream, out, sha256, MAX_UPLOAD_SIZE)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, sha256.hexdigest(), size
+
+def content_path(digest: str, filename: Optional[str] = None, store_dir: str = None) -> str:
+    """Return the content-addressed path for a digest."""
+    store_dir = store_dir or UPLOAD_STORE_DIR
+    return os.path.join(store_dir, digest[:2], f"{digest}{_extension(filename)}")
+
+def commit_to_store(tmp_path: str, digest: str, filename: Optional[str] = None,
+                    store_dir: str = None) -> str:
+    """Atomically move a finished temp file into the store and return its path.
+
+    If identical content is already stored the temp file is discarded.
+    """
+    final_path = content_path(digest, filename, store_dir)
+    if os.path.exists(final_path):
+        os.unlink(tmp_path)
+        return final_path
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(tmp_path, final_path)
+    return final_path
+
+def discard(tmp_path: str) -> None:
+    try:
+        os.unlink(tmp_path)
+    except FileNotFoundError:
+        pass
+
+# --- Resumable uploads ---
+
+def _session_paths(upload_id: str, tmp_dir: str) -> Tuple[str, str]:
+    if not re.fullmatch(r'[0-9a-f]{32}', upload_id or ''):
+        raise UploadError("Invalid upload ID")
+    base = os.path.join(tmp_dir, upload_id)
+    return f"{base}.json", f"{base}.part"
+
+def _session_lock(upload_id: str) -> threading.Lock:
+    with _session_locks_guard:
+        return _session_locks.setdefault(upload_id, threading.Lock())
+
+def create_upload_session(filename: str, size: int, content_type: Optional[str] = None,
+                          metadata: Optional[Dict] = None, tmp_dir: str = None) -> Dict:
+    """Start a resumable upload of ``size`` bytes and return its session."""
+    if size <= 0 or size > MAX_UPLOAD_SIZE:
+        raise UploadError(f"size must be between 1 and {MAX_UPLOAD_SIZE} bytes")
+
+    tmp_dir = tmp_dir or UPLOAD_TMP_DIR
+    os.makedirs(tmp_dir, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    session_path, part_path = _session_paths(upload_id, tmp_dir)
+
+    session = {
+        'upload_id': upload_id,
+        'filename': filename,
+        'size': size,
+        'content_type': content_type,
+        'metadata': metadata or {},
+    }
+    open(part_path, 'wb').close()
+    with open(session_path, 'w', encoding='utf-8') as f:
+        json.dump(session, f)
+    return {**session, 'offset': 0}
+
+def get_upload_session(upload_id: str, tmp_dir: str = None) -> Optional[Dict]:
+    """Return a session with its current offset, or None if it does not exist."""
+    session_path, part_path = _session_paths(upload_id, tmp_dir or UPLOAD_TMP_DIR)
+    if not os.path.exists(session_path):
+        return None
+    with open(session_path, 'r', encoding='utf-8') as f:
+        session = json.load(f)
+    session['offset'] = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    return session
+
+def append_chunk(upload_id: str, offset: int, stream: BinaryIO, tmp_dir: str = None,
+                 length: Optional[int] = None) -> Dict:
+    """Append a chunk at ``offset`` and return the updated session.
+
+    The offset must equal the bytes received so far, so a retried chunk is
+    rejected instead of being written twice. ``length`` (the request's
+    Content-Length, if known) lets an oversized chunk be refused before any of
+    it is written; a chunk that fails part way is cut off again, so the offset
+    only ever moves by whole chunks. The returned session includes ``offset``
+    and, once all bytes are in, ``complete: True``.
+    """
+    tmp_dir = tmp_dir or UPLOAD_TMP_DIR
+    with _session_lock(upload_id):
+        session = get_upload_session(upload_id, tmp_dir)
+        if session is None:
+            raise KeyError(upload_id)
+        if offset != session['offset']:
+            raise UploadError(f"Offset mismatch: expected {session['offset']}, got {offset}")
+
+        _, part_path = _session_paths(upload_id, tmp_dir)
+        remaining = session['size'] - offset
+        if length is not None and length > remaining:
+            raise UploadError(f"Chunk of {length} bytes exceeds the {remaining} bytes remaining")
+        with open(part_path, 'ab') as out:
+            try:
+                written = _copy_hashing(stream, out, None, remaining)
+                out.flush()
+                os.fsync(out.fileno())
+            except BaseException:
+                out.truncate(offset)
+                raise
+
+        session['offset'] = offset + written
+        session['complete'] = session['offset'] == session['size']
+        return session
+
+def finish_upload_session(upload_id: str, tmp_dir: str = None) -> Tuple[Dict, str, str, int]:
+    """Hash a completed upload and hand its data file over to the caller.
+
+    Returns ``(session, tmp_path, sha256_hex, size)``; the caller commits or
+    discards ``tmp_path``. The session record is removed.
+    """
+    tmp_dir = tmp_dir or UPLOAD_TMP_DIR
+    with _session_lock(upload_id):
+        session = get_upload_session(upload_id, tmp_dir)
+        if session is None:
+            raise KeyError(upload_id)
+        if session['offset'] != session['size']:
+            raise UploadError(f"Upload incomplete: {session['offset']} of {session['size']} bytes")
+
+        session_path, part_path = _session_paths(upload_id, tmp_dir)
+        sha256 = hashlib.sha256()
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                sha256.update(chunk)
+        os.unlink(session_path)
+
+    with _session_locks_guard:
+        _session_locks.pop(upload_id, None)
+    return session, part_path, sha256.hexdigest(), session['size']
+
+def abort_upload_session(upload_id: str, tmp_dir: str = None) -> bool:
+    """Delete a session and its partial data. Returns False if it did not exist."""
+    session_path, part_path = _session_paths(upload_id, tmp_dir or UPLOAD_TMP_DIR)
+    existed = os.path.exists(session_path)
+    discard(session_path)
+    discard(part_path)
+    with _session_locks_guard:
+        _session_locks.pop(upload_id, None)
+    return existed
@@ -0,0 +1,209 @@
+"""
+Packed vector storage and nearest-neighbour search.
+
+Vectors are stored as little-endian float32 bytes (BYTEA in PostgreSQL, or a
+memory-mapped .npy sidecar on disk) and searched in memory with NumPy. Small
+collections use an exact brute-force scan; larger ones switch to an IVF
+(inverted file) index built with k-means over the stored vectors.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+VECTOR_DTYPE = np.dtype('<f4')
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    """Pack a vector into little-endian float32 bytes."""
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+def unpack_vector(data: bytes) -> np.ndarray:
+    """Unpack float32 bytes produced by pack_vector."""
+    return np.frombuffer(bytes(data), dtype=VECTOR_DTYPE)
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so a dot product is cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class VectorIndex:
+    """In-memory cosine-similarity index over string IDs.
+
+    Collections up to ``brute_force_limit`` vectors are scanned exactly. Above
+    that an IVF index with roughly sqrt(n) lists is trained and queries only
+    scan the ``n_probe`` lists closest to the query.
+    """
+
+    def __init__(self, dimensions: Optional[int] = None, brute_force_limit: int = 20000,
+                 n_probe: int = 8, kmeans_iterations: int = 10):
+        self.dimensions = dimensions
+        self.brute_force_limit = brute_force_limit
+        self.n_probe = n_probe
+        self.kmeans_iterations = kmeans_iterations
+
+        self._lock = threading.RLock()
+        self._vectors = np.empty((0, dimensions or 0), dtype=VECTOR_DTYPE)
+        self._count = 0
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+
+        # IVF state, rebuilt lazily after mutations
+        self._centroids = None
+        self._lists = None
+        self._trained_count = 0
+        self._dirty = True
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self._positions
+
+    def upsert(self, ids: Iterable[str], vectors) -> None:
+        """Insert or replace vectors for the given IDs."""
+        ids = list(ids)
+        if not ids:
+            return
+        matrix = _normalize(np.atleast_2d(np.asarray(vectors, dtype=VECTOR_DTYPE)))
+        if matrix.shape[0] != len(ids):
+            raise ValueError("ids and vectors must have the same length")
+
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = matrix.shape[1]
+                self._vectors = np.empty((0, self.dimensions), dtype=VECTOR_DTYPE)
+            if matrix.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {matrix.shape[1]}")
+
+            self._ensure_writable()
+            for vector_id, vector in zip(ids, matrix):
+                position = self._positions.get(vector_id)
+                if position is None:
+                    self._reserve(self._count + 1)
+                    position = self._count
+                    self._ids.append(vector_id)
+                    self._positions[vector_id] = position
+                    self._count += 1
+                self._vectors[position] = vector
+            self._dirty = True
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Remove vectors by ID, ignoring IDs that are not present."""
+        with self._lock:
+            self._ensure_writable()
+            for vector_id in ids:
+                position = self._positions.pop(vector_id, None)
+                if position is None:
+                    continue
+                # Swap the last row into the hole to keep storage dense
+                last = self._count - 1
+                if position != last:
+                    moved_id = self._ids[last]
+                    self._vectors[position] = self._vectors[last]
+                    self._ids[position] = moved_id
+                    self._positions[moved_id] = position
+                self._ids.pop()
+                self._count -= 1
+                self._dirty = True
+
+    def nearest(self, vector: Sequence[float], k: int = 10) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (id, cosine similarity) pairs, best first."""
+        with self._lock:
+            if self._count == 0 or k <= 0:
+                return []
+            query = _normalize(np.asarray(vector, dtype=VECTOR_DTYPE).reshape(-1))
+            if query.shape[0] != self.dimensions:
+                raise ValueError(f"Expected a {self.dimensions}-dimensional query, got {query.shape[0]}")
+
+            if self._count <= self.brute_force_limit:
+                candidates = None
+                scores = self._vectors[:self._count] @ query
+            else:
+                self._ensure_ivf()
+                probe = min(self.n_probe, len(self._lists))
+                closest_lists = np.argpartition(-(self._centroids @ query), probe - 1)[:probe]
+                candidates = np.concatenate([self._lists[i] for i in closest_lists])
+                scores = self._vectors[candidates] @ query
+
+            k = min(k, scores.shape[0])
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            rows = top if candidates is None else candidates[top]
+            return [(self._ids[row], float(scores[i])) for row, i in zip(rows, top)]
+
+    def save(self, path: str) -> None:
+        """Write vectors to ``<path>.npy`` and IDs to ``<path>.ids.json``."""
+        with self._lock:
+            np.save(f"{path}.npy", np.ascontiguousarray(self._vectors[:self._count]))
+            tmp_path = f"{path}.ids.json.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._ids, f)
+            os.replace(tmp_path, f"{path}.ids.json")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, **kwargs) -> 'VectorIndex':
+        """Load an index written by save(), memory-mapping the vectors by default."""
+        vectors = np.load(f"{path}.npy", mmap_mode='r' if mmap else None)
+        with open(f"{path}.ids.json", 'r', encoding='utf-8') as f:
+            ids = json.load(f)
+
+        index = cls(dimensions=vectors.shape[1], **kwargs)
+        index._vectors = vectors
+        index._count = len(ids)
+        index._ids = ids
+        index._positions = {vector_id: i for i, vector_id in enumerate(ids)}
+        return index
+
+    def _reserve(self, size: int) -> None:
+        """Grow the backing matrix geometrically so appends are amortised O(1)."""
+        if size <= self._vectors.shape[0]:
+            return
+        capacity = max(size, 2 * self._vectors.shape[0], 64)
+        grown = np.empty((capacity, self.dimensions), dtype=VECTOR_DTYPE)
+        grown[:self._count] = self._vectors[:self._count]
+        self._vectors = grown
+
+    def _ensure_writable(self) -> None:
+        """Copy a memory-mapped matrix into RAM before the first mutation."""
+        if isinstance(self._vectors, np.memmap) or not self._vectors.flags.writeable:
+            self._vectors = np.array(self._vectors[:self._count], dtype=VECTOR_DTYPE)
+
+    def _ensure_ivf(self) -> None:
+        """(Re)build IVF lists, retraining centroids once the collection has doubled."""
+        if not self._dirty and self._lists is not None:
+            return
+        vectors = self._vectors[:self._count]
+        if self._centroids is None or self._count > 2 * self._trained_count:
+            self._centroids = self._train_centroids(vectors)
+            self._trained_count = self._count
+
+        assignments = np.argmax(vectors @ self._centroids.T, axis=1)
+        order = np.argsort(assignments, kind='stable')
+        boundaries = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[boundaries[i]:boundaries[i + 1]] for i in range(len(self._centroids))]
+        self._dirty = False
+
+    def _train_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        """Spherical k-means on a sample of the stored vectors."""
+        n_lists = max(1, int(np.sqrt(len(vectors))))
+        rng = np.random.default_rng(0)
+        sample_size = min(len(vectors), n_lists * 64)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            # Keep the previous centroid for lists that lost all members
+            empty = counts == 0
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        return centroids
@@ -10,75 +10,62 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv(dotenv_path='config.env')
 
-def cleanup_database():
+def cleanup_database(allow_mass_delete=False):
     """Clean up database by removing missing files and adding existing ones"""
     try:
         print("🔌 Connecting to database...")
         
         # Import here to avoid circular dependencies
         from app.enhanced_data_store import EnhancedDataStore
+        from app.library_sync import LibrarySync, check_mass_delete, is_local_path
+        from app.uploads import UPLOAD_STORE_DIR
+        from image_metadata import extract_exif_batch
         
         store = EnhancedDataStore()
         
-        # Get all media items
-        existing_items = store.list_media_items()
-        print(f"📸 Found {len(existing_items)} media items in database")
-        
-        # Check which files exist and which don't
-        valid_items = []
-        missing_items = []
-        
-        for item in existing_items:
-            file_path = item.get('file_path')
-            if file_path and os.path.exists(file_path):
-                valid_items.append(item)
-                print(f"✅ Valid: {item.get('title', 'Untitled')} - {file_path}")
-            else:
-                missing_items.append(item)
-                print(f"❌ Missing: {item.get('title', 'Untitled')} - {file_path}")
-        
-        # Remove missing items
-        if missing_items:
-            print(f"\n🗑️ Removing {len(missing_items)} missing files...")
-            for item in missing_items:
-                try:
-                    store.delete_media_item(item['id'])
-                    print(f"   Removed: {item.get('title', 'Untitled')}")
-                except Exception as e:
-                    print(f"   Failed to remove {item.get('title', 'Untitled')}: {e}")
-        
-        # Add existing images from test_images directory
-        print(f"\n📁 Checking test_images directory...")
+        # Sync the test_images directory: adds, changes, renames and deletions in batches
         test_images_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_images')
-        
         if os.path.exists(test_images_dir):
-            for filename in os.listdir(test_images_dir):
-                if filename.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.bmp')):
-                    file_path = os.path.join(test_images_dir, filename)
-                    
-                    # Check if this file is already in the database
-                    existing_item = store.get_media_by_file_path(file_path)
-                    if existing_item:
-                        print(f"   Already exists: {filename}")
-                        continue
-                    
-                    # Add to database
-                    metadata = {
-                        'title': f'Test Image - {filename}',
-                        'summary': f'A test image from the test_images directory',
-                        'tags': ['test', 'sample', 'image'],
-                        'file_size': os.path.getsize(file_path),
-                        'file_type': 'image/jpeg' if filename.lower().endswith(('.jpg', '.jpeg')) else 'image/png'
-                    }
-                    
-                    media_id = store.add_media_item(file_path, metadata)
-                    print(f"   ✅ Added: {filename} (ID: {media_id})")
+            print(f"📁 Syncing {test_images_dir}...")
+            diff, counts = LibrarySync(store, test_images_dir).sync(allow_mass_delete=allow_mass_delete)
+            for entry in diff.added:
+                print(f"   ✅ Added: {os.path.basename(entry.path)}")
+            for old, new in diff.moved:
+                print(f"   🔀 Moved: {os.path.basename(old.path)} -> {os.path.basename(new.path)}")
+            for entry in diff.deleted:
+                print(f"   🗑️ Removed: {os.path.basename(entry.path)}")
+            print(f"   {counts}")
+        
+        # Remove local items elsewhere whose files no longer exist, in one batched delete.
+        # Object-storage rows and transcript placeholders have no local file to check.
+        manifest = store.media_manifest()
+        local_rows = [row for row in manifest if is_local_path(row['file_path'], [UPLOAD_STORE_DIR])]
+        missing_ids = [str(row['id']) for row in local_rows if not os.path.exists(row['file_path'])]
+        print(f"\n📸 Found {len(manifest)} media items in database, {len(local_rows)} local, "
+              f"{len(missing_ids)} with missing files")
+        if missing_ids:
+            if not allow_mass_delete:
+                check_mass_delete(len(missing_ids), len(local_rows), "with local paths")
+            print(f"🗑️ Removing {len(missing_ids)} missing files...")
+            store.delete_media_items_bulk(missing_ids)
+        
+        # Backfill compact EXIF records for items ingested before they were stored
+        valid_items = store.list_media_items(fields=['file_path', 'metadata'])
+        needs_exif = [item for item in valid_items
+                      if 'exif' not in (store._load_json(item.get('metadata')) or {})]
+        if needs_exif:
+            print(f"\n📷 Reading EXIF for {len(needs_exif)} existing files...")
+            records = extract_exif_batch([item['file_path'] for item in needs_exif])
+            updated = store.merge_media_metadata_bulk({
+                str(item['id']): {'exif': records[item['file_path']]} for item in needs_exif
+            })
+            print(f"   Updated {updated} items")
         
         # Final count
-        final_items = store.list_media_items()
+        final_items = store.media_manifest()
         print(f"\n🎉 Database cleanup complete!")
         print(f"   Final media count: {len(final_items)}")
-        print(f"   Valid files: {len([item for item in final_items if os.path.exists(item.get('file_path', ''))])}")
+        print(f"   Valid files: {len([item for item in final_items if os.path.exists(item.get('file_path') or '')])}")
         
         return True
         
@@ -90,7 +77,7 @@ if __name__ == "__main__":
     print("=== Photo Tales Database Cleanup ===")
     print("")
     
-    success = cleanup_database()
+    success = cleanup_database(allow_mass_delete='--allow-mass-delete' in sys.argv)
     
     if success:
         print("")
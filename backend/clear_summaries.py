@@ -1,14 +1,8 @@
-from tinydb import TinyDB, Query
+from app.local_db import clear_all_summaries as clear_stored_summaries
 
 def clear_all_summaries():
-    db = TinyDB('local_contexts.json')
-    for item in db:
-        db.update({
-            'summary': '',
-            'summary_title': '',
-            'summary_summary': ''
-        }, Query().image_name == item['image_name'])
-    print("All summaries cleared.")
+    cleared = clear_stored_summaries()
+    print(f"All summaries cleared ({cleared} images).")
 
 if __name__ == "__main__":
-    clear_all_summaries() 
\ No newline at end of file
+    clear_all_summaries()
@@ -0,0 +1,139 @@
+"""
+Conversation Window Module
+
+Keeps interview histories a bounded size before they are sent to the model:
+the system prompt and the most recent turns are kept verbatim, older turns are
+folded into a rolling summary, image payloads are dropped once the model has
+seen them, and the whole prompt is held under a token budget.
+"""
+
+import os
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+IMAGE_PLACEHOLDER = "[image shared earlier in the conversation]"
+
+DEFAULT_KEEP_TURNS = int(os.getenv("INTERVIEW_KEEP_TURNS", "6"))
+DEFAULT_TOKEN_BUDGET = int(os.getenv("INTERVIEW_TOKEN_BUDGET", "3000"))
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+def estimate_text_tokens(text):
+    """Count tokens with tiktoken if installed, otherwise ~4 characters per token."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+def estimate_tokens(messages):
+    """Estimate prompt tokens for a list of chat messages."""
+    total = 0
+    for msg in messages:
+        total += 4  # per-message overhead for role and separators
+        content = msg.get("content")
+        if isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    total += estimate_text_tokens(part.get("text", ""))
+                elif part.get("type") == "image_url":
+                    total += 765  # a 1024px image at high detail
+        else:
+            total += estimate_text_tokens(content)
+    return total
+
+def message_text(msg):
+    """Return the plain text of a message, ignoring image parts."""
+    content = msg.get("content")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return content or ""
+
+def strip_images(messages):
+    """Replace image parts with a short placeholder."""
+    stripped = []
+    for msg in messages:
+        content = msg.get("content")
+        if isinstance(content, list) and any(part.get("type") == "image_url" for part in content):
+            parts = [part for part in content if part.get("type") != "image_url"]
+            parts.insert(0, {"type": "text", "text": IMAGE_PLACEHOLDER})
+            msg = {**msg, "content": parts}
+        stripped.append(msg)
+    return stripped
+
+def extractive_summary(previous_summary, messages, max_tokens):
+    """Default summarizer: append clipped turns to the summary, keeping the newest text."""
+    lines = [previous_summary] if previous_summary else []
+    for msg in messages:
+        text = " ".join(message_text(msg).split())
+        if text and text != IMAGE_PLACEHOLDER:
+            speaker = "User" if msg["role"] == "user" else "Interviewer"
+            lines.append(f"{speaker}: {text[:300]}")
+    summary = "\n".join(lines)
+
+    # Drop the oldest lines until the summary fits its share of the budget
+    while estimate_text_tokens(summary) > max_tokens and "\n" in summary:
+        summary = summary.split("\n", 1)[1]
+    return summary
+
+def _split_turns(messages):
+    """Group messages into turns, each starting at a user message."""
+    turns = []
+    for msg in messages:
+        if msg["role"] == "user" or not turns:
+            turns.append([msg])
+        else:
+            turns[-1].append(msg)
+    return turns
+
+def compact_messages(messages, keep_turns=None, token_budget=None, summarizer=None):
+    """
+    Return a compacted copy of a chat history.
+
+    - The leading system message is always kept.
+    - Image parts are removed from every message except the last one.
+    - Only the last ``keep_turns`` turns are kept verbatim; older turns, and any
+      further turns needed to stay under ``token_budget``, are folded into a
+      single summary system message.
+    - ``summarizer(previous_summary, messages, max_tokens)`` can be supplied to
+      replace the default extractive summary (e.g. with an LLM call).
+    """
+    keep_turns = DEFAULT_KEEP_TURNS if keep_turns is None else keep_turns
+    token_budget = DEFAULT_TOKEN_BUDGET if token_budget is None else token_budget
+    summarizer = summarizer or extractive_summary
+    summary_budget = max(token_budget // 4, 50)
+
+    rest = list(messages)
+    system = rest.pop(0) if rest and rest[0]["role"] == "system" else None
+    previous_summary = ""
+    if rest and rest[0]["role"] == "system" and str(rest[0].get("content", "")).startswith(SUMMARY_PREFIX):
+        previous_summary = rest.pop(0)["content"][len(SUMMARY_PREFIX):].strip()
+
+    if rest:
+        rest = strip_images(rest[:-1]) + [rest[-1]]
+    turns = _split_turns(rest)
+
+    folded = []
+    while len(turns) > max(keep_turns, 1):
+        folded.extend(turns.pop(0))
+
+    def build(summary_text):
+        compacted = [system] if system else []
+        if summary_text:
+            compacted.append({"role": "system", "content": f"{SUMMARY_PREFIX}\n{summary_text}"})
+        for turn in turns:
+            compacted.extend(turn)
+        return compacted
+
+    summary = summarizer(previous_summary, folded, summary_budget) if folded else previous_summary
+    compacted = build(summary)
+
+    # Fold more of the oldest turns until the prompt fits, always keeping the latest one
+    while estimate_tokens(compacted) > token_budget and len(turns) > 1:
+        summary = summarizer(summary, turns.pop(0), summary_budget)
+        compacted = build(summary)
+
+    return compacted
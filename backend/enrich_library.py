@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Bulk AI enrichment: generate summaries and tags for the whole media library
+
+Scans media items page by page, picks the ones whose summary/tags are missing
+or were generated from different inputs (contexts, capture date, image), and
+runs the summary + tagging prompts for them concurrently with asyncio. Each
+page is written back with one batched UPDATE and then checkpointed, so an
+interrupted run resumes where it stopped.
+
+    python enrich_library.py                 # enrich missing or stale items
+    python enrich_library.py --dry-run       # only count what would be enriched
+    python enrich_library.py --concurrency 16 --limit 500
+    python enrich_library.py --restart       # ignore the checkpoint
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(dotenv_path='config.env')
+
+from interviewer_bot import run_interview_chat, generate_image_tags
+from llm_client import get_llm_client
+from prompts import build_summary_prompt, parse_structured_summary
+
+# Bump when the summary/tag prompts change enough to warrant regenerating everything
+ENRICHMENT_VERSION = 1
+DEFAULT_CHECKPOINT = "enrichment_checkpoint.json"
+
+# USD per million tokens (input, output); override with --price-in / --price-out
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+def enrichment_inputs(item, contexts):
+    """The context texts the summary is generated from, capture date first."""
+    metadata = item.get('metadata') or {}
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    texts = [ctx['text'] for ctx in contexts]
+    captured_at = (metadata.get('exif') or {}).get('captured_at')
+    if captured_at:
+        texts.insert(0, f"This photo was captured on {captured_at}.")
+    return texts
+
+def inputs_hash(item, context_texts, model):
+    """Fingerprint of everything that feeds the prompts for one item."""
+    image_fingerprint = item.get('content_hash')
+    if not image_fingerprint and item.get('file_path') and os.path.exists(item['file_path']):
+        stat = os.stat(item['file_path'])
+        image_fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}"
+    payload = json.dumps([ENRICHMENT_VERSION, model, context_texts, image_fingerprint])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def needs_enrichment(item, current_hash, force=False):
+    """True if the item has no summary/tags or they came from different inputs."""
+    if force or not item.get('summary') or not item.get('tags'):
+        return True
+    metadata = item.get('metadata') or {}
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    return (metadata.get('enrichment') or {}).get('inputs_hash') != current_hash
+
+def enrich_item(item, context_texts, current_hash, vocabulary, model, client=None):
+    """Run the summary and tag prompts for one item. Returns an update_media_items_bulk entry."""
+    image_path = item.get('file_path')
+    if not image_path or not os.path.exists(image_path):
+        image_path = None
+
+    ai_summary, _ = run_interview_chat(build_summary_prompt(context_texts), image_path=image_path,
+                                       model=model, client=client, cache=True)
+    title, summary = parse_structured_summary(ai_summary)
+    summary = summary or ai_summary.strip()
+
+    tags = generate_image_tags(image_path, " ".join(context_texts), summary, model=model,
+                               existing_tags=vocabulary, client=client, cache=True)
+    return {
+        "title": title or None,
+        "summary": summary,
+        "tags": tags,
+        "metadata": {"enrichment": {
+            "inputs_hash": current_hash,
+            "model": model,
+            "version": ENRICHMENT_VERSION,
+            "enriched_at": datetime.now().isoformat(),
+        }},
+    }
+
+async def enrich_batch(jobs, vocabulary, model, concurrency, client=None):
+    """
+    Enrich ``[(item, context_texts, inputs_hash)]`` with at most ``concurrency``
+    items in flight. Returns ``(updates, failures)`` keyed by media ID.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(job):
+        item, context_texts, current_hash = job
+        async with semaphore:
+            return await loop.run_in_executor(
+                None, enrich_item, item, context_texts, current_hash, vocabulary, model, client
+            )
+
+    results = await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
+    updates, failures = {}, {}
+    for (item, _, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            failures[str(item['id'])] = f"{type(result).__name__}: {result}"
+        else:
+            updates[str(item['id'])] = result
+    return updates, failures
+
+def load_checkpoint(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically so a crash never leaves it half-written."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+def new_checkpoint():
+    return {"after": None, "scanned": 0, "enriched": 0, "skipped": 0, "failures": {},
+            "started_at": datetime.now().isoformat()}
+
+async def enrich_library(store, model="gpt-4o-mini", concurrency=8, page_size=200, limit=None,
+                         force=False, dry_run=False, checkpoint_path=DEFAULT_CHECKPOINT, restart=False):
+    """Enrich every missing or stale media item. Returns the final checkpoint dict."""
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    if checkpoint and checkpoint.get("finished_at"):
+        checkpoint = None
+    if checkpoint:
+        print(f"↩️  Resuming after {checkpoint['scanned']} scanned items")
+    else:
+        checkpoint = new_checkpoint()
+
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    vocabulary = [row['tag'] for row in store.tag_counts(limit=200)]
+    client = get_llm_client()
+    calls_before = client.stats()
+    started = time.monotonic()
+    enriched_this_run = 0
+    fields = ['file_path', 'title', 'summary', 'tags', 'metadata', 'content_hash']
+
+    while limit is None or enriched_this_run < limit:
+        after = tuple(checkpoint["after"]) if checkpoint["after"] else None
+        page = store.list_media_items(limit=page_size, after=after, fields=fields)
+        if not page:
+            break
+
+        contexts = store.get_contexts_bulk([str(item['id']) for item in page])
+        jobs = []
+        for item in page:
+            texts = enrichment_inputs(item, contexts[str(item['id'])])
+            current_hash = inputs_hash(item, texts, model)
+            if needs_enrichment(item, current_hash, force):
+                jobs.append((item, texts, current_hash))
+        if limit is not None and len(jobs) > limit - enriched_this_run:
+            # Stop mid-page: only advance the checkpoint past the items handled
+            jobs = jobs[:limit - enriched_this_run]
+            page = page[:page.index(jobs[-1][0]) + 1] if jobs else []
+            if not page:
+                break
+
+        if dry_run:
+            updates, failures = {}, {}
+            print(f"📋 {len(jobs)} of {len(page)} items would be enriched")
+        else:
+            updates, failures = await enrich_batch(jobs, vocabulary, model, concurrency, client)
+            if updates:
+                store.update_media_items_bulk(updates)
+
+        # Only checkpoint past items that were written (or skipped as fresh)
+        last = page[-1]
+        checkpoint["after"] = [last['created_at'], str(last['id'])]
+        checkpoint["scanned"] += len(page)
+        checkpoint["enriched"] += len(updates)
+        checkpoint["skipped"] += len(page) - len(jobs)
+        checkpoint["failures"].update(failures)
+        for media_id in updates:
+            checkpoint["failures"].pop(media_id, None)
+        enriched_this_run += len(updates)
+        if not dry_run:
+            save_checkpoint(checkpoint_path, checkpoint)
+
+        elapsed = time.monotonic() - started
+        print(f"✅ {checkpoint['scanned']} scanned, {checkpoint['enriched']} enriched, "
+              f"{len(checkpoint['failures'])} failed ({enriched_this_run / elapsed if elapsed else 0:.2f} items/s)")
+
+        if len(page) < page_size:
+            break
+
+    checkpoint["finished_at"] = datetime.now().isoformat()
+    if not dry_run:
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    calls_after = client.stats()
+    checkpoint["run"] = {
+        "elapsed_seconds": time.monotonic() - started,
+        "enriched": enriched_this_run,
+        "llm_calls": calls_after["calls"] - calls_before["calls"],
+        "llm_errors": calls_after["errors"] - calls_before["errors"],
+        "prompt_tokens": calls_after["prompt_tokens"] - calls_before["prompt_tokens"],
+        "completion_tokens": calls_after["completion_tokens"] - calls_before["completion_tokens"],
+    }
+    return checkpoint
+
+def print_report(checkpoint, price_in, price_out):
+    run = checkpoint["run"]
+    elapsed = run["elapsed_seconds"]
+    cost = (run["prompt_tokens"] * price_in + run["completion_tokens"] * price_out) / 1_000_000
+
+    print("\n📊 Enrichment report")
+    print(f"   Items scanned:   {checkpoint['scanned']}")
+    print(f"   Enriched:        {checkpoint['enriched']} ({run['enriched']} this run)")
+    print(f"   Already fresh:   {checkpoint['skipped']}")
+    print(f"   Failed:          {len(checkpoint['failures'])}")
+    print(f"   Elapsed:         {elapsed:.1f}s ({run['enriched'] / elapsed if elapsed else 0:.2f} items/s)")
+    print(f"   LLM calls:       {run['llm_calls']} ({run['llm_errors']} errors, cache hits not counted)")
+    print(f"   Est. tokens:     {run['prompt_tokens']} in / {run['completion_tokens']} out")
+    print(f"   Est. cost:       ${cost:.4f}")
+    for media_id, error in list(checkpoint["failures"].items())[:20]:
+        print(f"   ❌ {media_id}: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate AI summaries and tags for the media library")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--limit", type=int, help="stop after enriching this many items")
+    parser.add_argument("--force", action="store_true", help="re-enrich items even if they look fresh")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be enriched")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="ignore any saved checkpoint")
+    parser.add_argument("--price-in", type=float, help="USD per million input tokens")
+    parser.add_argument("--price-out", type=float, help="USD per million output tokens")
+    args = parser.parse_args()
+
+    from app.enhanced_data_store import EnhancedDataStore
+
+    print("🔌 Connecting to database...")
+    store = EnhancedDataStore()
+    checkpoint = asyncio.run(enrich_library(
+        store, model=args.model, concurrency=args.concurrency, page_size=args.page_size,
+        limit=args.limit, force=args.force, dry_run=args.dry_run,
+        checkpoint_path=args.checkpoint, restart=args.restart
+    ))
+
+    price_in, price_out = MODEL_PRICES.get(args.model, (0.0, 0.0))
+    print_report(checkpoint, args.price_in if args.price_in is not None else price_in,
+                 args.price_out if args.price_out is not None else price_out)
+    return 1 if checkpoint["failures"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
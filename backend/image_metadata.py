@@ -7,9 +7,17 @@ file information, and other relevant details.
 
 from PIL import Image, ExifTags
 import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 
+# Worker threads for batch EXIF extraction (defaults to the executor's own sizing)
+EXIF_WORKERS = int(os.getenv('EXIF_WORKERS', '0')) or None
+
+# JPEG start-of-frame markers, which carry the image dimensions
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
 def make_json_serializable(obj):
     """Recursively convert non-JSON-serializable objects (like IFDRational) to strings."""
     from PIL.TiffImagePlugin import IFDRational
@@ -202,6 +210,143 @@ def extract_image_metadata(image_path):
     
     return make_json_serializable(metadata)
 
+def _read_jpeg_headers(f):
+    """
+    Walk JPEG markers up to the start of scan without decoding pixels.
+    
+    Returns (exif_bytes, (width, height)); either may be None.
+    """
+    exif_bytes = None
+    size = None
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            break
+        code = marker[1]
+        while code == 0xFF:  # fill bytes
+            code = f.read(1)[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:  # markers without a length
+            continue
+        if code in (0xD9, 0xDA):  # end of image / start of scan
+            break
+        length = struct.unpack('>H', f.read(2))[0]
+        if code == 0xE1 and exif_bytes is None:
+            data = f.read(length - 2)
+            if data.startswith(b'Exif\x00\x00'):
+                exif_bytes = data
+            continue
+        if code in _SOF_MARKERS:
+            height, width = struct.unpack('>HH', f.read(5)[1:5])
+            size = (width, height)
+            break
+        f.seek(length - 2, 1)
+    return exif_bytes, size
+
+def _rational(value):
+    try:
+        return round(float(value), 6)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+def _text(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', errors='ignore')
+    value = str(value).strip('\x00 ') if value is not None else ''
+    return value or None
+
+def _exif_datetime(value):
+    """Convert an EXIF 'YYYY:MM:DD HH:MM:SS' timestamp to ISO 8601."""
+    try:
+        return datetime.strptime(_text(value), '%Y:%m:%d %H:%M:%S').isoformat()
+    except (TypeError, ValueError):
+        return None
+
+def _compact_record(exif, size):
+    """Build the compact typed record from a PIL Exif mapping."""
+    base = ExifTags.Base
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    gps_ifd = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    
+    record = {
+        'captured_at': _exif_datetime(exif_ifd.get(base.DateTimeOriginal) or exif.get(base.DateTime)),
+        'width': size[0] if size else None,
+        'height': size[1] if size else None,
+        'orientation': exif.get(base.Orientation),
+        'camera': {
+            'make': _text(exif.get(base.Make)),
+            'model': _text(exif.get(base.Model)),
+            'lens': _text(exif_ifd.get(base.LensModel)),
+        },
+        'exposure': {
+            'exposure_time': _rational(exif_ifd.get(base.ExposureTime)),
+            'f_number': _rational(exif_ifd.get(base.FNumber)),
+            'iso': exif_ifd.get(base.ISOSpeedRatings),
+            'focal_length': _rational(exif_ifd.get(base.FocalLength)),
+        },
+        'gps': None,
+    }
+    if isinstance(record['exposure']['iso'], tuple):
+        record['exposure']['iso'] = record['exposure']['iso'][0] if record['exposure']['iso'] else None
+    
+    gps = ExifTags.GPS
+    lat, lon = gps_ifd.get(gps.GPSLatitude), gps_ifd.get(gps.GPSLongitude)
+    if lat and lon:
+        latitude = dms_to_decimal([_rational(v) for v in lat], _text(gps_ifd.get(gps.GPSLatitudeRef)))
+        longitude = dms_to_decimal([_rational(v) for v in lon], _text(gps_ifd.get(gps.GPSLongitudeRef)))
+        if latitude is not None and longitude is not None:
+            altitude = _rational(gps_ifd.get(gps.GPSAltitude))
+            if altitude is not None and gps_ifd.get(gps.GPSAltitudeRef) in (1, b'\x01'):
+                altitude = -altitude
+            record['gps'] = {'lat': round(latitude, 7), 'lon': round(longitude, 7), 'altitude': altitude}
+    
+    return record
+
+def extract_exif_record(image_path):
+    """
+    Extract a compact, typed EXIF record without decoding pixel data.
+    
+    For JPEGs only the APP1 (EXIF) and frame header segments are read; other
+    formats fall back to PIL's lazy header parsing.
+    
+    Returns:
+        dict: captured_at (ISO 8601), width, height, orientation,
+        camera {make, model, lens}, exposure {exposure_time, f_number, iso,
+        focal_length} and gps {lat, lon, altitude} or None. On failure the
+        record is {'error': message}.
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            if f.read(2) == b'\xff\xd8':
+                exif_bytes, size = _read_jpeg_headers(f)
+                exif = Image.Exif()
+                if exif_bytes:
+                    exif.load(exif_bytes)
+                return _compact_record(exif, size)
+        
+        with Image.open(image_path) as img:
+            return _compact_record(img.getexif(), img.size)
+    except Exception as e:
+        return {'error': f"Failed to read EXIF data: {str(e)}"}
+
+def extract_exif_batch(image_paths, max_workers=None, min_parallel=32):
+    """
+    Extract compact EXIF records for many files over a thread pool.
+    
+    Header reads are I/O bound, so threads overlap them without the cost of
+    starting processes - this also runs inside the upload request handler.
+    Small batches are handled inline.
+    
+    Returns:
+        dict: image path -> record from extract_exif_record
+    """
+    image_paths = list(image_paths)
+    max_workers = max_workers or EXIF_WORKERS
+    if len(image_paths) < min_parallel or max_workers == 1:
+        return {path: extract_exif_record(path) for path in image_paths}
+    
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='exif') as pool:
+        return dict(zip(image_paths, pool.map(extract_exif_record, image_paths)))
+
 def format_metadata_for_display(metadata):
     """
     Format metadata for display in the UI.
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+One-shot import of the TinyDB local_contexts.json into the SQLite context store
+
+    python import_local_contexts.py                        # local_contexts.json -> LOCAL_DB_PATH
+    python import_local_contexts.py old.json --db my.sqlite
+
+Re-running is safe: images already in SQLite keep their summaries and tags,
+and contexts imported before are skipped.
+The JSON file is left in place; remove it once the import looks right.
+"""
+
+import argparse
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(dotenv_path='config.env')
+
+def main():
+    from app.local_db import LocalContextStore
+
+    parser = argparse.ArgumentParser(description="Import local_contexts.json into the SQLite context store")
+    parser.add_argument("json_path", nargs="?", default="local_contexts.json")
+    parser.add_argument("--db", help="SQLite file to import into (default: LOCAL_DB_PATH)")
+    args = parser.parse_args()
+
+    store = LocalContextStore(db_path=args.db)
+    print(f"📥 Importing {args.json_path} into {store.db_path}...")
+    try:
+        counts = store.import_tinydb_json(args.json_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Import failed, nothing was written: {e}")
+        return 1
+    finally:
+        store.close()
+
+    print(f"✅ Imported {counts['images']} images and {counts['contexts']} new contexts "
+          f"({counts['existing']} images already present, "
+          f"{counts['skipped']} records without an image name skipped)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,6 +23,10 @@ def init_database():
         store = EnhancedDataStore()
         
         print("✅ Database schema created successfully!")
+        
+        print("🔎 Indexing media for semantic search...")
+        indexed = store.reindex_media()
+        print(f"✅ Indexed {indexed} media items")
         print("🎯 You can now start the Flask backend with: python3 main.py")
         
         return True
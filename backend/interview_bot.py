@@ -1,18 +1,13 @@
-from app.enhanced_data_store import EnhancedDataStore
+from app.enhanced_data_store import get_store
 import openai
 import os
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path='config.env')
 
-# Lazy-load the database connection to avoid circular dependency issues
-_db = None
-
+# Lazy-load the shared store to avoid circular dependency issues
 def get_db():
-    global _db
-    if _db is None:
-        _db = EnhancedDataStore()
-    return _db
+    return get_store()
 
 # You can later expand this to use a real AI model for more advanced interviewing
 
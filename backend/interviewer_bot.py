@@ -1,10 +1,16 @@
 import openai
 import base64
+import hashlib
 import os
+import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from PIL import Image
 import io
 from prompts import get_memory_gatherer_prompt
+from conversation_window import compact_messages
+from llm_client import LLM_BACKEND, get_llm_client
 from dotenv import load_dotenv
 load_dotenv(dotenv_path='config.env')
 
@@ -13,7 +19,7 @@ load_dotenv(dotenv_path='config.env')
 # It's recommended to set it as an environment variable: export OPENAI_API_KEY='your_key_here'
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-if not openai.api_key:
+if not openai.api_key and LLM_BACKEND != "mock":
     print("Error: OPENAI_API_KEY environment variable not set.")
     print("Please set it before running, e.g., export OPENAI_API_KEY='sk-...'")
     # Only exit if this is the main module, not when imported
@@ -25,17 +31,81 @@ OUTPUT_FOLDER = "interviews"
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 current_interview_filename = ""
 
-def encode_image(image_path):
-    """Encodes an image to a base64 string."""
+# Encoded (resized, base64) images are cached in memory and on disk, keyed by
+# file identity, so each photo version is only resized once across all callers
+ENCODED_IMAGE_CACHE_DIR = os.getenv("ENCODED_IMAGE_CACHE_DIR", "image_cache")
+ENCODED_IMAGE_CACHE_SIZE = int(os.getenv("ENCODED_IMAGE_CACHE_SIZE", "64"))
+_encoded_images = OrderedDict()
+_encoded_images_lock = threading.Lock()
+
+def image_cache_key(image_path):
+    """Cache key for a local image: its absolute path, size and mtime."""
+    stat = os.stat(image_path)
+    identity = f"{os.path.abspath(image_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+def get_cached_encoded_image(cache_key):
+    """Return a cached base64 payload from memory or disk, or None."""
+    with _encoded_images_lock:
+        encoded = _encoded_images.get(cache_key)
+        if encoded is not None:
+            _encoded_images.move_to_end(cache_key)
+            return encoded
+
+    disk_path = os.path.join(ENCODED_IMAGE_CACHE_DIR, f"{cache_key}.b64")
+    try:
+        with open(disk_path, "r", encoding="ascii") as f:
+            encoded = f.read()
+    except OSError:
+        return None
+    _remember_encoded_image(cache_key, encoded)
+    return encoded
+
+def _remember_encoded_image(cache_key, encoded):
+    with _encoded_images_lock:
+        _encoded_images[cache_key] = encoded
+        _encoded_images.move_to_end(cache_key)
+        while len(_encoded_images) > ENCODED_IMAGE_CACHE_SIZE:
+            _encoded_images.popitem(last=False)
+
+def _store_encoded_image(cache_key, encoded):
+    _remember_encoded_image(cache_key, encoded)
+    try:
+        os.makedirs(ENCODED_IMAGE_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=ENCODED_IMAGE_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="ascii") as f:
+            f.write(encoded)
+        os.replace(tmp_path, os.path.join(ENCODED_IMAGE_CACHE_DIR, f"{cache_key}.b64"))
+    except OSError as e:
+        print(f"Warning: could not write encoded image cache: {e}")
+
+def encode_image(image_path, cache_key=None):
+    """Encodes an image to a base64 string.
+
+    Results are cached by ``cache_key`` (by default the file's path, size and
+    mtime), so repeated calls for the same photo skip the resize and re-encode.
+    """
     try:
+        if cache_key is None:
+            cache_key = image_cache_key(image_path)
+        cached = get_cached_encoded_image(cache_key)
+        if cached is not None:
+            return cached
+
         with Image.open(image_path) as img:
             # Resize image if too large to save tokens/cost
             max_size = (1024, 1024) # Example max dimensions
+            img.draft("RGB", max_size)
             img.thumbnail(max_size, Image.LANCZOS)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
             
             buffered = io.BytesIO()
             img.save(buffered, format="JPEG") # Use JPEG for smaller size
-            return base64.b64encode(buffered.getvalue()).decode('utf-8')
+            encoded = base64.b64encode(buffered.getvalue()).decode('utf-8')
+
+        _store_encoded_image(cache_key, encoded)
+        return encoded
     except FileNotFoundError:
         print(f"Error: Image file not found at {image_path}")
         return None
@@ -56,15 +126,10 @@ def store_conversation(question, answer, role="user"):
             f.write(f"\n**My Response:**\n{answer}\n")
             f.write("---\n") # Separator for new Q&A turn
 
-def run_interview_chat(user_text, previous_messages=None, image_path=None, system_prompt=None, existing_context=None, model="gpt-4o-mini"):
+def build_interview_messages(user_text, previous_messages=None, image_path=None, system_prompt=None, existing_context=None, encoded_image=None, keep_turns=None, token_budget=None):
     """
-    Run a single turn of the interview chat.
-    - user_text: The user's latest answer.
-    - previous_messages: The conversation so far (list of dicts).
-    - image_path: Optional local path to an image to include in the prompt.
-    - system_prompt: The system prompt to use (string). If None, use default.
-    - existing_context: Optional list of existing context strings to inform the AI.
-    Returns: (ai_question, updated_messages)
+    Build the compacted message list for the next interview turn, ending with
+    the user's message. Shared by run_interview_chat and stream_interview_chat.
     """
     if system_prompt is None:
         system_prompt = get_memory_gatherer_prompt()
@@ -94,13 +159,16 @@ def run_interview_chat(user_text, previous_messages=None, image_path=None, syste
             messages.insert(0, {"role": "system", "content": enhanced_prompt})
     
     user_input_parts = []
-    if image_path:
+    if encoded_image is None and image_path:
         encoded_image = encode_image(image_path)
-        if encoded_image:
-            user_input_parts.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{encoded_image}"}})
+    if encoded_image:
+        user_input_parts.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{encoded_image}"}})
     user_input_parts.append({"type": "text", "text": user_text})
     messages.append({"role": "user", "content": user_input_parts})
 
+    # Keep the prompt a bounded size: older turns become a summary and earlier images are dropped
+    messages = compact_messages(messages, keep_turns=keep_turns, token_budget=token_budget)
+
     # Debug logging: Print the exact prompt being sent to OpenAI
     print("\n" + "="*80)
     print("OPENAI API CALL - EXACT PROMPT:")
@@ -117,16 +185,57 @@ def run_interview_chat(user_text, previous_messages=None, image_path=None, syste
             print(f"    Content: {msg['content']}")
     print("="*80 + "\n")
 
-    response = openai.chat.completions.create(
-        model=model,
-        messages=messages,
-        max_tokens=1000,
+    return messages
+
+def run_interview_chat(user_text, previous_messages=None, image_path=None, system_prompt=None, existing_context=None, model="gpt-4o-mini", encoded_image=None, keep_turns=None, token_budget=None, client=None, cache=False):
+    """
+    Run a single turn of the interview chat.
+    - user_text: The user's latest answer.
+    - previous_messages: The conversation so far (list of dicts).
+    - image_path: Optional local path to an image to include in the prompt.
+    - encoded_image: Optional pre-encoded base64 JPEG, used instead of image_path.
+    - system_prompt: The system prompt to use (string). If None, use default.
+    - existing_context: Optional list of existing context strings to inform the AI.
+    - keep_turns / token_budget: Limits for compacting the history (see conversation_window).
+    - client: LLMClient to use (default: the shared client from llm_client).
+    - cache: Response cache mode for deterministic one-shot prompts (see LLMClient.chat).
+    Returns: (ai_question, updated_messages), with the history already compacted
+    """
+    messages = build_interview_messages(
+        user_text, previous_messages, image_path=image_path, system_prompt=system_prompt,
+        existing_context=existing_context, encoded_image=encoded_image,
+        keep_turns=keep_turns, token_budget=token_budget
     )
-    ai_question = response.choices[0].message.content
+
+    ai_question = (client or get_llm_client()).chat(messages, model=model, max_tokens=1000, cache=cache)
     messages.append({"role": "assistant", "content": ai_question})
     return ai_question, messages
 
-def generate_image_tags(image_path, context, summary, model="gpt-4o-mini", existing_tags=None):
+def stream_interview_chat(user_text, previous_messages=None, image_path=None, system_prompt=None, existing_context=None, model="gpt-4o-mini", encoded_image=None, keep_turns=None, token_budget=None, client=None):
+    """
+    Streaming variant of run_interview_chat, for low time-to-first-token.
+    Takes the same arguments and returns (token_iterator, messages).
+
+    The iterator yields reply text fragments as the model produces them.
+    ``messages`` is the compacted history; the assistant reply is appended to
+    it exactly once, after the iterator is exhausted.
+    """
+    messages = build_interview_messages(
+        user_text, previous_messages, image_path=image_path, system_prompt=system_prompt,
+        existing_context=existing_context, encoded_image=encoded_image,
+        keep_turns=keep_turns, token_budget=token_budget
+    )
+
+    def tokens():
+        parts = []
+        for delta in (client or get_llm_client()).chat_stream(messages, model=model, max_tokens=1000):
+            parts.append(delta)
+            yield delta
+        messages.append({"role": "assistant", "content": "".join(parts)})
+
+    return tokens(), messages
+
+def generate_image_tags(image_path, context, summary, model="gpt-4o-mini", existing_tags=None, client=None, cache=False):
     if existing_tags is None:
         existing_tags = []
     tag_list_str = ', '.join(sorted(existing_tags))
@@ -147,15 +256,15 @@ def generate_image_tags(image_path, context, summary, model="gpt-4o-mini", exist
     print(f"User: {prompt}")
     print("="*80 + "\n")
 
-    response = openai.chat.completions.create(
-        model=model,
-        messages=[
+    content = (client or get_llm_client()).chat(
+        [
             {"role": "system", "content": "You are an expert photo tagger."},
             {"role": "user", "content": prompt}
         ],
-        max_tokens=100
+        model=model,
+        max_tokens=100,
+        cache=cache
     )
-    content = response.choices[0].message.content if response.choices[0].message.content else ''
     tags = [tag.strip() for tag in content.strip().split(',') if tag.strip()]
     return tags
 
@@ -213,12 +322,11 @@ def main():
                     print(f"    Content: {msg['content']}")
             print("="*80 + "\n")
             
-            response = openai.chat.completions.create(
+            chronicler_question = get_llm_client().chat(
+                messages,
                 model="gpt-4o-mini", # Or "gpt-4o", "gpt-4-turbo" for more advanced models (higher cost)
-                messages=messages,
                 max_tokens=500,
             )
-            chronicler_question = response.choices[0].message.content
             print(f"\n{chronicler_question}\n")
             
             messages.append({"role": "assistant", "content": chronicler_question})
@@ -0,0 +1,258 @@
+"""
+LLM Client Module
+
+One shared client for chat completions. Every call goes through a token-bucket
+rate limiter (requests and tokens per minute) and a concurrency limit, and the
+OpenAI backend reuses a single pooled HTTP connection set with per-call
+timeouts and the SDK's retry/backoff on 429 and 5xx responses.
+
+Set LLM_BACKEND=mock to use a deterministic offline backend instead, for tests,
+benchmarks and load tests without API keys.
+
+Deterministic callers can pass ``cache=True`` to ``chat`` to serve repeated
+identical requests from the persistent response cache (see llm_cache), or
+``cache="refresh"`` to skip the lookup and store a fresh reply.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from conversation_window import estimate_text_tokens, estimate_tokens
+from llm_cache import cache_key, get_response_cache
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_MOCK_LATENCY_MS = float(os.getenv("LLM_MOCK_LATENCY_MS", "0"))
+
+class TokenBucket:
+    """Refills ``rate`` units per second up to ``capacity``; ``acquire`` blocks until enough are available."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1.0):
+        """Take ``amount`` units, sleeping as needed. Returns the time spent waiting."""
+        # A request larger than the bucket would otherwise never fit
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class OpenAIBackend:
+    """Chat completions through one pooled OpenAI client."""
+
+    def __init__(self, api_key=None, base_url=None, timeout=None, max_retries=None, max_connections=None):
+        import httpx
+        import openai
+
+        max_connections = max_connections or LLM_MAX_CONCURRENCY
+        self.client = openai.OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url or os.getenv("OPENAI_BASE_URL"),
+            timeout=timeout or LLM_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES if max_retries is None else max_retries,
+            http_client=openai.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections)
+            ),
+        )
+
+    def _client(self, timeout):
+        return self.client.with_options(timeout=timeout) if timeout else self.client
+
+    def complete(self, model, messages, max_tokens, timeout=None, **params):
+        response = self._client(timeout).chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, **params
+        )
+        return response.choices[0].message.content or ""
+
+    def stream(self, model, messages, max_tokens, timeout=None, **params):
+        stream = self._client(timeout).chat.completions.create(
+            model=model, messages=messages, max_tokens=max_tokens, stream=True, **params
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+class MockBackend:
+    """
+    Deterministic offline backend.
+
+    The reply is a comma-separated list of words picked from the last user
+    message, chosen by a hash of the whole conversation, so the same request
+    always gets the same answer and tag parsers still get sensible output.
+    """
+
+    def __init__(self, latency_ms=None):
+        self.latency = (LLM_MOCK_LATENCY_MS if latency_ms is None else latency_ms) / 1000.0
+
+    @staticmethod
+    def reply(model, messages, max_tokens):
+        digest = hashlib.sha256(repr((model, messages)).encode("utf-8")).hexdigest()
+        last_user = next((m for m in reversed(messages) if m.get("role") == "user"), {})
+        content = last_user.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+        words = sorted(set(w.lower() for w in re.findall(r"[A-Za-z]{4,}", content)),
+                       key=lambda w: hashlib.sha256((digest + w).encode("utf-8")).hexdigest())
+        reply = ", ".join(words[:6]) or f"mock reply {digest[:8]}"
+        # Roughly respect max_tokens at ~4 characters per token
+        return reply[:max(1, max_tokens) * 4]
+
+    def complete(self, model, messages, max_tokens, timeout=None, **params):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.reply(model, messages, max_tokens)
+
+    def stream(self, model, messages, max_tokens, timeout=None, **params):
+        pieces = re.findall(r"\S+\s*", self.reply(model, messages, max_tokens))
+        for piece in pieces:
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield piece
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "mock": MockBackend,
+}
+
+class LLMClient:
+    """Rate-limited, concurrency-bounded chat completions over a pluggable backend."""
+
+    def __init__(self, backend=None, max_concurrency=None, requests_per_minute=None,
+                 tokens_per_minute=None, timeout=None, response_cache=None):
+        """
+        ``backend`` is a backend instance or a name from BACKENDS (default: LLM_BACKEND).
+        ``response_cache`` defaults to the shared llm_cache.ResponseCache.
+        """
+        if backend is None or isinstance(backend, str):
+            name = backend or LLM_BACKEND
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown LLM backend '{name}', use one of: {', '.join(BACKENDS)}")
+            backend = BACKENDS[name]()
+        self.backend = backend
+        self.timeout = timeout or LLM_TIMEOUT
+        self._response_cache = response_cache
+
+        requests_per_minute = requests_per_minute or LLM_REQUESTS_PER_MINUTE
+        tokens_per_minute = tokens_per_minute or LLM_TOKENS_PER_MINUTE
+        # Allow bursts of up to one second's worth of the per-minute budget
+        self._requests = TokenBucket(requests_per_minute / 60.0, max(1.0, requests_per_minute / 60.0))
+        self._tokens = TokenBucket(tokens_per_minute / 60.0, max(1.0, tokens_per_minute / 60.0))
+        self._slots = threading.BoundedSemaphore(max_concurrency or LLM_MAX_CONCURRENCY)
+
+        self._stats_lock = threading.Lock()
+        # Token counts are estimates (see conversation_window), for cost reporting
+        self._stats = {"calls": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0,
+                       "throttled_seconds": 0.0, "latency_seconds": 0.0,
+                       "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _acquire(self, messages, max_tokens):
+        prompt_tokens = estimate_tokens(messages)
+        waited = self._requests.acquire(1)
+        waited += self._tokens.acquire(prompt_tokens + max_tokens)
+        self._slots.acquire()
+        with self._stats_lock:
+            self._stats["throttled_seconds"] += waited
+            self._stats["in_flight"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
+            self._stats["prompt_tokens"] += prompt_tokens
+        return time.monotonic()
+
+    def _release(self, started, failed, reply=""):
+        self._slots.release()
+        with self._stats_lock:
+            self._stats["in_flight"] -= 1
+            self._stats["calls"] += 1
+            self._stats["errors"] += 1 if failed else 0
+            self._stats["latency_seconds"] += time.monotonic() - started
+            self._stats["completion_tokens"] += estimate_text_tokens(reply)
+
+    @property
+    def response_cache(self):
+        if self._response_cache is None:
+            self._response_cache = get_response_cache()
+        return self._response_cache
+
+    def chat(self, messages: List[Dict[str, Any]], model: str = "gpt-4o-mini",
+             max_tokens: int = 1000, timeout: Optional[float] = None,
+             cache: Union[bool, str] = False, **params) -> str:
+        """
+        Return the reply text for a chat completion.
+
+        ``cache`` is False (no caching), True (reuse a cached reply for an
+        identical request) or "refresh" (ignore any cached reply but store the new one).
+        """
+        key = None
+        if cache:
+            key = cache_key(model, messages, {"max_tokens": max_tokens, **params})
+            if cache == "refresh":
+                self.response_cache.record_bypass()
+            else:
+                cached = self.response_cache.get(key)
+                if cached is not None:
+                    return cached
+
+        started = self._acquire(messages, max_tokens)
+        failed, reply = True, ""
+        try:
+            reply = self.backend.complete(model, messages, max_tokens, timeout=timeout or self.timeout, **params)
+            failed = False
+        finally:
+            self._release(started, failed, reply)
+
+        if key is not None:
+            self.response_cache.set(key, model, reply)
+        return reply
+
+    def chat_stream(self, messages: List[Dict[str, Any]], model: str = "gpt-4o-mini",
+                    max_tokens: int = 1000, timeout: Optional[float] = None, **params) -> Iterator[str]:
+        """Yield reply text fragments as they arrive. Holds a concurrency slot until exhausted."""
+        started = self._acquire(messages, max_tokens)
+        failed, parts = True, []
+        try:
+            for part in self.backend.stream(model, messages, max_tokens, timeout=timeout or self.timeout, **params):
+                parts.append(part)
+                yield part
+            failed = False
+        finally:
+            self._release(started, failed, "".join(parts))
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_latency_seconds"] = stats["latency_seconds"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = LLMClient()
+    return _shared_client
@@ -1,13 +1,18 @@
 import os
+import hashlib
+import uuid
+from datetime import datetime
 from flask import Flask, jsonify, request, render_template, send_file, redirect, url_for, flash, session
 from flask_cors import CORS
 from dotenv import load_dotenv
-from app.enhanced_data_store import EnhancedDataStore
+from app.enhanced_data_store import get_store, MEDIA_TILE_FIELDS
 import mimetypes
 from io import BytesIO
 from interview_bot import run_interview
 from interviewer_bot import run_interview_chat
 from app.enhanced_routes import enhanced_bp
+from app.jobs import get_job_queue
+from app.renditions import get_rendition, parse_rendition_args, rendition_mimetype, file_fingerprint
 
 # Load environment variables from config.env
 load_dotenv(dotenv_path='config.env')
@@ -15,13 +20,17 @@ load_dotenv(dotenv_path='config.env')
 app = Flask(__name__)
 
 # Enable CORS for React frontend
-CORS(app, origins=['http://localhost:5173', 'http://localhost:3000', 'http://127.0.0.1:5173'])
+CORS(app, origins=['http://localhost:5173', 'http://localhost:3000', 'http://127.0.0.1:5173'],
+     expose_headers=['ETag', 'X-Next-After'])
 
 # Register the enhanced routes blueprint
 app.register_blueprint(enhanced_bp)
 
-# Enhanced Data Store setup (PostgreSQL)
-enhanced_db = EnhancedDataStore()
+# Shared Enhanced Data Store (pooled PostgreSQL); schema is initialised once at startup
+enhanced_db = get_store()
+
+# Start background workers now so jobs left over from a previous run resume
+get_job_queue()
 
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev_secret')  # Needed for session
 
@@ -39,11 +48,59 @@ def health_check():
 
 @app.route('/api/media')
 def list_media():
-    """Lists media from the local database."""
+    """Lists media from the local database.
+    
+    Supports keyset pagination (``?after=<created_at>,<id>&limit=``) and
+    ``?fields=tile`` (or a comma-separated column list) for lightweight
+    gallery payloads. ``?tags=a,b`` keeps items having every listed tag and
+    ``?any_tags=c,d`` items having at least one. The cursor for the next page is returned in the
+    ``X-Next-After`` header. Responses carry an ETag derived from the media
+    library version, so unchanged galleries get a 304.
+    """
     try:
-        # Get all media items from the database
-        items = enhanced_db.list_media_items()
-        return jsonify(items)
+        etag = f"media-{enhanced_db.get_media_library_version()}-{hashlib.sha1(request.query_string).hexdigest()[:12]}"
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            return jsonify({"error": "limit must be positive"}), 400
+        
+        after = None
+        if request.args.get('after'):
+            try:
+                created_at, item_id = request.args['after'].rsplit(',', 1)
+                after = (datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(item_id)))
+            except ValueError:
+                return jsonify({"error": "after must be '<created_at>,<id>'"}), 400
+        
+        fields = request.args.get('fields')
+        if fields == 'tile':
+            fields = list(MEDIA_TILE_FIELDS)
+        elif fields:
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+        
+        all_tags = [t for t in request.args.get('tags', '').split(',') if t.strip()]
+        any_tags = [t for t in request.args.get('any_tags', '').split(',') if t.strip()]
+        
+        try:
+            if all_tags or any_tags:
+                items = enhanced_db.media_by_tags(all_tags=all_tags, any_tags=any_tags,
+                                                  limit=limit, after=after, fields=fields)
+            else:
+                items = enhanced_db.list_media_items(limit=limit, after=after, fields=fields)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        response = jsonify(items)
+        if limit is not None and len(items) == limit:
+            last = items[-1]
+            response.headers['X-Next-After'] = f"{last['created_at'].isoformat()},{last['id']}"
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({"error": f"Failed to list media: {str(e)}"}), 500
 
@@ -57,7 +114,11 @@ def get_media_item(doc_id):
 
 @app.route('/api/media/<doc_id>/preview')
 def preview_media(doc_id):
-    """Preview media file from local storage."""
+    """Preview media file from local storage.
+    
+    With ``?w=&h=&fmt=webp|jpeg`` a cached, resized rendition is served instead
+    of the original upload. Responses carry strong ETags and support Range.
+    """
     item = enhanced_db.get_media_item(doc_id)
     if not item:
         return jsonify({"error": "Media item not found"}), 404
@@ -73,6 +134,27 @@ def preview_media(doc_id):
         if not os.path.exists(file_path):
             return jsonify({"error": "File not found"}), 404
         
+        width = request.args.get('w', type=int)
+        height = request.args.get('h', type=int)
+        fmt = request.args.get('fmt')
+        
+        if width is not None or height is not None or fmt is not None:
+            try:
+                width, height, fmt = parse_rendition_args(width, height, fmt)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            rendition_path, etag = get_rendition(file_path, width, height, fmt)
+            return send_file(
+                rendition_path,
+                mimetype=rendition_mimetype(fmt),
+                as_attachment=False,
+                download_name=os.path.splitext(os.path.basename(file_path))[0] + os.path.splitext(rendition_path)[1],
+                conditional=True,
+                etag=etag,
+                max_age=86400
+            )
+        
         # Get the content type
         content_type, _ = mimetypes.guess_type(file_path)
         if not content_type:
@@ -82,7 +164,10 @@ def preview_media(doc_id):
             file_path,
             mimetype=content_type,
             as_attachment=False,
-            download_name=os.path.basename(file_path)
+            download_name=os.path.basename(file_path),
+            conditional=True,
+            etag=file_fingerprint(file_path),
+            max_age=3600
         )
     except Exception as e:
         return jsonify({"error": f"Failed to load media: {str(e)}"}), 500
@@ -0,0 +1,145 @@
+"""
+Image Metadata Cache Module
+
+Caches the results of image_metadata extractors keyed by file fingerprint
+(absolute path, size, mtime_ns). Lookups check an in-memory LRU first, then a
+persistent SQLite table, and only parse the file when both miss. A changed
+file has a new fingerprint, so stale entries are replaced automatically.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from image_metadata import extract_image_metadata, extract_exif_record
+
+METADATA_CACHE_PATH = os.getenv("METADATA_CACHE_PATH", "metadata_cache.sqlite")
+METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "2048"))
+
+# Cache kind -> extractor
+EXTRACTORS = {
+    "full": extract_image_metadata,
+    "exif": extract_exif_record,
+}
+
+class MetadataCache:
+    """Two-tier (memory LRU + SQLite) cache of per-file metadata."""
+
+    def __init__(self, db_path=None, max_entries=None):
+        self.db_path = db_path or METADATA_CACHE_PATH
+        self.max_entries = max_entries or METADATA_CACHE_SIZE
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "invalidations": 0}
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS metadata_cache (
+                path TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (path, kind)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, image_path, kind="full"):
+        """
+        Return cached metadata for a file, extracting it on a miss.
+
+        The returned dict is shared with the cache and must not be modified.
+        """
+        extractor = EXTRACTORS[kind]
+        path = os.path.abspath(image_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Let the extractor produce its usual error record; don't cache it
+            return extractor(image_path)
+        fingerprint = (stat.st_size, stat.st_mtime_ns)
+        key = (path, kind)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[1]
+
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, data FROM metadata_cache WHERE path = ? AND kind = ?", key
+            ).fetchone()
+            if row is not None and (row[0], row[1]) == fingerprint:
+                value = json.loads(row[2])
+                self._remember(key, fingerprint, value)
+                self._stats["disk_hits"] += 1
+                return value
+
+            if entry is not None or row is not None:
+                self._stats["invalidations"] += 1
+            self._stats["misses"] += 1
+
+        # Parse outside the lock so concurrent misses on different files don't serialize
+        value = extractor(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadata_cache (path, kind, size, mtime_ns, data) VALUES (?, ?, ?, ?, ?)",
+                (path, kind, fingerprint[0], fingerprint[1], json.dumps(value))
+            )
+            self._conn.commit()
+            self._remember(key, fingerprint, value)
+        return value
+
+    def _remember(self, key, fingerprint, value):
+        self._memory[key] = (fingerprint, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        """Return hit/miss counters and the hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM metadata_cache").fetchone()[0]
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop all cached entries and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM metadata_cache")
+            self._conn.commit()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def close(self):
+        self._conn.close()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_metadata_cache():
+    """Return the process-wide metadata cache."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = MetadataCache()
+    return _shared_cache
+
+def cached_image_metadata(image_path):
+    """Cached extract_image_metadata."""
+    return get_metadata_cache().get(image_path, "full")
+
+def cached_exif_record(image_path):
+    """Cached extract_exif_record."""
+    return get_metadata_cache().get(image_path, "exif")
@@ -5,6 +5,8 @@ This file contains all the prompts used by the AI interviewer and other AI funct
 Centralizing prompts here makes them easier to find, edit, and maintain.
 """
 
+import re
+
 # =============================================================================
 # INTERVIEWER PROMPTS
 # =============================================================================
@@ -105,4 +107,15 @@ def build_context_summary(context_texts):
         context_list = "\n".join(f"- {t}" for t in context_texts)
         return CONTEXT_SUMMARY_TEMPLATE.format(context_list=context_list)
     else:
-        return CONTEXT_SUMMARY_TEMPLATE.format(context_list="No additional context provided.") 
\ No newline at end of file
+        return CONTEXT_SUMMARY_TEMPLATE.format(context_list="No additional context provided.") 
+
+def parse_structured_summary(summary_text):
+    # Accepts both "Summary:" and "### Summary:" (same for other sections)
+    title = summary = ""
+    title_match = re.search(r"Title:\s*([\s\S]*?)(?=\n\s*(?:###\s*)?Summary:|$)", summary_text, re.IGNORECASE)
+    summary_match = re.search(r"(?:###\s*)?Summary:\s*([\s\S]*)", summary_text, re.IGNORECASE)
+    if title_match:
+        title = title_match.group(1).strip()
+    if summary_match:
+        summary = summary_match.group(1).strip()
+    return title, summary
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Incrementally sync a photo directory into the media library
+
+    python sync_library.py PHOTO_DIR             # one sync
+    python sync_library.py PHOTO_DIR --dry-run   # show the diff only
+    python sync_library.py PHOTO_DIR --watch     # keep syncing as files change
+"""
+
+import argparse
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv(dotenv_path='config.env')
+
+def print_diff(diff, counts):
+    for entry in diff.added:
+        print(f"   ➕ {entry.path}")
+    for old, new in diff.updated:
+        print(f"   ✏️ {new.path}")
+    for old, new in diff.moved:
+        print(f"   🔀 {old.path} -> {new.path}")
+    for entry in diff.deleted:
+        print(f"   🗑️ {entry.path}")
+    print(f"📊 {counts}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync a photo directory into the media library")
+    parser.add_argument("root", help="directory to sync (recursively)")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would change")
+    parser.add_argument("--watch", action="store_true", help="keep running and sync on file changes")
+    parser.add_argument("--poll-interval", type=float, default=30.0,
+                        help="seconds between rescans when watchdog is not installed")
+    parser.add_argument("--allow-mass-delete", action="store_true",
+                        help="allow a sync to remove most of the items under the directory")
+    args = parser.parse_args()
+
+    from app.enhanced_data_store import EnhancedDataStore
+    from app.library_sync import LibrarySync, SyncError
+
+    print("🔌 Connecting to database...")
+    sync = LibrarySync(EnhancedDataStore(), args.root)
+
+    if args.watch:
+        print(f"👀 Watching {sync.root} (Ctrl+C to stop)")
+        try:
+            sync.watch(poll_interval=args.poll_interval,
+                       on_sync=lambda diff, counts: None if diff.is_empty() else print_diff(diff, counts))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    try:
+        diff, counts = sync.sync(dry_run=args.dry_run, allow_mass_delete=args.allow_mass_delete)
+    except SyncError as e:
+        print(f"❌ {e}")
+        return 1
+    print_diff(diff, counts)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
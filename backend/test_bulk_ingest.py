@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk document and media ingestion
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+Embeddings use the offline hashing model.
+"""
+
+import hashlib
+import json
+import sys
+import uuid
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+from flask import Flask
+
+load_dotenv(dotenv_path='config.env')
+
+from app import embeddings
+from app.enhanced_data_store import get_store
+from app.enhanced_routes import enhanced_bp
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def count_rows(store, table, ids):
+    with store._connection() as conn, conn.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE id = ANY(%s::uuid[])", (list(ids),))
+        return cursor.fetchone()[0]
+
+def test_documents_bulk_ids_and_rows():
+    """Test that every document gets its own ID, in input order, across chunks."""
+    print("🧪 Testing bulk document insert...")
+
+    store = make_store()
+    marker = uuid.uuid4().hex[:8]
+    documents = [{'type': 'note', 'title': f'Bulk {marker} {i}', 'content': f'Bulk note {i}',
+                  'metadata': {'i': i}} for i in range(5)]
+    doc_ids = store.add_documents_bulk(documents, chunk_size=2)
+    try:
+        assert len(doc_ids) == 5 and len(set(doc_ids)) == 5
+        assert count_rows(store, 'documents', doc_ids) == 5
+        assert [store.get_document(doc_id)['title'] for doc_id in doc_ids] == [doc['title'] for doc in documents]
+        assert len(store.documents_collection.get(ids=doc_ids)['ids']) == 5
+        assert store.add_documents_bulk([]) == []
+    finally:
+        for doc_id in doc_ids:
+            store.delete_document(doc_id)
+    print(f"✅ {len(doc_ids)} documents inserted over 3 chunks")
+
+def test_media_bulk_skips_duplicate_hashes():
+    """Test that duplicate content hashes come back as None and insert no row."""
+    print("\n🖼️ Testing bulk media insert...")
+
+    store = make_store()
+    hashes = [hashlib.sha256(uuid.uuid4().bytes).hexdigest() for _ in range(3)]
+    existing = store.add_media_item('existing.jpg', {'title': 'Existing'}, content_hash=hashes[0])
+    items = [
+        {'file_path': 'bulk_0.jpg', 'content_hash': hashes[1], 'metadata': {'title': 'First'}},
+        {'file_path': 'bulk_1.jpg', 'content_hash': hashes[0]},
+        {'file_path': 'bulk_2.jpg', 'content_hash': hashes[2], 'file_size': 42},
+        {'file_path': 'bulk_3.jpg', 'content_hash': hashes[1]},
+        {'file_path': 'bulk_4.jpg'},
+    ]
+    media_ids = store.add_media_items_bulk(items, chunk_size=2)
+    inserted = [media_id for media_id in media_ids if media_id]
+    try:
+        assert len(media_ids) == 5
+        assert [media_id is None for media_id in media_ids] == [False, True, False, True, False]
+        assert count_rows(store, 'media', inserted) == 3
+        assert store.get_media_item(media_ids[0])['title'] == 'First'
+        assert store.get_media_item(media_ids[2])['file_size'] == 42
+        assert store.get_media_item(media_ids[4])['file_path'] == 'bulk_4.jpg'
+    finally:
+        store.delete_media_items_bulk(inserted + [existing])
+    print(f"✅ {len(inserted)} inserted, {media_ids.count(None)} duplicates skipped")
+
+def test_documents_bulk_route():
+    """Test POST /api/documents/bulk with an NDJSON body."""
+    print("\n📨 Testing the bulk route...")
+
+    store = make_store()
+    app = Flask(__name__)
+    app.register_blueprint(enhanced_bp)
+    client = app.test_client()
+
+    body = "\n".join(json.dumps({'type': 'note', 'title': f'Routed {i}', 'content': 'via NDJSON'})
+                     for i in range(3)) + "\n\n"
+    response = client.post('/api/documents/bulk?chunk_size=2', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 201
+    data = response.get_json()
+    try:
+        assert data['count'] == 3
+        assert count_rows(store, 'documents', data['ids']) == 3
+    finally:
+        for doc_id in data['ids']:
+            store.delete_document(doc_id)
+
+    response = client.post('/api/documents/bulk', data='{"type": "note"}\n', content_type='application/x-ndjson')
+    assert response.status_code == 400
+    print("✅ NDJSON ingested, bad lines rejected")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
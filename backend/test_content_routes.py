@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for the content routes
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+LLM calls use the mock backend and embeddings the offline hashing model.
+"""
+
+import os
+import sys
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+from flask import Flask
+
+load_dotenv(dotenv_path='config.env')
+# Run jobs explicitly with run_pending() instead of on background workers
+os.environ.setdefault('JOB_WORKERS', '0')
+
+import llm_client
+from app import embeddings
+from app.enhanced_data_store import get_store
+from app.enhanced_routes import enhanced_bp
+from app.jobs import get_job_queue
+
+def make_client():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    llm_client._shared_client = llm_client.LLMClient(backend=llm_client.MockBackend())
+    try:
+        store = get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+    app = Flask(__name__)
+    app.register_blueprint(enhanced_bp)
+    return app.test_client(), store
+
+def test_add_transcript_creates_photocard_and_enriches():
+    """Test that a transcript gets a linked photocard and its enrichment job runs."""
+    print("🧪 Testing transcript upload...")
+
+    client, store = make_client()
+    response = client.post('/api/content/add', json={
+        "type": "transcript",
+        "title": "Harbour interview",
+        "content": "We sailed out of Falmouth harbour every summer with Grandad."
+    })
+    body = response.get_json()
+
+    assert response.status_code == 202, body
+    assert "warning" not in body
+    photocard = store.get_media_item(body["photocard_id"])
+    assert str(photocard["document_id"]) == body["id"]
+
+    get_job_queue().run_pending()
+    job = get_job_queue().get_job(body["job_id"])
+    assert job["status"] == "done", job
+
+    photocard = store.get_media_item(body["photocard_id"])
+    assert photocard["summary"]
+    assert store.get_document(body["id"])["metadata"]["ai_summary"] == photocard["summary"]
+
+    store.delete_media_item(body["photocard_id"])
+    store.delete_document(body["id"])
+    print(f"✅ Photocard {body['photocard_id']} linked and enriched")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
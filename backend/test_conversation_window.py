@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script for interview history compaction
+Runs entirely locally - no OpenAI calls needed
+"""
+
+import sys
+
+import pytest
+
+from conversation_window import (
+    SUMMARY_PREFIX, IMAGE_PLACEHOLDER, compact_messages, estimate_tokens
+)
+
+def make_history(turns, with_image=True):
+    """Build a system prompt plus ``turns`` user/assistant exchanges."""
+    messages = [{"role": "system", "content": "You are a friendly interviewer."}]
+    for i in range(turns):
+        parts = [{"type": "text", "text": f"Answer number {i} about the beach trip."}]
+        if i == 0 and with_image:
+            parts.insert(0, {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64," + "A" * 5000}})
+        messages.append({"role": "user", "content": parts})
+        messages.append({"role": "assistant", "content": f"Question number {i + 1}?"})
+    return messages
+
+def test_keeps_recent_turns():
+    """Test that the system prompt and last N turns survive verbatim."""
+    print("🧪 Testing recent turns are kept...")
+
+    history = make_history(10)
+    compacted = compact_messages(history, keep_turns=3, token_budget=10000)
+
+    assert compacted[0] == history[0]
+    assert compacted[1]["content"].startswith(SUMMARY_PREFIX)
+    assert compacted[2:] == history[-6:]
+    assert "Answer number 0" in compacted[1]["content"]
+    print("✅ System prompt, summary and last 3 turns kept")
+
+def test_strips_earlier_images():
+    """Test that image payloads are only sent on the turn that includes them."""
+    print("\n🖼️ Testing image stripping...")
+
+    history = make_history(2)
+    compacted = compact_messages(history, keep_turns=5, token_budget=10000)
+    first_user = compacted[1]["content"]
+
+    assert not any(part.get("type") == "image_url" for part in first_user)
+    assert first_user[0]["text"] == IMAGE_PLACEHOLDER
+
+    # The newest message keeps its image
+    latest = make_history(1)[:-1]
+    assert compact_messages(latest)[-1] == latest[-1]
+    print("✅ Earlier images replaced with a placeholder")
+
+def test_bounded_cost():
+    """Test that long interviews stay under the budget and cost the same per turn."""
+    print("\n📏 Testing token budget...")
+
+    history = make_history(1)
+    sizes = []
+    for i in range(40):
+        history = compact_messages(history, keep_turns=4, token_budget=400)
+        sizes.append(estimate_tokens(history))
+        history.append({"role": "user", "content": [{"type": "text", "text": f"Long answer {i} " * 20}]})
+        history.append({"role": "assistant", "content": "Tell me more?"})
+
+    assert max(sizes) <= 400, f"History exceeded the budget: {max(sizes)} tokens"
+    assert sizes[-1] <= sizes[10] * 1.2, f"Prompt kept growing: {sizes[10]} -> {sizes[-1]} tokens"
+    print(f"✅ Prompt size stable at ~{sizes[-1]} tokens after 40 turns")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
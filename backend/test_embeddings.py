@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached embedding service
+Uses the hashing model - no model download or ChromaDB collection needed
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+import pytest
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+import embeddings
+from embeddings import EmbeddingService, HashingModel
+
+class CountingModel:
+    """Hashing model that records every batch it is asked to embed."""
+
+    def __init__(self):
+        self.model = HashingModel(dimensions=32)
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return self.model(texts)
+
+def test_cache_reuse():
+    """Test that unchanged text is never embedded twice, even across restarts."""
+    print("🧪 Testing embedding cache...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = os.path.join(tmp_dir, 'embeddings.sqlite')
+        model = CountingModel()
+        service = EmbeddingService('hash', cache_path=cache_path, batch_wait_ms=0, embed_fn=model)
+
+        first = service.embed(["Trip to Paris", "Beach day", "Trip to Paris"])
+        assert first[0] == first[2]
+        assert model.batches == [["Trip to Paris", "Beach day"]]
+
+        # Lightly edited set: only the new text is computed
+        second = service(["Beach day", "Beach day at sunset"])
+        assert model.batches[-1] == ["Beach day at sunset"]
+        assert second[0] == first[1]
+        service.close()
+
+        restarted_model = CountingModel()
+        restarted = EmbeddingService('hash', cache_path=cache_path, batch_wait_ms=0, embed_fn=restarted_model)
+        assert restarted.embed(["Trip to Paris"])[0] == first[0]
+        assert restarted_model.batches == [], "Cache was not reused after restart"
+        stats = restarted.stats()
+        restarted.close()
+
+    assert stats['cache_entries'] == 3
+    assert stats['hit_rate'] == 1.0
+    print(f"✅ Cache reused: {stats}")
+
+def test_micro_batching():
+    """Test that concurrent writers share model calls."""
+    print("\n📦 Testing micro-batching...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model = CountingModel()
+        service = EmbeddingService('hash', cache_path=os.path.join(tmp_dir, 'embeddings.sqlite'),
+                                   batch_wait_ms=50, batch_size=64, embed_fn=model)
+
+        results = {}
+        def write(i):
+            results[i] = service.embed([f"document number {i}"])[0]
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        service.close()
+
+    assert len(results) == 16
+    assert len(model.batches) < 16, f"Expected shared batches, got {len(model.batches)} model calls"
+    assert results[3] == HashingModel(dimensions=32)(["document number 3"])[0]
+    print(f"✅ 16 writers served by {len(model.batches)} model call(s)")
+
+def test_cache_write_failure_fails_batch(monkeypatch):
+    """Test that a locked cache fails the waiting callers and the batcher keeps running."""
+    print("\n🔒 Testing cache write failures...")
+
+    monkeypatch.setattr(embeddings, 'EMBEDDING_CACHE_BUSY_TIMEOUT_MS', 50)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = os.path.join(tmp_dir, 'embeddings.sqlite')
+        service = EmbeddingService('hash', cache_path=cache_path, batch_wait_ms=0, embed_fn=CountingModel())
+
+        blocker = sqlite3.connect(cache_path)
+        blocker.execute("BEGIN EXCLUSIVE")
+        with pytest.raises(sqlite3.OperationalError):
+            service.embed(["Written while locked"])
+        blocker.rollback()
+        blocker.close()
+
+        # Nothing is left pending and the same text embeds once the lock is gone
+        assert service._pending == {}
+        vector = service.embed(["Written while locked"])[0]
+        assert vector == HashingModel(dimensions=32)(["Written while locked"])[0]
+        assert service._worker.is_alive()
+        service.close()
+    print("✅ Failed batch raised to its callers, next batch succeeded")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
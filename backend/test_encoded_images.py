@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the encoded interview image cache
+Uses temporary images and cache directories - no OpenAI calls needed
+"""
+
+import base64
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+from PIL import Image
+
+import interviewer_bot
+from interviewer_bot import encode_image, get_cached_encoded_image, image_cache_key
+
+@pytest.fixture
+def cache_dir(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkeypatch.setattr(interviewer_bot, 'ENCODED_IMAGE_CACHE_DIR', os.path.join(tmp_dir, 'cache'))
+        monkeypatch.setattr(interviewer_bot, '_encoded_images', interviewer_bot.OrderedDict())
+        yield tmp_dir
+
+# Unpatched, so decoding results doesn't count as a cache miss
+image_open = Image.open
+
+def decode(encoded):
+    return image_open(io.BytesIO(base64.b64decode(encoded)))
+
+def count_opens(monkeypatch):
+    opened = []
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return image_open(*args, **kwargs)
+    monkeypatch.setattr(interviewer_bot.Image, 'open', counting_open)
+    return opened
+
+def test_encode_resizes_to_jpeg(cache_dir):
+    """Test that large and transparent images come back as JPEGs of at most 1024px."""
+    print("🧪 Testing image encoding...")
+
+    path = os.path.join(cache_dir, 'large.png')
+    Image.new('RGBA', (2048, 1536), (10, 120, 200, 128)).save(path)
+
+    with decode(encode_image(path)) as img:
+        assert img.format == 'JPEG'
+        assert img.size == (1024, 768)
+    assert encode_image(os.path.join(cache_dir, 'missing.jpg')) is None
+    print("✅ Encoded as a 1024px JPEG")
+
+def test_repeat_calls_skip_the_resize(cache_dir, monkeypatch):
+    """Test that the same photo is decoded once, then served from memory and disk."""
+    print("\n🗃️ Testing encoded image cache...")
+
+    path = os.path.join(cache_dir, 'photo.jpg')
+    Image.new('RGB', (1600, 1200), (200, 120, 40)).save(path)
+    opened = count_opens(monkeypatch)
+
+    first = encode_image(path)
+    assert encode_image(path) == first
+    assert len(opened) == 1
+
+    # A restart empties the memory tier; the .b64 file on disk still serves it
+    monkeypatch.setattr(interviewer_bot, '_encoded_images', interviewer_bot.OrderedDict())
+    assert encode_image(path) == first
+    assert len(opened) == 1
+    assert os.path.exists(os.path.join(interviewer_bot.ENCODED_IMAGE_CACHE_DIR, f"{image_cache_key(path)}.b64"))
+
+    # Editing the photo changes its key, so the new version is encoded
+    Image.new('RGB', (800, 800), (0, 0, 0)).save(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with decode(encode_image(path)) as img:
+        assert img.size == (800, 800)
+    assert len(opened) == 2
+    print("✅ One decode per photo version")
+
+def test_custom_keys_and_memory_bound(cache_dir, monkeypatch):
+    """Test caller-supplied keys (e.g. GCS generations) and the LRU size limit."""
+    print("\n🔑 Testing cache keys and LRU bound...")
+
+    monkeypatch.setattr(interviewer_bot, 'ENCODED_IMAGE_CACHE_SIZE', 2)
+    paths = []
+    for i in range(3):
+        path = os.path.join(cache_dir, f'photo_{i}.jpg')
+        Image.new('RGB', (64, 64), (i * 80, 0, 0)).save(path)
+        paths.append(path)
+
+    assert get_cached_encoded_image('gcs-bucket-1-abc') is None
+    encoded = encode_image(paths[0], cache_key='gcs-bucket-1-abc')
+    assert get_cached_encoded_image('gcs-bucket-1-abc') == encoded
+
+    for path in paths[1:]:
+        encode_image(path)
+    assert len(interviewer_bot._encoded_images) == 2
+    assert 'gcs-bucket-1-abc' not in interviewer_bot._encoded_images
+    # Evicted from memory but still on disk
+    assert get_cached_encoded_image('gcs-bucket-1-abc') == encoded
+    print("✅ Custom keys cached, memory tier bounded")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
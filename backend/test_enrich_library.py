@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk AI enrichment
+Uses the mock LLM backend - no PostgreSQL or API key needed
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+from enrich_library import (
+    enrich_batch, enrichment_inputs, inputs_hash, needs_enrichment,
+    load_checkpoint, save_checkpoint, new_checkpoint
+)
+from llm_client import LLMClient, MockBackend
+from llm_cache import ResponseCache
+
+def make_item(media_id, **fields):
+    item = {"id": media_id, "file_path": f"/missing/{media_id}.jpg", "summary": None, "tags": [],
+            "metadata": {"exif": {"captured_at": "2019-06-01T12:00:00"}}}
+    item.update(fields)
+    return item
+
+def test_staleness():
+    """Test that only missing or changed items are selected."""
+    print("🧪 Testing stale item detection...")
+
+    contexts = [{"text": "Our trip to Lisbon"}]
+    item = make_item("a")
+    texts = enrichment_inputs(item, contexts)
+    assert texts[0] == "This photo was captured on 2019-06-01T12:00:00."
+
+    current = inputs_hash(item, texts, "gpt-4o-mini")
+    assert needs_enrichment(item, current), "Item without a summary was not selected"
+
+    item.update(summary="Lisbon", tags=["Lisbon"])
+    item["metadata"]["enrichment"] = {"inputs_hash": current}
+    assert not needs_enrichment(item, current), "Fresh item was selected"
+
+    changed = inputs_hash(item, enrichment_inputs(item, contexts + [{"text": "with Ana"}]), "gpt-4o-mini")
+    assert needs_enrichment(item, changed)
+    assert needs_enrichment(item, current, force=True)
+    print("✅ Only missing or stale items are selected")
+
+def test_enrich_batch():
+    """Test concurrent enrichment with the mock backend and failure capture."""
+    print("\n🤖 Testing batch enrichment...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResponseCache(db_path=os.path.join(tmp_dir, "llm.sqlite"))
+        client = LLMClient(backend=MockBackend(latency_ms=20), max_concurrency=4, response_cache=cache)
+        jobs = [(make_item(str(i)), [f"Photo number {i} from the harbour"], f"hash{i}") for i in range(8)]
+        # A job whose context is not a list of strings fails inside the worker
+        jobs.append((make_item("bad"), None, "hash-bad"))
+
+        updates, failures = asyncio.run(enrich_batch(jobs, ["harbour"], "gpt-4o-mini", 4, client))
+        cache.close()
+
+    assert len(updates) == 8
+    assert list(failures) == ["bad"]
+    update = updates["3"]
+    assert update["summary"]
+    assert update["tags"]
+    assert update["metadata"]["enrichment"]["inputs_hash"] == "hash3"
+    assert client.stats()["max_in_flight"] <= 4
+    print(f"✅ 8 items enriched, 1 failure captured, tags e.g. {update['tags']}")
+
+def test_checkpoint():
+    """Test checkpoint round trip."""
+    print("\n💾 Testing checkpoint...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "checkpoint.json")
+        assert load_checkpoint(path) is None
+        checkpoint = new_checkpoint()
+        checkpoint.update(after=["2024-01-01 00:00:00", "abc"], scanned=200)
+        save_checkpoint(path, checkpoint)
+        loaded = load_checkpoint(path)
+
+    assert loaded["after"] == ["2024-01-01 00:00:00", "abc"]
+    assert loaded["scanned"] == 200
+    print("✅ Checkpoint saved and restored")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
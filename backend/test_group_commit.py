@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test script for group commit batching
+Uses an in-memory batch runner - no PostgreSQL needed
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+import group_commit
+from group_commit import GroupCommitter
+
+class FakeDatabase:
+    """Applies each batch as one 'transaction' and records the commits."""
+
+    def __init__(self, fail_commit=False):
+        self.rows = []
+        self.commits = []
+        self.fail_commit = fail_commit
+
+    def run_batch(self, writes):
+        staged, results = [], []
+        for write in writes:
+            try:
+                value = write()
+                if value is not None:
+                    staged.append(value)
+                results.append((True, value))
+            except Exception as e:
+                results.append((False, e))
+        if self.fail_commit:
+            raise RuntimeError("commit failed")
+        self.rows.extend(staged)
+        self.commits.append(len(writes))
+        return results
+
+def test_batching():
+    """Test that concurrent writes share commits and all land."""
+    print("🧪 Testing group commit batching...")
+
+    db = FakeDatabase()
+    committer = GroupCommitter(db.run_batch, max_delay_ms=20, max_ops=16)
+    results = []
+
+    def writer(n):
+        futures = [committer.submit(lambda i=i: f"{n}-{i}") for i in range(10)]
+        results.extend(future.result(timeout=5) for future in futures)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = committer.stats()
+    committer.close()
+
+    assert len(db.rows) == 80
+    assert sorted(results) == sorted(db.rows)
+    assert len(db.commits) < 80, f"Writes were not grouped: {db.commits}"
+    assert max(db.commits) <= 16
+    print(f"✅ 80 writes in {stats['batches']} commits (largest {stats['max_batch']})")
+
+def test_failures():
+    """Test that a failing write doesn't fail its batch, but a failed commit fails all."""
+    print("\n💥 Testing write and commit failures...")
+
+    db = FakeDatabase()
+    committer = GroupCommitter(db.run_batch, max_delay_ms=50, max_ops=8)
+    good = committer.submit(lambda: "kept")
+    bad = committer.submit(lambda: 1 / 0)
+    committer.flush()
+    committer.close()
+    with pytest.raises(ZeroDivisionError):
+        bad.result()
+    assert good.result() == "kept"
+    assert db.rows == ["kept"]
+
+    broken = FakeDatabase(fail_commit=True)
+    committer = GroupCommitter(broken.run_batch, max_delay_ms=5, max_ops=8)
+    future = committer.submit(lambda: "lost")
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
+    stats = committer.stats()
+    committer.close()
+    assert stats["failed_batches"] == 1
+    print("✅ Failures reported to the right callers")
+
+def test_close_drains_queue():
+    """Test that closing commits queued write-behind writes first."""
+    print("\n🚪 Testing close...")
+
+    db = FakeDatabase()
+    committer = GroupCommitter(db.run_batch, max_delay_ms=1000, max_ops=1000)
+    for i in range(20):
+        committer.submit(lambda i=i: i)
+    committer.close()
+
+    assert db.rows == list(range(20)), "Queued writes lost on close"
+    with pytest.raises(RuntimeError):
+        committer.submit(lambda: None)
+    print("✅ Queued writes committed before shutdown")
+
+def test_submit_racing_close():
+    """Test that a write accepted while close() runs is committed, not left waiting."""
+    print("\n🏁 Testing a submit racing close...")
+
+    db = FakeDatabase()
+    committer = GroupCommitter(db.run_batch, max_delay_ms=1)
+    queue_put = committer._queue.put
+
+    def preempted_put(item, *args, **kwargs):
+        # The submitting thread loses the CPU between accepting the write and queueing it
+        if item is not group_commit._STOP:
+            time.sleep(0.2)
+        queue_put(item, *args, **kwargs)
+    committer._queue.put = preempted_put
+
+    submitted = []
+    writer = threading.Thread(target=lambda: submitted.append(committer.submit(lambda: "late")))
+    writer.start()
+    time.sleep(0.05)
+    committer.close(timeout=2)
+    writer.join()
+
+    assert submitted[0].result(timeout=2) == "late"
+    assert db.rows == ["late"]
+    committer.flush()
+    print("✅ Write accepted before close was committed")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for hybrid document search (reciprocal rank fusion)
+The fusion tests run in memory; the fallback test needs the PostgreSQL
+server from config.env and is skipped when it is unreachable.
+"""
+
+import sys
+import uuid
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+from flask import Flask
+
+load_dotenv(dotenv_path='config.env')
+
+from app import embeddings
+from app.enhanced_data_store import get_store, reciprocal_rank_fusion
+from app.enhanced_routes import enhanced_bp
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def test_fusion_rewards_agreement():
+    """Test that a hit found by both searches beats the top hit of just one."""
+    print("🧪 Testing reciprocal rank fusion...")
+
+    fused = reciprocal_rank_fusion({
+        'lexical': [('exact-name', 0.9), ('both', 0.5)],
+        'semantic': [('similar', 0.1), ('both', 0.2)],
+    }, rrf_k=60)
+
+    assert [doc_id for doc_id, _ in fused][0] == 'both'
+    assert dict(fused)['both'] == pytest.approx(2 / 62)
+    assert dict(fused)['exact-name'] == pytest.approx(1 / 61)
+    # Equal scores keep first-seen order
+    assert [doc_id for doc_id, _ in fused][1:] == ['exact-name', 'similar']
+    print(f"✅ Fused ranking: {fused}")
+
+def test_fusion_weights_and_k():
+    """Test per-source weights, the k constant and argument validation."""
+    print("\n⚖️ Testing fusion weights...")
+
+    ranked = {'lexical': [('lexical-hit', 1.0)], 'semantic': [('semantic-hit', 0.1)]}
+    lexical_first = reciprocal_rank_fusion(ranked, {'lexical': 1.0, 'semantic': 0.5})
+    semantic_first = reciprocal_rank_fusion(ranked, {'lexical': 0.2})
+    assert lexical_first[0][0] == 'lexical-hit'
+    assert semantic_first[0][0] == 'semantic-hit'
+
+    # A smaller k widens the gap between ranks
+    two_deep = {'lexical': [('first', 1.0), ('second', 0.5)]}
+    gaps = []
+    for k in (1, 60):
+        scores = dict(reciprocal_rank_fusion(two_deep, rrf_k=k))
+        gaps.append(scores['first'] - scores['second'])
+    assert gaps[0] > gaps[1]
+
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion(ranked, {'keyword': 1.0})
+    with pytest.raises(ValueError):
+        reciprocal_rank_fusion(ranked, rrf_k=0)
+    assert reciprocal_rank_fusion({'lexical': [], 'semantic': []}) == []
+    print("✅ Weights and k shift the ranking, bad values rejected")
+
+def test_hybrid_falls_back_without_search_vector(monkeypatch):
+    """Test that hybrid search runs semantically when full-text search is unavailable."""
+    print("\n🛟 Testing hybrid fallback...")
+
+    store = make_store()
+    title = f"Fallback {uuid.uuid4().hex[:8]}"
+    doc_id = store.add_document('note', title, 'A note about lighthouses on the coast', {})
+    try:
+        monkeypatch.setattr(store, 'lexical_search_available', False)
+        monkeypatch.setattr(store, '_lexical_search', lambda *args: pytest.fail("lexical search ran"))
+
+        results = store.search_documents('lighthouses on the coast', mode='hybrid', limit=50)
+        assert doc_id in [str(doc['id']) for doc in results]
+        assert all('similarity_score' in doc for doc in results)
+        with pytest.raises(ValueError):
+            store.search_documents('lighthouses', mode='lexical')
+    finally:
+        store.delete_document(doc_id)
+    print("✅ Hybrid search answered from the vector index")
+
+def test_search_route_accepts_rrf_k():
+    """Test that POST /api/documents/search passes rrf_k through and rejects bad values."""
+    print("\n🔧 Testing rrf_k in the search route...")
+
+    make_store()
+    app = Flask(__name__)
+    app.register_blueprint(enhanced_bp)
+    client = app.test_client()
+
+    response = client.post('/api/documents/search', json={'query': 'coast', 'mode': 'hybrid', 'rrf_k': 5})
+    assert response.status_code == 200
+    for rrf_k in ('five', 0, 2.5):
+        response = client.post('/api/documents/search', json={'query': 'coast', 'mode': 'hybrid', 'rrf_k': rrf_k})
+        assert response.status_code == 400, rrf_k
+    print("✅ rrf_k accepted, bad values get a 400")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for compact EXIF extraction
+Generates its own images - no test_images directory needed
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+from PIL import Image, ExifTags
+from PIL.TiffImagePlugin import IFDRational
+
+from image_metadata import extract_exif_record, extract_exif_batch
+from metadata_cache import MetadataCache
+
+def make_jpeg(path, size=(640, 480)):
+    """Write a JPEG with camera, exposure and GPS tags."""
+    exif = Image.Exif()
+    exif[ExifTags.Base.Make] = 'Nikon'
+    exif[ExifTags.Base.Model] = 'D750'
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif)
+    exif_ifd[ExifTags.Base.DateTimeOriginal] = '2021:07:14 10:22:01'
+    exif_ifd[ExifTags.Base.ExposureTime] = IFDRational(1, 250)
+    exif_ifd[ExifTags.Base.FNumber] = IFDRational(28, 10)
+    exif_ifd[ExifTags.Base.ISOSpeedRatings] = 200
+    gps_ifd = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    gps_ifd[ExifTags.GPS.GPSLatitudeRef] = 'N'
+    gps_ifd[ExifTags.GPS.GPSLatitude] = (IFDRational(48), IFDRational(51), IFDRational(24))
+    gps_ifd[ExifTags.GPS.GPSLongitudeRef] = 'E'
+    gps_ifd[ExifTags.GPS.GPSLongitude] = (IFDRational(2), IFDRational(21), IFDRational(0))
+    Image.new('RGB', size, 'blue').save(path, exif=exif)
+
+def test_compact_record():
+    """Test the typed record read from the APP1 segment."""
+    print("🧪 Testing compact EXIF record...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'paris.jpg')
+        make_jpeg(path)
+        record = extract_exif_record(path)
+
+    expected = {
+        'captured_at': '2021-07-14T10:22:01',
+        'width': 640,
+        'height': 480,
+        'camera': {'make': 'Nikon', 'model': 'D750', 'lens': None},
+        'exposure': {'exposure_time': 0.004, 'f_number': 2.8, 'iso': 200, 'focal_length': None},
+        'gps': {'lat': 48.8566667, 'lon': 2.35, 'altitude': None},
+    }
+    for key, value in expected.items():
+        assert record.get(key) == value, key
+
+    print(f"✅ Record: {record['captured_at']}, {record['camera']['model']}, {record['gps']}")
+
+def test_batch_extraction():
+    """Test that pooled extraction matches in-process extraction."""
+    print("\n📦 Testing batch extraction...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i in range(6):
+            path = os.path.join(tmp_dir, f'photo_{i}.jpg')
+            make_jpeg(path, size=(100 + i, 80))
+            paths.append(path)
+        png_path = os.path.join(tmp_dir, 'no_exif.png')
+        Image.new('RGB', (50, 40)).save(png_path)
+        paths.append(png_path)
+        paths.append(os.path.join(tmp_dir, 'missing.jpg'))
+
+        pooled = extract_exif_batch(paths, max_workers=2, min_parallel=0)
+        serial = extract_exif_batch(paths, max_workers=1)
+
+    assert pooled == serial
+    assert pooled[paths[3]]['width'] == 103
+    assert pooled[png_path]['captured_at'] is None
+    assert 'error' in pooled[paths[-1]]
+    print(f"✅ {len(pooled)} files extracted over a thread pool")
+
+def test_metadata_cache():
+    """Test memory and SQLite tiers, invalidation and counters."""
+    print("\n🗃️ Testing metadata cache...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'cached.jpg')
+        db_path = os.path.join(tmp_dir, 'cache.sqlite')
+        make_jpeg(path)
+
+        cache = MetadataCache(db_path=db_path)
+        first = cache.get(path, 'exif')
+        assert cache.get(path, 'exif') is first, "Second lookup was not served from memory"
+        cache.close()
+
+        # A fresh process starts with an empty LRU but a warm SQLite tier
+        cache = MetadataCache(db_path=db_path)
+        assert cache.get(path, 'exif') == first
+        assert cache.stats()['disk_hits'] == 1
+
+        # Rewriting the file changes its fingerprint
+        make_jpeg(path, size=(320, 240))
+        os.utime(path, ns=(0, 1))
+        assert cache.get(path, 'exif')['width'] == 320, "Stale entry served after the file changed"
+
+        stats = cache.stats()
+        cache.close()
+
+    assert (stats['misses'], stats['disk_hits'], stats['invalidations']) == (1, 1, 1)
+    print(f"✅ Cache tiers and invalidation work: {stats}")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for streamed interview replies (Server-Sent Events)
+Needs the PostgreSQL server from config.env (api.py opens the shared store
+on import); skipped when it is unreachable. Replies use the mock LLM backend.
+"""
+
+import json
+import os
+import sys
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='config.env')
+os.environ.setdefault('JOB_WORKERS', '0')
+
+import llm_client
+from app import embeddings
+from app.enhanced_data_store import get_store
+
+MEDIA_ID = 'streamed-photo'
+
+def make_client(monkeypatch, llm=None):
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+    import api
+
+    monkeypatch.setattr(llm_client, '_shared_client', llm or llm_client.LLMClient(backend=llm_client.MockBackend()))
+    monkeypatch.setattr(api, 'encode_gcs_image', lambda gcs_path: None)
+    monkeypatch.setattr(api.enhanced_db, 'get_media_item',
+                        lambda media_id: {'id': media_id, 'gcs_path': 'photos/streamed.jpg'} if media_id == MEDIA_ID else None)
+    return api.app.test_client()
+
+def parse_events(body):
+    """``[(event, data)]`` from a text/event-stream body."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+def test_stream_sends_tokens_then_done(monkeypatch):
+    """Test that tokens arrive as events and the history gets the reply once, at the end."""
+    print("🧪 Testing streamed interview reply...")
+
+    client = make_client(monkeypatch)
+    previous = [{"role": "assistant", "content": "Where was this taken?"}]
+    response = client.post(f'/api/media/{MEDIA_ID}/interview/stream',
+                           json={'user_text': 'On the beach in Cornwall', 'messages': previous})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    events = parse_events(response.get_data(as_text=True))
+    tokens = [data['text'] for event, data in events if event == 'token']
+    assert len(tokens) > 1
+    assert [event for event, _ in events] == ['token'] * len(tokens) + ['done']
+
+    done = events[-1][1]
+    assert done['ai_question'] == "".join(tokens)
+    assert done['messages'][-1] == {"role": "assistant", "content": done['ai_question']}
+    assert sum(1 for message in done['messages'] if message['role'] == 'assistant') == 2
+    print(f"✅ {len(tokens)} token events, then done")
+
+def test_stream_reports_errors(monkeypatch):
+    """Test that a failure mid-stream ends with an error event and no done event."""
+    print("\n💥 Testing a failing stream...")
+
+    class FailingClient:
+        def chat_stream(self, messages, **kwargs):
+            yield "Tell me"
+            raise TimeoutError("model timed out")
+
+    client = make_client(monkeypatch, llm=FailingClient())
+    response = client.post(f'/api/media/{MEDIA_ID}/interview/stream',
+                           json={'user_text': 'Hello', 'messages': []})
+    events = parse_events(response.get_data(as_text=True))
+
+    assert [event for event, _ in events] == ['token', 'error']
+    assert 'model timed out' in events[-1][1]['error']
+    print("✅ Error event sent after the partial reply")
+
+def test_stream_validates_request(monkeypatch):
+    """Test the 404 and 400 answers sent before any streaming starts."""
+    print("\n🚫 Testing stream request validation...")
+
+    client = make_client(monkeypatch)
+    response = client.post('/api/media/unknown/interview/stream', json={'user_text': 'Hi', 'messages': []})
+    assert response.status_code == 404
+    response = client.post(f'/api/media/{MEDIA_ID}/interview/stream', json={'user_text': 'Hi'})
+    assert response.status_code == 400
+    print("✅ Bad requests rejected up front")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for the PostgreSQL job queue
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+Jobs are run on the test thread with run_pending() - no worker threads.
+"""
+
+import sys
+import threading
+import time
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='config.env')
+
+from app import embeddings
+from app.enhanced_data_store import get_store
+from app.jobs import JobQueue, job_handler
+
+attempts_seen = {}
+
+@job_handler('test_echo')
+def echo(store, payload):
+    return {"echo": payload["value"]}
+
+@job_handler('test_flaky')
+def flaky(store, payload):
+    attempts_seen[payload["key"]] = attempts_seen.get(payload["key"], 0) + 1
+    if attempts_seen[payload["key"]] < payload["succeed_on"]:
+        raise RuntimeError("temporary failure")
+    return {"attempts": attempts_seen[payload["key"]]}
+
+@job_handler('test_slow')
+def slow(store, payload):
+    time.sleep(payload["seconds"])
+    return {}
+
+def make_queue(**kwargs):
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        store = get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+    return JobQueue(store, num_workers=0, base_retry_delay=0, **kwargs)
+
+def expire_lease(queue, job_id):
+    with queue.store._connection() as conn, conn.cursor() as cursor:
+        cursor.execute("UPDATE jobs SET locked_until = CURRENT_TIMESTAMP - interval '1 second' WHERE id = %s",
+                       (job_id,))
+
+def test_claim_and_complete():
+    """Test that a queued job is claimed, run and marked done with its result."""
+    print("🧪 Testing claim and complete...")
+
+    queue = make_queue()
+    job_id = queue.enqueue('test_echo', {"value": 42})
+    assert queue.run_pending() >= 1
+
+    job = queue.get_job(job_id)
+    assert job["status"] == "done"
+    assert job["attempts"] == 1
+    assert job["result"] == {"echo": 42}
+    print("✅ Job completed on the first attempt")
+
+def test_retry_then_fail():
+    """Test retries with backoff and the final failed state."""
+    print("\n🔁 Testing retries...")
+
+    queue = make_queue()
+    recovered = queue.enqueue('test_flaky', {"key": "recovers", "succeed_on": 3})
+    exhausted = queue.enqueue('test_flaky', {"key": "exhausted", "succeed_on": 99}, max_attempts=2)
+    queue.run_pending()
+
+    job = queue.get_job(recovered)
+    assert job["status"] == "done"
+    assert job["attempts"] == 3
+    job = queue.get_job(exhausted)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["last_error"] == "temporary failure"
+    print("✅ Retried until success, gave up after max_attempts")
+
+def test_running_job_is_not_stolen_until_lease_expires():
+    """Test that another process only reclaims a running job after its lease expires."""
+    print("\n🔒 Testing job leases...")
+
+    owner = make_queue(lease_seconds=60)
+    other = make_queue(lease_seconds=60)
+    job_id = owner.enqueue('test_echo', {"value": "leased"})
+
+    # The owner claims the job but hasn't finished it yet
+    claimed = owner._claim()
+    while claimed is not None and str(claimed["id"]) != job_id:
+        claimed = owner._claim()
+    assert claimed is not None
+
+    other.run_pending()
+    assert other.get_job(job_id)["status"] == "running"
+
+    # The owner dies: once the lease lapses another worker takes over
+    expire_lease(owner, job_id)
+    other.run_pending()
+    job = other.get_job(job_id)
+    assert job["status"] == "done"
+    assert job["attempts"] == 2
+    print("✅ Live lease respected, expired lease reclaimed")
+
+def test_heartbeat_keeps_long_job_leased():
+    """Test that a job running longer than its lease keeps it through heartbeats."""
+    print("\n💓 Testing lease heartbeat...")
+
+    owner = make_queue(lease_seconds=0.3)
+    other = make_queue(lease_seconds=0.3)
+    job_id = owner.enqueue('test_slow', {"seconds": 1.0})
+    runner = threading.Thread(target=owner.run_pending)
+    runner.start()
+    time.sleep(0.6)
+    other.run_pending()
+    runner.join()
+
+    job = owner.get_job(job_id)
+    assert job["status"] == "done"
+    assert job["attempts"] == 1
+    print("✅ Heartbeats kept the job from being reclaimed")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental library sync
+Diffs a temporary directory - no PostgreSQL needed
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+import library_sync
+from library_sync import (
+    FileEntry, LibrarySync, SyncError, check_mass_delete, diff_listings, is_local_path,
+    object_listing, scan_directory, sha256_file
+)
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+class MemoryStore:
+    """The media manifest calls LibrarySync makes, kept in a dict."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def media_manifest(self, prefix=None):
+        return [dict(row, id=media_id) for media_id, row in self.rows.items()
+                if not prefix or row['file_path'].startswith(prefix)]
+
+    def add_media_items_bulk(self, items):
+        media_ids = []
+        for item in items:
+            # Same content hash as an existing item: skipped, like ON CONFLICT DO NOTHING
+            if any(row['content_hash'] == item['content_hash'] for row in self.rows.values()):
+                media_ids.append(None)
+                continue
+            media_id = str(uuid.uuid4())
+            self.rows[media_id] = {key: item.get(key) for key in
+                                   ('file_path', 'file_size', 'file_mtime_ns', 'content_hash')}
+            media_ids.append(media_id)
+        return media_ids
+
+    def update_media_files_bulk(self, updates):
+        for media_id, update in updates.items():
+            self.rows[media_id].update({key: value for key, value in update.items()
+                                        if key != 'metadata' and value is not None})
+
+    def delete_media_items_bulk(self, media_ids):
+        for media_id in media_ids:
+            self.rows.pop(media_id, None)
+
+def test_directory_diff():
+    """Test adds, updates, moves and deletes against a manifest."""
+    print("🧪 Testing directory diff...")
+
+    with tempfile.TemporaryDirectory() as root:
+        write(os.path.join(root, 'keep.jpg'), b'keep')
+        write(os.path.join(root, 'edit.jpg'), b'before')
+        write(os.path.join(root, 'old_name.jpg'), b'moved photo')
+        write(os.path.join(root, 'gone.png'), b'gone')
+        write(os.path.join(root, 'notes.txt'), b'not media')
+
+        first = diff_listings({}, scan_directory(root), hasher=sha256_file)
+        assert len(first.added) == 4, [e.path for e in first.added]
+
+        # What the database would hold after the first sync
+        manifest = {e.path: e._replace(media_id=f"id-{os.path.basename(e.path)}") for e in first.added}
+
+        write(os.path.join(root, 'edit.jpg'), b'after the edit')
+        write(os.path.join(root, 'trips', 'new.jpeg'), b'brand new')
+        os.rename(os.path.join(root, 'old_name.jpg'), os.path.join(root, 'trips', 'new_name.jpg'))
+        os.remove(os.path.join(root, 'gone.png'))
+
+        diff = diff_listings(manifest, scan_directory(root), hasher=sha256_file)
+
+    assert [os.path.basename(e.path) for e in diff.added] == ['new.jpeg']
+    assert [(old.media_id, new.content_hash is not None) for old, new in diff.updated] == [('id-edit.jpg', True)]
+    assert [(old.media_id, os.path.basename(new.path)) for old, new in diff.moved] == [('id-old_name.jpg', 'new_name.jpg')]
+    assert [e.media_id for e in diff.deleted] == ['id-gone.png']
+    assert diff.unchanged == 1
+    print(f"✅ Diff: {diff.summary()}")
+
+def test_object_listing_diff():
+    """Test the same engine over an object-storage style listing."""
+    print("\n☁️ Testing object listing diff...")
+
+    updated = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    blobs = [SimpleNamespace(name='photos/a.jpg', size=10, updated=updated),
+             SimpleNamespace(name='photos/b.jpg', size=20, updated=updated)]
+    manifest = {
+        'photos/a.jpg': FileEntry('photos/a.jpg', 10, int(updated.timestamp() * 1_000_000_000), media_id='1'),
+        'photos/b.jpg': FileEntry('photos/b.jpg', 15, 0, media_id='2'),
+        'photos/c.jpg': FileEntry('photos/c.jpg', 5, 0, media_id='3'),
+    }
+    diff = diff_listings(manifest, object_listing(blobs + ['photos/d.jpg']))
+
+    assert diff.summary() == {"added": 1, "updated": 1, "moved": 0, "deleted": 1, "unchanged": 1}
+    print(f"✅ Diff: {diff.summary()}")
+
+def test_mass_delete_guard():
+    """Test that a sync refuses to wipe most of a library."""
+    print("\n🛡️ Testing mass delete guard...")
+
+    sync = LibrarySync(store=None, root=tempfile.gettempdir(), max_delete_fraction=0.5)
+    deleted = [FileEntry(f"/photos/{i}.jpg", media_id=str(i)) for i in range(8)]
+    diff = diff_listings({e.path: e for e in deleted}, {})
+    with pytest.raises(SyncError):
+        sync.check_deletes(diff, manifest_size=10)
+    sync.check_deletes(diff_listings({e.path: e for e in deleted[:3]}, {}), manifest_size=10)
+    print("✅ Mass deletes are refused, small ones allowed")
+
+def test_cleanup_only_checks_local_paths():
+    """Test which media rows count as local files, and the guard shared with cleanup."""
+    print("\n🧭 Testing local path detection...")
+
+    assert is_local_path("/photos/beach.jpg")
+    assert is_local_path("uploads/ab/abcdef.jpg", ["uploads"])
+    assert not is_local_path("holiday/beach.jpg", ["uploads"])
+    assert not is_local_path("placeholder_transcript_1234.jpg", ["uploads"])
+    assert not is_local_path("uploads-old/beach.jpg", ["uploads"])
+    assert not is_local_path("")
+
+    check_mass_delete(3, 10, "with local paths", max_delete_fraction=0.5)
+    check_mass_delete(9, 9, "with local paths", max_delete_fraction=0.5)
+    with pytest.raises(SyncError):
+        check_mass_delete(6, 10, "with local paths", max_delete_fraction=0.5)
+    print("✅ Only local files are checked, mass deletes refused")
+
+def test_known_duplicates_are_not_rehashed(monkeypatch):
+    """Test that a new copy of an existing photo is hashed once, not on every sync."""
+    print("\n👯 Testing duplicate files...")
+
+    hashed = []
+    def counting_hasher(path):
+        hashed.append(os.path.basename(path))
+        return sha256_file(path)
+    monkeypatch.setattr(library_sync, 'sha256_file', counting_hasher)
+
+    with tempfile.TemporaryDirectory() as root:
+        write(os.path.join(root, 'beach.jpg'), b'beach photo')
+        sync = LibrarySync(MemoryStore(), root)
+        sync.sync()
+
+        write(os.path.join(root, 'copy', 'beach.jpg'), b'beach photo')
+        _, counts = sync.sync()
+        assert counts['duplicates'] == 1
+        for _ in range(3):
+            diff, _ = sync.sync()
+            assert diff.is_empty()
+        assert hashed == ['beach.jpg', 'beach.jpg']
+
+        # Once the original's item is deleted the copy is imported on the next pass
+        os.remove(os.path.join(root, 'beach.jpg'))
+        sync.sync()
+        sync.sync()
+        paths = [row['file_path'] for row in sync.store.rows.values()]
+        assert paths == [os.path.join(root, 'copy', 'beach.jpg')]
+    print(f"✅ Duplicate hashed once, {len(hashed)} hashes in total")
+
+def test_watch_survives_unexpected_errors():
+    """Test that an error other than SyncError is logged and the watcher keeps going."""
+    print("\n👀 Testing watch error handling...")
+
+    class FlakyStore(MemoryStore):
+        calls = 0
+        def media_manifest(self, prefix=None):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("database is restarting")
+            return super().media_manifest(prefix)
+
+    with tempfile.TemporaryDirectory() as root:
+        write(os.path.join(root, 'beach.jpg'), b'beach photo')
+        store = FlakyStore()
+        stop = threading.Event()
+        synced = []
+        def on_sync(diff, counts):
+            synced.append(counts)
+            stop.set()
+
+        watcher = threading.Thread(target=LibrarySync(store, root).watch,
+                                   kwargs={'poll_interval': 0.05, 'stop_event': stop, 'on_sync': on_sync})
+        watcher.start()
+        watcher.join(timeout=5)
+        stop.set()
+
+    assert not watcher.is_alive()
+    assert store.calls >= 2
+    assert synced and synced[0]['added'] == 1
+    print("✅ Watcher kept running after a failed sync")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM client
+Uses the mock backend - no API key or network needed
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+from llm_client import LLMClient, MockBackend, TokenBucket
+from llm_cache import ResponseCache
+from interviewer_bot import run_interview_chat, stream_interview_chat
+
+def test_mock_backend():
+    """Test that mock replies are deterministic and streaming matches."""
+    print("🧪 Testing mock backend...")
+
+    client = LLMClient(backend="mock")
+    messages = [{"role": "user", "content": "Tell me about the beach holiday in Cornwall"}]
+
+    first = client.chat(messages)
+    assert client.chat(messages) == first
+    assert "cornwall" in first
+    assert "".join(client.chat_stream(messages)) == first
+
+    ai_question, history = run_interview_chat("We went to Paris in 2019", client=client)
+    tokens, streamed_history = stream_interview_chat("We went to Paris in 2019", client=client)
+    assert len(streamed_history) == 2, "Streaming appended the reply before the stream finished"
+    assert "".join(tokens) == ai_question
+    assert streamed_history == history
+    print(f"✅ Deterministic reply: {first}")
+
+def test_concurrency_limit():
+    """Test that no more than max_concurrency calls run at once."""
+    print("\n🚦 Testing concurrency limit...")
+
+    client = LLMClient(backend=MockBackend(latency_ms=30), max_concurrency=2,
+                       requests_per_minute=60000, tokens_per_minute=10 ** 9)
+    messages = [{"role": "user", "content": "hello there"}]
+    threads = [threading.Thread(target=client.chat, args=(messages,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = client.stats()
+    assert (stats["calls"], stats["max_in_flight"], stats["in_flight"]) == (8, 2, 0)
+    print(f"✅ 8 calls with at most {stats['max_in_flight']} in flight")
+
+def test_rate_limit():
+    """Test that the token bucket spaces out requests beyond the burst."""
+    print("\n⏱️ Testing rate limiting...")
+
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    for i in range(6):
+        bucket.acquire()
+    elapsed = time.monotonic() - started
+
+    # One request from the burst, then five spaced 20ms apart
+    assert elapsed >= 0.09, f"Requests were not throttled: {elapsed:.3f}s"
+    print(f"✅ 6 requests at 50/s took {elapsed:.3f}s")
+
+def test_response_cache():
+    """Test cache hits, per-call bypass, image fingerprints, TTL and eviction."""
+    print("\n🗃️ Testing response cache...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResponseCache(db_path=os.path.join(tmp_dir, 'llm.sqlite'), max_entries=2)
+        client = LLMClient(backend=MockBackend(latency_ms=50), response_cache=cache)
+        messages = [{"role": "user", "content": [
+            {"type": "text", "text": "Summarise this photo of Venice"},
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}
+        ]}]
+
+        first = client.chat(messages, cache=True)
+        started = time.monotonic()
+        assert client.chat(messages, cache=True) == first
+        assert time.monotonic() - started < 0.04, "Identical request was not served from the cache"
+
+        client.chat(messages, cache="refresh")
+        other_image = [{"role": "user", "content": [
+            messages[0]["content"][0],
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,BBBB"}}
+        ]}]
+        client.chat(other_image, cache=True)
+        client.chat([{"role": "user", "content": "third prompt"}], cache=True)
+
+        stats = cache.stats()
+        assert client.stats()["calls"] == 4
+        assert (stats["hits"], stats["misses"], stats["bypassed"], stats["evictions"], stats["entries"]) == (1, 3, 1, 1, 2)
+
+        cache.ttl = 0
+        time.sleep(0.01)
+        key = cache._conn.execute("SELECT key FROM llm_cache").fetchone()[0]
+        assert cache.get(key) is None, "Expired entry was served"
+        cache.close()
+
+    print(f"✅ Cache stats: {stats}")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
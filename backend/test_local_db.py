@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite local context store
+Uses a temporary database file - no TinyDB file needed
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from local_db import LocalContextStore
+
+def test_contexts_and_summaries():
+    """Test context CRUD and structured summaries."""
+    print("🧪 Testing contexts and summaries...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = LocalContextStore(db_path=os.path.join(tmp_dir, 'local.sqlite'))
+        first = store.add_context("paris.jpg", "Eiffel Tower at night")
+        store.add_context("paris.jpg", "With Ana and Tom")
+        assert store.update_context("paris.jpg", first["id"], "Eiffel Tower at dusk")
+        assert not store.delete_context("beach.jpg", first["id"]), "Deleted a context through the wrong image"
+        texts = [ctx["text"] for ctx in store.get_contexts("paris.jpg")]
+        assert texts == ["Eiffel Tower at dusk", "With Ana and Tom"]
+
+        store.set_structured_summary("paris.jpg", "## Title\nParis", "Paris", "A trip", "")
+        store.set_summary("beach.jpg", "Sunny")
+        assert store.get_structured_summary("paris.jpg")["summary_title"] == "Paris"
+        assert store.get_summary("beach.jpg") == "Sunny"
+        assert store.clear_all_summaries() == 2
+        assert not store.get_structured_summary("paris.jpg")["summary"]
+        assert len(store.get_contexts("paris.jpg")) == 2, "Clearing summaries removed contexts"
+        store.close()
+
+    print("✅ Contexts and summaries stored")
+
+def test_tags_bulk():
+    """Test bulk tag writes and the tag index loader."""
+    print("\n🏷️ Testing bulk tags...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = LocalContextStore(db_path=os.path.join(tmp_dir, 'local.sqlite'))
+        store.set_tags_bulk({"a.jpg": ["Paris", "2019"], "b.jpg": ["beach"], "c.jpg": []})
+        store.set_tags("b.jpg", ["beach", "2019"])
+        assert store.load_all_tags() == {"a.jpg": ["Paris", "2019"], "b.jpg": ["beach", "2019"]}
+        store.clear_tags(["a.jpg", "b.jpg"])
+        assert store.load_all_tags() == {}
+        assert store.get_tags("a.jpg") == []
+        store.close()
+
+    print("✅ Tags written and cleared in bulk")
+
+def test_import_and_durability():
+    """Test the TinyDB import, re-import, and that data survives reopening."""
+    print("\n📥 Testing TinyDB import...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, 'local_contexts.json')
+        db_path = os.path.join(tmp_dir, 'local.sqlite')
+        with open(json_path, 'w') as f:
+            json.dump({"_default": {
+                "1": {"image_name": "paris.jpg", "summary_title": "Paris", "tags": ["Paris"],
+                      "contexts": [{"id": "c1", "text": "Eiffel Tower"}, {"id": "c2", "text": "Louvre"}]},
+                "2": {"image_name": "beach.jpg", "contexts": []},
+                "3": {"contexts": [{"id": "c3", "text": "orphan"}]}
+            }}, f)
+
+        store = LocalContextStore(db_path=db_path)
+        counts = store.import_tinydb_json(json_path)
+        again = store.import_tinydb_json(json_path)
+        store.close()
+
+        with open(json_path, 'w') as f:
+            f.write('{"_default": {"1": {"image_name": "paris.jpg", "contexts": [{"id": "c4"')
+        reopened = LocalContextStore(db_path=db_path)
+        with pytest.raises(ValueError):
+            reopened.import_tinydb_json(json_path)
+        contexts = reopened.get_contexts("paris.jpg")
+        title = reopened.get_structured_summary("paris.jpg")["summary_title"]
+        reopened.close()
+
+    assert counts == {"images": 2, "existing": 0, "contexts": 2, "skipped": 1}
+    assert again == {"images": 0, "existing": 2, "contexts": 0, "skipped": 1}
+    assert [ctx["id"] for ctx in contexts] == ["c1", "c2"]
+    assert title == "Paris"
+    print(f"✅ Imported {counts}, re-import added nothing")
+
+def test_import_recovered_tables():
+    """Test importing the media_items/contexts layout written by fix_database.py."""
+    print("\n🩹 Testing recovered TinyDB import...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_path = os.path.join(tmp_dir, 'local_contexts.json')
+        with open(json_path, 'w') as f:
+            json.dump({
+                "_default": {},
+                "media_items": {
+                    "1": {"file_path": "uploads/paris.jpg", "filename": "paris.jpg", "title": "Paris trip",
+                          "summary": "A day in Paris", "tags": ["Paris"]},
+                    "2": {"file_path": "uploads/beach.jpg", "filename": "beach.jpg", "title": "beach.jpg"}
+                },
+                "contexts": {"1": ["Eiffel Tower", {"text": "Louvre"}]},
+                "links": {}
+            }, f)
+
+        store = LocalContextStore(db_path=os.path.join(tmp_dir, 'local.sqlite'))
+        counts = store.import_tinydb_json(json_path)
+        summary = store.get_structured_summary("paris.jpg")
+        beach_title = store.get_structured_summary("beach.jpg")["summary_title"]
+        first_ids = [ctx["id"] for ctx in store.get_contexts("paris.jpg")]
+
+        # Edits made in SQLite survive a re-import, and id-less contexts aren't duplicated
+        store.set_tags("paris.jpg", ["Edited"])
+        again = store.import_tinydb_json(json_path)
+        tags = store.get_tags("paris.jpg")
+        second_ids = [ctx["id"] for ctx in store.get_contexts("paris.jpg")]
+
+        with open(json_path, 'w') as f:
+            json.dump({"_default": {}, "photos": {"1": {"image_name": "lost.jpg"}}}, f)
+        with pytest.raises(ValueError):
+            store.import_tinydb_json(json_path)
+        store.close()
+
+    assert counts == {"images": 2, "existing": 0, "contexts": 2, "skipped": 0}
+    assert summary["summary"] == "A day in Paris"
+    assert summary["summary_title"] == "Paris trip"
+    assert beach_title == ""
+    assert again["contexts"] == 0 and again["existing"] == 2
+    assert second_ids == first_ids
+    assert tags == ["Edited"]
+    print(f"✅ Imported {counts} from recovered tables, re-import kept edits")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
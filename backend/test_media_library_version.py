@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the media library version behind gallery ETags
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+"""
+
+import os
+import sys
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='config.env')
+# main starts the job queue on import; run no background workers here
+os.environ.setdefault('JOB_WORKERS', '0')
+
+from app import embeddings
+from app.enhanced_data_store import get_store
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def test_version_follows_media_writes():
+    """Test that inserts, updates and deletes each change the version."""
+    print("🧪 Testing media library version...")
+
+    store = make_store()
+    before = store.get_media_library_version()
+    media_id = store.add_media_item('versioned.jpg', {'title': 'Versioned photo'})
+    inserted = store.get_media_library_version()
+    assert inserted != before
+
+    store.update_media_item(media_id, summary='A new summary')
+    updated = store.get_media_library_version()
+    assert updated != inserted
+
+    store.delete_media_item(media_id)
+    assert store.get_media_library_version() not in (inserted, updated)
+    print("✅ Version changed on every write")
+
+def test_version_follows_commit_order():
+    """Test that an uncommitted write is not visible in the version until it commits."""
+    print("\n🚦 Testing version and commit order...")
+
+    store = make_store()
+    media_id = store.add_media_item('pending.jpg', {'title': 'Pending photo'})
+    before = store.get_media_library_version()
+    conn = store.pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE media SET summary = 'pending' WHERE id = %s", (media_id,))
+        assert store.get_media_library_version() == before
+        conn.commit()
+    finally:
+        conn.rollback()
+        store.pool.putconn(conn)
+    assert store.get_media_library_version() > before
+
+    store.delete_media_item(media_id)
+    print("✅ Version moved when the write committed")
+
+def test_malformed_cursor_is_rejected():
+    """Test that GET /api/media answers 400 for a cursor that doesn't parse."""
+    print("\n🧭 Testing malformed cursors...")
+
+    make_store()
+    import main
+    client = main.app.test_client()
+    for after in ('not-a-cursor', 'yesterday,1234', '2024-01-01T00:00:00,not-a-uuid'):
+        response = client.get('/api/media', query_string={'after': after})
+        assert response.status_code == 400, after
+    response = client.get('/api/media', query_string={
+        'after': '2024-01-01T00:00:00,00000000-0000-0000-0000-000000000000', 'limit': 1})
+    assert response.status_code == 200
+    print("✅ Bad cursors get a 400")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for media listing, keyset pagination and media search
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+Embeddings use the offline hashing model.
+"""
+
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='config.env')
+
+from app import embeddings
+from app.enhanced_data_store import get_store
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def make_dated_media(store, timestamps):
+    """Add one media item per timestamp and backdate it."""
+    media_ids = [store.add_media_item(f'paged_{i}.jpg', {'title': f'Paged {i}'}) for i in range(len(timestamps))]
+    with store._connection() as conn, conn.cursor() as cursor:
+        for media_id, created_at in zip(media_ids, timestamps):
+            cursor.execute("UPDATE media SET created_at = %s WHERE id = %s", (created_at, media_id))
+    return media_ids
+
+def test_keyset_pages_are_continuous():
+    """Test that walking pages with the cursor visits every item once, ties included."""
+    print("🧪 Testing keyset pagination...")
+
+    store = make_store()
+    # Far in the future so these are the newest rows; four share one timestamp
+    tied = datetime(2999, 1, 1)
+    media_ids = make_dated_media(store, [tied + timedelta(seconds=1)] + [tied] * 4 + [tied - timedelta(seconds=1)])
+    try:
+        expected = store.list_media_items(limit=len(media_ids))
+        assert [str(item['id']) for item in expected] == (
+            [media_ids[0]] + sorted(media_ids[1:5], reverse=True) + [media_ids[5]])
+
+        pages, after = [], None
+        while len(pages) < 10:
+            page = store.list_media_items(limit=2, after=after)
+            pages.append(page)
+            after = (page[-1]['created_at'], str(page[-1]['id']))
+            if sum(len(p) for p in pages) >= len(media_ids):
+                break
+        walked = [str(item['id']) for page in pages for item in page]
+        assert walked == [str(item['id']) for item in expected]
+        assert len(set(walked)) == len(walked)
+    finally:
+        store.delete_media_items_bulk(media_ids)
+    print(f"✅ {len(walked)} items over {len(pages)} pages, no gaps or repeats")
+
+def test_field_projection():
+    """Test that fields= returns only those columns plus id and created_at."""
+    print("\n🔎 Testing media field projection...")
+
+    store = make_store()
+    media_ids = make_dated_media(store, [datetime(2999, 1, 2)])
+    try:
+        item = store.list_media_items(limit=1, fields=['title', 'tags'])[0]
+        assert str(item['id']) == media_ids[0]
+        assert set(item) == {'id', 'created_at', 'title', 'tags'}
+        assert item['title'] == 'Paged 0'
+        assert 'metadata' in store.list_media_items(limit=1)[0]
+        with pytest.raises(ValueError):
+            store.list_media_items(limit=1, fields=['title; DROP TABLE media'])
+    finally:
+        store.delete_media_items_bulk(media_ids)
+    print("✅ Only the projected columns returned")
+
+def test_search_media_follows_edits():
+    """Test that media search finds items by summary and forgets deleted ones."""
+    print("\n🔍 Testing media search...")
+
+    store = make_store()
+    word = f"zeppelin{uuid.uuid4().hex[:6]}"
+    media_id = store.add_media_item('searched.jpg', {'title': 'Airship day', 'summary': f'A {word} over the bay'})
+    try:
+        hits = [str(item['id']) for item in store.search_media(f'{word} over the bay', limit=5)]
+        assert media_id in hits
+    finally:
+        store.delete_media_item(media_id)
+    hits = [str(item['id']) for item in store.search_media(f'{word} over the bay', limit=5)]
+    assert media_id not in hits
+    print("✅ Search found the item and dropped it after delete")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
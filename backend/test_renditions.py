@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for resized image renditions
+The rendition tests use temporary files; the preview route test needs the
+PostgreSQL server from config.env and is skipped when it is unreachable.
+"""
+
+import os
+import sys
+import tempfile
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+from PIL import Image
+
+load_dotenv(dotenv_path='config.env')
+# main starts the job queue on import; run no background workers here
+os.environ.setdefault('JOB_WORKERS', '0')
+
+from app import embeddings
+from app.enhanced_data_store import get_store
+from app.renditions import MAX_RENDITION_SIZE, get_rendition, parse_rendition_args, rendition_mimetype
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def make_image(path, size=(800, 600)):
+    Image.new('RGB', size, (200, 120, 40)).save(path, format='JPEG')
+    return path
+
+def test_rendition_size_and_format():
+    """Test that renditions keep the aspect ratio, never upscale and use the asked format."""
+    print("🧪 Testing rendition size and format...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = make_image(os.path.join(tmp_dir, 'photo.jpg'))
+        cache_dir = os.path.join(tmp_dir, 'cache')
+
+        path, etag = get_rendition(source, 200, 200, 'webp', cache_dir=cache_dir)
+        with Image.open(path) as img:
+            assert img.format == 'WEBP'
+            assert img.size == (200, 150)
+        assert etag.endswith('-200x200.webp')
+        assert rendition_mimetype('webp') == 'image/webp'
+
+        path, _ = get_rendition(source, None, 300, 'jpeg', cache_dir=cache_dir)
+        with Image.open(path) as img:
+            assert img.format == 'JPEG'
+            assert img.size == (400, 300)
+
+        path, _ = get_rendition(source, 2000, 2000, 'jpeg', cache_dir=cache_dir)
+        with Image.open(path) as img:
+            assert img.size == (800, 600)
+    print("✅ Sizes and formats as requested")
+
+def test_rendition_cache_hit():
+    """Test that a rendition is generated once and regenerated when the source changes."""
+    print("\n🗃️ Testing rendition cache...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = make_image(os.path.join(tmp_dir, 'photo.jpg'))
+        cache_dir = os.path.join(tmp_dir, 'cache')
+
+        first_path, first_etag = get_rendition(source, 100, 100, 'jpeg', cache_dir=cache_dir)
+        mtime = os.stat(first_path).st_mtime_ns
+        second_path, second_etag = get_rendition(source, 100, 100, 'jpeg', cache_dir=cache_dir)
+        assert (second_path, second_etag) == (first_path, first_etag)
+        assert os.stat(second_path).st_mtime_ns == mtime
+
+        make_image(source, size=(640, 640))
+        os.utime(source, ns=(mtime + 10**9, mtime + 10**9))
+        changed_path, changed_etag = get_rendition(source, 100, 100, 'jpeg', cache_dir=cache_dir)
+        assert changed_etag != first_etag
+        with Image.open(changed_path) as img:
+            assert img.size == (100, 100)
+    print("✅ Cache reused, new source got a new rendition")
+
+def test_rendition_args_validation():
+    """Test that bad sizes and formats are rejected."""
+    print("\n🚫 Testing rendition argument validation...")
+
+    assert parse_rendition_args(None, None, None) == (None, None, 'jpeg')
+    assert parse_rendition_args(200, None, 'WEBP') == (200, None, 'webp')
+    for width, height, fmt in ((0, None, None), (None, 0, None), (-5, None, None),
+                               (MAX_RENDITION_SIZE + 1, None, None), (100, 100, 'gif')):
+        with pytest.raises(ValueError):
+            parse_rendition_args(width, height, fmt)
+    print("✅ Bad arguments raise ValueError")
+
+def test_preview_rejects_zero_size():
+    """Test that ?w=0 and ?h=0 get a 400 rather than the original upload."""
+    print("\n🖼️ Testing preview route arguments...")
+
+    store = make_store()
+    import main
+    client = main.app.test_client()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = make_image(os.path.join(tmp_dir, 'preview.jpg'))
+        media_id = store.add_media_item(source, {'title': 'Preview photo'})
+        try:
+            for args in ({'w': 0}, {'h': 0}, {'w': 0, 'h': 0}):
+                response = client.get(f'/api/media/{media_id}/preview', query_string=args)
+                assert response.status_code == 400, args
+            response = client.get(f'/api/media/{media_id}/preview', query_string={'w': 100, 'fmt': 'webp'})
+            assert response.status_code == 200
+            assert response.mimetype == 'image/webp'
+            response.close()
+        finally:
+            store.delete_media_item(media_id)
+    print("✅ Zero sizes rejected, valid rendition served")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
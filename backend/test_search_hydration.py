@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for batched hydration of document search hits
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+Embeddings use the offline hashing model.
+"""
+
+import sys
+import uuid
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='config.env')
+
+from app import embeddings
+from app.enhanced_data_store import get_store
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def make_documents(store, count):
+    marker = uuid.uuid4().hex[:8]
+    return [store.add_document('note', f'Hydrated {marker} {i}', f'Hydration test note {i}', {'i': i})
+            for i in range(count)]
+
+def test_hydration_keeps_rank_order():
+    """Test that hits come back in ranking order, not database order, with their scores."""
+    print("🧪 Testing hydration order...")
+
+    store = make_store()
+    doc_ids = make_documents(store, 4)
+    try:
+        ranked = [(doc_ids[2], 0.1), (doc_ids[0], 0.2), (doc_ids[3], 0.3), (doc_ids[1], 0.4)]
+        documents = store._hydrate_documents(ranked, store._document_columns(None), 'similarity_score')
+
+        assert [str(doc['id']) for doc in documents] == [doc_id for doc_id, _ in ranked]
+        assert [doc['similarity_score'] for doc in documents] == [0.1, 0.2, 0.3, 0.4]
+        assert documents[0]['metadata'] == {'i': 2}
+    finally:
+        for doc_id in doc_ids:
+            store.delete_document(doc_id)
+    print("✅ Ranking order and scores kept")
+
+def test_hydration_drops_missing_ids():
+    """Test that hits whose rows are gone (e.g. a stale vector entry) are skipped."""
+    print("\n🕳️ Testing missing hits...")
+
+    store = make_store()
+    doc_ids = make_documents(store, 2)
+    missing = str(uuid.uuid4())
+    try:
+        ranked = [(doc_ids[1], 0.1), (missing, 0.2), (doc_ids[0], 0.3)]
+        documents = store._hydrate_documents(ranked, store._document_columns(None), 'similarity_score')
+        assert [str(doc['id']) for doc in documents] == [doc_ids[1], doc_ids[0]]
+        assert store._hydrate_documents([], store._document_columns(None), 'similarity_score') == []
+    finally:
+        for doc_id in doc_ids:
+            store.delete_document(doc_id)
+    print("✅ Missing ids dropped")
+
+def test_search_field_projection():
+    """Test that fields= returns only the asked columns plus id and score."""
+    print("\n🔎 Testing field projection...")
+
+    store = make_store()
+    doc_ids = make_documents(store, 3)
+    try:
+        results = store.search_documents('Hydration test note', mode='semantic', limit=50,
+                                         fields=['title', 'type'])
+        ours = [doc for doc in results if str(doc['id']) in doc_ids]
+        assert len(ours) == 3
+        for doc in ours:
+            assert set(doc) == {'id', 'title', 'type', 'similarity_score'}
+        with pytest.raises(ValueError):
+            store.search_documents('Hydration test note', mode='semantic', fields=['password'])
+    finally:
+        for doc_id in doc_ids:
+            store.delete_document(doc_id)
+    print("✅ Only the projected columns returned")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
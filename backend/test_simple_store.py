@@ -6,6 +6,7 @@ Run this to verify everything is working locally
 
 import os
 import sys
+import tempfile
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -155,6 +156,83 @@ def test_interview_functionality():
         print(f"❌ Interview test failed: {e}")
         return False
 
+def test_full_text_search():
+    """Test BM25 ranking, snippets, phrase/prefix queries and tag relatedness."""
+    print("\n🔤 Testing full-text search...")
+    
+    store = SimpleDataStore(":memory:")
+    
+    tower_id = store.add_document(
+        doc_type="interview",
+        title="Eiffel Tower visit",
+        content="We climbed the Eiffel Tower with Emma on a sunny morning.",
+        metadata={"tags": ["Paris", "family"], "people": ["Emma"]}
+    )
+    store.add_document(
+        doc_type="interview",
+        title="Seine walk",
+        content="A long walk along the Seine. The tower was lit up at night.",
+        metadata={"tags": ["paris", "night"]}
+    )
+    store.add_document(
+        doc_type="website",
+        title="Rome guide",
+        content="Opening hours for the Colosseum and the Forum.",
+        metadata={"tags": ["Rome", "family"]}
+    )
+    
+    # Title matches are weighted above body matches
+    results = store.search_documents("tower")
+    assert [r['title'] for r in results] == ["Eiffel Tower visit", "Seine walk"]
+    assert "[Tower]" in results[0]['snippet']
+    print(f"✅ Ranked search with snippet: {results[0]['snippet']}")
+    
+    assert len(store.search_documents('"tower was lit"')) == 1
+    assert store.search_documents('"lit tower"') == []
+    assert [r['title'] for r in store.search_documents("Colos*")] == ["Rome guide"]
+    assert len(store.search_documents("emma", doc_type="interview")) == 1
+    print("✅ Phrase, prefix and metadata queries work")
+    
+    # Triggers keep the index in sync with updates
+    store.update_document(tower_id, content="We took the stairs up.", metadata={"tags": ["Paris", "night"]})
+    assert store.search_documents("sunny") == []
+    related = store.get_related_documents(tower_id)
+    assert [(r['title'], r['shared_tags']) for r in related] == [("Seine walk", 2)]
+    print("✅ Index and tag relations follow updates")
+    
+    store.close()
+
+def test_search_survives_table_rebuild():
+    """Test that search results still point at the right documents once rowids change."""
+    print("\n🧹 Testing full-text search after a table rebuild...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "rebuild.db")
+        store = SimpleDataStore(db_path)
+        doc_ids = [store.add_document("note", f"Note {i}", f"note number {i} about topic{i}", {})
+                   for i in range(4)]
+
+        # Rebuild documents in reverse order, as a schema migration or dump/restore would,
+        # so every row gets a different rowid
+        schema = store.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'documents'").fetchone()[0]
+        store.conn.executescript(f"""
+            {schema.replace('documents', 'documents_new', 1)};
+            INSERT INTO documents_new SELECT * FROM documents ORDER BY rowid DESC;
+            DROP TABLE documents;
+            ALTER TABLE documents_new RENAME TO documents;
+        """)
+        store.close()
+
+        store = SimpleDataStore(db_path)
+        for i, doc_id in enumerate(doc_ids):
+            assert [r['id'] for r in store.search_documents(f"topic{i}")] == [doc_id]
+        store.update_document(doc_ids[0], content="rewritten")
+        assert store.search_documents("topic0") == []
+        assert [r['id'] for r in store.search_documents("topic3")] == [doc_ids[3]]
+        store.close()
+
+    print("✅ Index still keyed to the right documents")
+
 def insert_sample_data():
     """Insert sample data for demonstration."""
     print("\n📚 Inserting sample data...")
@@ -324,6 +402,10 @@ if __name__ == "__main__":
     # Run interview tests
     interview_success = test_interview_functionality()
     
+    # Run full-text search tests (they raise on failure)
+    test_full_text_search()
+    test_search_survives_table_rebuild()
+    
     # Insert sample data
     sample_success = insert_sample_data()
     
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared, pooled EnhancedDataStore
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+Embeddings use the offline hashing model.
+"""
+
+import sys
+import threading
+import uuid
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='config.env')
+
+from app import embeddings
+from app.enhanced_data_store import get_store
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def insert_document(conn, doc_id, title):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO documents (id, type, title, content, metadata)
+            VALUES (%s, 'note', %s, '', '{}')
+        """, (doc_id, title))
+
+def document_exists(store, doc_id):
+    # Read through a different pooled connection than the one that wrote
+    conn = store.pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM documents WHERE id = %s", (doc_id,))
+            return cursor.fetchone() is not None
+    finally:
+        conn.rollback()
+        store.pool.putconn(conn)
+
+def test_connection_commits_and_returns_to_pool():
+    """Test that a successful block is committed and its connection handed back."""
+    print("🧪 Testing pooled connection commit...")
+
+    store = make_store()
+    in_use = len(store.pool._used)
+    doc_id = str(uuid.uuid4())
+    with store._connection() as conn:
+        insert_document(conn, doc_id, 'Committed through the pool')
+        assert len(store.pool._used) == in_use + 1
+
+    assert len(store.pool._used) == in_use
+    assert document_exists(store, doc_id)
+
+    with store._connection() as conn, conn.cursor() as cursor:
+        cursor.execute("DELETE FROM documents WHERE id = %s", (doc_id,))
+    assert not document_exists(store, doc_id)
+    print("✅ Write committed, connection returned")
+
+def test_connection_rolls_back_on_error():
+    """Test that a failing block is rolled back and leaves a clean connection behind."""
+    print("\n↩️ Testing pooled connection rollback...")
+
+    store = make_store()
+    in_use = len(store.pool._used)
+    doc_id = str(uuid.uuid4())
+    with pytest.raises(RuntimeError):
+        with store._connection() as conn:
+            insert_document(conn, doc_id, 'Rolled back')
+            raise RuntimeError("abort")
+    assert not document_exists(store, doc_id)
+
+    # A statement error aborts the transaction; the pool must not hand that out again
+    with pytest.raises(psycopg2.Error):
+        with store._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT * FROM no_such_table")
+    assert len(store.pool._used) == in_use
+    for _ in range(store.pool.minconn + 1):
+        with store._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
+    print("✅ Rolled back and the pool stayed usable")
+
+def test_get_store_is_a_singleton():
+    """Test that every thread gets the same store, created once."""
+    print("\n🧩 Testing the shared store...")
+
+    store = make_store()
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(get_store())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(seen) == 8
+    assert all(other is store for other in seen)
+    print("✅ One store shared by all threads")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for EnhancedDataStore.transaction()
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+Embeddings use the offline hashing model.
+"""
+
+import sys
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='config.env')
+
+from app import embeddings
+from app.enhanced_data_store import get_store
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def test_rollback_leaves_no_search_entries():
+    """Test that a rolled back unit of work writes nothing to PostgreSQL or Chroma."""
+    print("🧪 Testing transaction rollback...")
+
+    store = make_store()
+    created = {}
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            created['doc'] = store.add_document('transcript', 'Rolled back', 'never committed', {})
+            created['media'] = store.add_media_item('rolled_back.jpg', {'title': 'Rolled back photo'})
+            raise RuntimeError("abort")
+
+    assert store.get_document(created['doc']) is None
+    assert store.get_media_item(created['media']) is None
+    assert store.documents_collection.get(ids=[created['doc']])['ids'] == []
+    assert store.media_collection.get(ids=[created['media']])['ids'] == []
+    print("✅ Nothing left behind")
+
+def test_delete_rolled_back_keeps_search_entries():
+    """Test that deletes only reach Chroma once they are committed."""
+    print("\n🗑️ Testing rolled back delete...")
+
+    store = make_store()
+    doc_id = store.add_document('transcript', 'Kept', 'a committed transcript', {})
+    media_id = store.add_media_item('kept.jpg', {'title': 'Kept photo'})
+    with pytest.raises(RuntimeError):
+        with store.transaction():
+            store.delete_document(doc_id)
+            store.delete_media_items_bulk([media_id])
+            raise RuntimeError("abort")
+
+    assert store.documents_collection.get(ids=[doc_id])['ids'] == [doc_id]
+    assert store.media_collection.get(ids=[media_id])['ids'] == [media_id]
+
+    with store.transaction():
+        store.delete_document(doc_id)
+        store.delete_media_items_bulk([media_id])
+    assert store.documents_collection.get(ids=[doc_id])['ids'] == []
+    assert store.media_collection.get(ids=[media_id])['ids'] == []
+    print("✅ Search entries follow the committed state")
+
+def test_nested_transaction_is_a_savepoint():
+    """Test that a failed nested unit of work only undoes its own writes."""
+    print("\n🪆 Testing nested transaction...")
+
+    store = make_store()
+    with store.transaction():
+        doc_id = store.add_document('transcript', 'Outer', 'outer transcript', {})
+        with pytest.raises(RuntimeError):
+            with store.transaction():
+                media_id = store.add_media_item('inner.jpg', {'title': 'Inner photo'})
+                raise RuntimeError("abort inner")
+
+    assert store.get_document(doc_id) is not None
+    assert store.get_media_item(media_id) is None
+    assert store.media_collection.get(ids=[media_id])['ids'] == []
+
+    store.delete_document(doc_id)
+    print("✅ Only the inner writes were undone")
+
+def test_failing_index_update_does_not_skip_others():
+    """Test that one failing post-commit callback doesn't stop the rest."""
+    print("\n🧯 Testing post-commit callback isolation...")
+
+    store = make_store()
+    media_id = store.add_media_item('isolated.jpg', {'title': 'Isolated photo'})
+    ran = []
+
+    def fail():
+        raise RuntimeError("index unavailable")
+
+    with store.transaction():
+        store._after_commit(fail)
+        store._after_commit(lambda: ran.append(True))
+        store.add_context(media_id, "Picnic by the lighthouse")
+
+    assert ran == [True]
+    assert "lighthouse" in store.media_collection.get(ids=[media_id])['documents'][0]
+
+    store.delete_media_items_bulk([media_id])
+    print("✅ Later callbacks and the reindex still ran")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script for the media tag counts view
+Needs the PostgreSQL server from config.env; skipped when it is unreachable.
+"""
+
+import sys
+import time
+import uuid
+
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path='config.env')
+
+from app import embeddings, enhanced_data_store
+from app.enhanced_data_store import get_store
+
+def make_store():
+    if embeddings._shared_service is None:
+        embeddings._shared_service = embeddings.EmbeddingService(model='hash')
+    enhanced_data_store.TAG_COUNTS_REFRESH_SECONDS = 0
+    try:
+        return get_store()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+def count_for(store, tag):
+    return {row["tag"]: row["count"] for row in store.tag_counts()}.get(tag, 0)
+
+def wait_for_count(store, tag, expected, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while count_for(store, tag) != expected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return count_for(store, tag)
+
+def test_tag_writes_refresh_counts():
+    """Test that tag edits and deletes reach the counts view in the background."""
+    print("🧪 Testing tag counts refresh...")
+
+    store = make_store()
+    tag = f"counted-{uuid.uuid4().hex[:8]}"
+    media_id = store.add_media_item('counted.jpg', {'title': 'Counted photo', 'tags': [tag]})
+    assert wait_for_count(store, tag, 1) == 1
+
+    store.delete_media_item(media_id)
+    assert wait_for_count(store, tag, 0) == 0
+    print("✅ Counts followed the tag writes")
+
+def test_other_media_writes_leave_counts_alone():
+    """Test that a summary-only edit doesn't schedule a refresh of the view."""
+    print("\n📝 Testing summary-only edits...")
+
+    store = make_store()
+    media_id = store.add_media_item('summarised.jpg', {'title': 'Summarised photo'})
+    # Let any refresh scheduled by the insert start first
+    deadline = time.monotonic() + 5
+    while store._tag_counts_stale.is_set() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    store.update_media_item(media_id, summary='Only the summary changed')
+    assert not store._tag_counts_stale.is_set()
+
+    store.delete_media_item(media_id)
+    print("✅ No refresh scheduled")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
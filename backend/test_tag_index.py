@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory tag index
+Runs entirely in memory - no TinyDB file needed
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from tag_index import TagIndex
+
+def make_index():
+    stored = {
+        "paris.jpg": ["Paris", "2019", "Eiffel Tower"],
+        "louvre.jpg": ["Paris", "museum"],
+        "beach.jpg": ["2019", "beach"],
+    }
+    return TagIndex(lambda: stored)
+
+def test_queries():
+    """Test counts, vocabulary and per-tag lookups after loading."""
+    print("🧪 Testing tag index queries...")
+
+    index = make_index()
+    assert index.counts()[:2] == [("2019", 2), ("Paris", 2)]
+    assert index.media_for_tag("Paris") == ["louvre.jpg", "paris.jpg"]
+    assert index.vocabulary() == ["2019", "beach", "Eiffel Tower", "museum", "Paris"]
+    print(f"✅ Counts: {index.counts()}")
+
+def test_incremental_updates():
+    """Test that set, remove and clear keep both directions in sync."""
+    print("\n🏷️ Testing incremental updates...")
+
+    index = make_index()
+
+    index.set_tags("beach.jpg", ["beach", "Paris"])
+    assert index.media_for_tag("2019") == ["paris.jpg"]
+    assert len(index.media_for_tag("Paris")) == 3
+
+    affected = index.remove_tag("Paris")
+    assert affected == ["beach.jpg", "louvre.jpg", "paris.jpg"]
+    assert "Paris" not in index.vocabulary()
+    assert index.tags_for("louvre.jpg") == ["museum"]
+
+    index.set_tags("louvre.jpg", [])
+    assert "museum" not in index.vocabulary()
+    assert "louvre.jpg" not in index.tagged_media()
+
+    index.clear()
+    assert not index.counts()
+    assert not index.tags_for("paris.jpg")
+    print("✅ Index stays consistent across updates")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
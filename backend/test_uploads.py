@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming and resumable uploads
+Runs against a temp directory - no PostgreSQL needed
+"""
+
+import hashlib
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from uploads import (
+    UploadError, stream_to_temp, commit_to_store, create_upload_session,
+    get_upload_session, append_chunk, finish_upload_session, CHUNK_SIZE
+)
+
+def test_streaming_hash():
+    """Test that streamed uploads are hashed, sized and stored by content."""
+    print("🧪 Testing streaming upload...")
+
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    with tempfile.TemporaryDirectory() as store_dir:
+        tmp_dir = os.path.join(store_dir, '.incoming')
+        tmp_path, digest, size = stream_to_temp(io.BytesIO(data), tmp_dir)
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert size == len(data)
+
+        final_path = commit_to_store(tmp_path, digest, 'Beach.JPG', store_dir)
+        assert final_path == os.path.join(store_dir, digest[:2], f"{digest}.jpg")
+
+        # Storing the same content again reuses the file and cleans up the temp copy
+        tmp_path, digest, _ = stream_to_temp(io.BytesIO(data), tmp_dir)
+        assert commit_to_store(tmp_path, digest, 'copy.jpg', store_dir) == final_path
+        assert not os.path.exists(tmp_path)
+
+    print("✅ Uploads hashed while streaming and stored once per content")
+
+def test_resumable_upload():
+    """Test chunked uploads with an interruption and a retried chunk."""
+    print("\n📱 Testing resumable upload...")
+
+    data = os.urandom(250000)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        session = create_upload_session('phone.jpg', len(data), 'image/jpeg', tmp_dir=tmp_dir)
+        upload_id = session['upload_id']
+
+        append_chunk(upload_id, 0, io.BytesIO(data[:100000]), tmp_dir)
+
+        # A retried chunk at a stale offset is rejected
+        with pytest.raises(UploadError):
+            append_chunk(upload_id, 0, io.BytesIO(data[:100000]), tmp_dir)
+
+        # The client resumes from the offset the server reports
+        offset = get_upload_session(upload_id, tmp_dir)['offset']
+        session = append_chunk(upload_id, offset, io.BytesIO(data[offset:]), tmp_dir)
+        assert session['complete'], f"Upload not complete at offset {session['offset']}"
+
+        _, part_path, digest, size = finish_upload_session(upload_id, tmp_dir)
+        with open(part_path, 'rb') as f:
+            assert f.read() == data
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert get_upload_session(upload_id, tmp_dir) is None
+
+    print("✅ Chunks resumed from the server offset and reassembled")
+
+class FailingStream(io.BytesIO):
+    """Delivers its data, then fails like a dropped connection."""
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            raise ConnectionResetError("client went away")
+        return data
+
+def test_failed_chunk_keeps_offset():
+    """Test that an oversized or interrupted chunk leaves the offset where it was."""
+    print("\n✂️ Testing failed chunks...")
+
+    data = os.urandom(CHUNK_SIZE + CHUNK_SIZE // 2)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        upload_id = create_upload_session('big.jpg', len(data), tmp_dir=tmp_dir)['upload_id']
+        append_chunk(upload_id, 0, io.BytesIO(data[:1000]), tmp_dir)
+
+        # Refused up front when the length is known
+        with pytest.raises(UploadError):
+            append_chunk(upload_id, 1000, io.BytesIO(data[1000:] + b'x'), tmp_dir, length=len(data))
+        assert get_upload_session(upload_id, tmp_dir)['offset'] == 1000
+
+        # Without a length the first megabyte is written before the limit is hit
+        with pytest.raises(UploadError):
+            append_chunk(upload_id, 1000, io.BytesIO(data[1000:] + b'x' * CHUNK_SIZE), tmp_dir)
+        assert get_upload_session(upload_id, tmp_dir)['offset'] == 1000
+
+        with pytest.raises(ConnectionResetError):
+            append_chunk(upload_id, 1000, FailingStream(data[1000:CHUNK_SIZE]), tmp_dir)
+        assert get_upload_session(upload_id, tmp_dir)['offset'] == 1000
+
+        session = append_chunk(upload_id, 1000, io.BytesIO(data[1000:]), tmp_dir)
+        assert session['complete']
+        _, part_path, digest, _ = finish_upload_session(upload_id, tmp_dir)
+        assert digest == hashlib.sha256(data).hexdigest()
+
+    print("✅ Failed chunks were cut off and the upload resumed cleanly")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
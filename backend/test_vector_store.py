@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the packed vector store
+Runs entirely in memory - no PostgreSQL or ChromaDB needed
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+import pytest
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from vector_store import VectorIndex, pack_vector, unpack_vector
+
+def test_packing():
+    """Test float32 packing round trip."""
+    print("🧪 Testing vector packing...")
+
+    vector = [0.25, -1.5, 3.0, 0.0]
+    packed = pack_vector(vector)
+    assert len(packed) == 4 * len(vector)
+    assert np.array_equal(unpack_vector(packed), np.array(vector, dtype=np.float32))
+    print("✅ Vectors pack to 4 bytes per dimension and round trip")
+
+def test_brute_force_search():
+    """Test exact nearest neighbour search, upserts and removals."""
+    print("\n🔍 Testing brute-force search...")
+
+    index = VectorIndex()
+    index.upsert(["north", "east", "south"], [[0, 1], [1, 0], [0, -1]])
+
+    results = index.nearest([0.1, 0.9], k=2)
+    assert [media_id for media_id, _ in results] == ["north", "east"]
+    print(f"✅ Nearest to north-ish query: {results}")
+
+    # Replacing a vector moves it in the ranking
+    index.upsert(["south"], [[0.05, 1]])
+    assert index.nearest([0.1, 1], k=1)[0][0] == "south"
+    assert len(index) == 3
+    print("✅ Upsert replaced the existing vector")
+
+    index.remove(["south", "missing"])
+    assert "south" not in index
+    assert index.nearest([0, 1], k=1)[0][0] == "north"
+    print("✅ Remove dropped the vector")
+
+def test_ivf_search():
+    """Test that the IVF path agrees with an exact scan on clustered data."""
+    print("\n🧭 Testing IVF search...")
+
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(20, 32))
+    vectors = np.repeat(centers, 150, axis=0) + rng.normal(scale=0.05, size=(3000, 32))
+    ids = [f"media-{i}" for i in range(len(vectors))]
+
+    exact = VectorIndex(brute_force_limit=len(vectors))
+    approximate = VectorIndex(brute_force_limit=100, n_probe=4)
+    exact.upsert(ids, vectors)
+    approximate.upsert(ids, vectors)
+
+    hits = 0
+    queries = vectors[rng.choice(len(vectors), 20, replace=False)]
+    for query in queries:
+        expected = {media_id for media_id, _ in exact.nearest(query, k=10)}
+        actual = {media_id for media_id, _ in approximate.nearest(query, k=10)}
+        hits += len(expected & actual)
+
+    recall = hits / (10 * len(queries))
+    assert recall >= 0.9, f"IVF recall too low: {recall:.2f}"
+    print(f"✅ IVF recall@10: {recall:.2f}")
+
+def test_sidecar_persistence():
+    """Test saving and memory-mapping the .npy sidecar."""
+    print("\n💾 Testing .npy sidecar persistence...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "media_vectors")
+        index = VectorIndex()
+        index.upsert(["a", "b"], [[1, 0, 0], [0, 1, 0]])
+        index.save(path)
+
+        loaded = VectorIndex.load(path)
+        assert loaded.nearest([0, 1, 0], k=1)[0][0] == "b"
+
+        # Mutating a memory-mapped index must copy rather than write to disk
+        loaded.upsert(["c"], [[0, 0, 1]])
+        assert len(loaded) == 3
+        assert len(VectorIndex.load(path)) == 2
+
+    print("✅ Sidecar saved, memory-mapped and copied on write")
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
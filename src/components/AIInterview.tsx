@@ -122,13 +122,18 @@ export const AIInterview: React.FC<AIInterviewProps> = ({ media, onClose, onSave
     setIsLoading(true);
 
     try {
-      const response = await interviewApi.chatInterview(media.id, userInput, messages);
+      // Show the reply as it streams in, then replace it with the server's history
+      const pending: InterviewMessage[] = [...messages, { role: 'user', content: userInput }];
+      const response = await interviewApi.chatInterviewStream(media.id, userInput, messages, (partial) => {
+        setMessages([...pending, { role: 'assistant', content: partial }]);
+      });
       // Filter out system messages from the response
       const filteredMessages = response.messages.filter(msg => msg.role !== 'system');
       setMessages(filteredMessages);
     } catch (error) {
       console.error('Failed to send message:', error);
-      // If the request failed, add the user message back to the input
+      // If the request failed, drop any partial reply and add the user message back to the input
+      setMessages(messages);
       setCurrentInput(userInput);
     } finally {
       setIsLoading(false);
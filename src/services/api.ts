@@ -357,6 +357,51 @@ export const interviewApi = {
     return response.json();
   },
 
+  // Same as chatInterview, but the reply arrives as Server-Sent Events;
+  // onToken receives the reply text generated so far.
+  async chatInterviewStream(
+    mediaId: string,
+    userText: string,
+    messages: InterviewMessage[],
+    onToken: (partialReply: string) => void,
+  ): Promise<InterviewResponse> {
+    const response = await fetch(`${API_BASE_URL}/media/${mediaId}/interview/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ user_text: userText, messages }),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error('Failed to continue interview');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let reply = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split('\n\n');
+      buffer = events.pop() ?? '';
+      for (const raw of events) {
+        const event = raw.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] ?? '{}');
+        if (event === 'token') {
+          reply += data.text;
+          onToken(reply);
+        } else if (event === 'done') {
+          return data as InterviewResponse;
+        } else if (event === 'error') {
+          throw new Error(data.error || 'Failed to continue interview');
+        }
+      }
+    }
+    throw new Error('Interview stream ended unexpectedly');
+  },
+
   async saveInterview(mediaId: string, messages: InterviewMessage[]): Promise<{ context_id: string }> {
     const response = await fetch(`${API_BASE_URL}/media/${mediaId}/interview/save`, {
       method: 'POST',